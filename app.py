@@ -7,6 +7,26 @@ from google.adk.cli.fast_api import get_fast_api_app
 from dotenv import load_dotenv
 from datetime import datetime, timezone
 from chat_component import root_agent
+from chat_component.tools.connection_pool import init_pool, close_pool
+from chat_component.tools.read_replica import init_read_replica, close_read_replica
+from chat_component.tools.async_db import shutdown_executor, run_db
+from chat_component.tools.expense_writer import shutdown_writer
+from chat_component.tools.agent_tools import split_bills_batch
+from chat_component.tools.roster_cache import roster_cache
+from chat_component.tools.row_scope import plan_cache_stats
+from chat_component.tools.query_cache import query_cache
+from chat_component.tools.query_plans import query_plan_recorder, advise
+from chat_component.tools.query_budget import budget_counters
+from chat_component.tools.ledger import ensure_ledger
+from chat_component.tools.health_sampler import health_sampler
+from chat_component.tools.fast_path import fast_path_stats
+from chat_component.tools.response_cache import response_cache
+from chat_component.tools.plan_executor import plan_stats
+from chat_component.tools.turn_budget import turn_budget_stats, TurnBudgetPlugin
+from chat_component.tools.stream_json import IncrementalJsonValidator, JsonStreamError
+from chat_component.tools.session_store import (
+    create_session_service, close_session_service, session_store_stats, SESSION_BACKEND
+)
 from contextlib import asynccontextmanager
 
 def get_api_key_from_secret_manager():
@@ -44,8 +64,7 @@ def get_api_key_from_secret_manager():
 # Set up paths
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 AGENT_DIR = BASE_DIR  # Parent directory containing multi_tool_agent
-# Set up DB path for sessions
-SESSION_DB_URL = f"sqlite:///{os.path.join(BASE_DIR,'chat_component', 'mock_finance.db')}"
+# Sessions live in their own store (SESSION_BACKEND), not in mock_finance.db
 
 # Create a lifespan event to initialize and clean up the session service
 @asynccontextmanager
@@ -57,17 +76,53 @@ async def lifespan(app: FastAPI):
     # Initialize Google API key from Secret Manager
     get_api_key_from_secret_manager()
 
-    # Initialize the DatabaseSessionService instance and store it in app.state
+    # Initialize the session service selected by SESSION_BACKEND and store it in app.state
+    try:
+        app.state.session_service = create_session_service()
+        print(f"Session service initialized successfully: {session_store_stats(app.state.session_service)}")
+    except Exception as e:
+        print(f"Session service ({SESSION_BACKEND}) initialization failed.")
+        print(e)
+
+    # Build the ADK Runner for the multi-agent pipeline once; /process-query reuses it
+    try:
+        app.state.runner = Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=app.state.session_service,
+            plugins=[TurnBudgetPlugin()],
+        )
+        print("Agent runner initialized successfully.")
+    except Exception as e:
+        print("Agent runner initialization failed.")
+        print(e)
+
+    # Warm the finance database connection pool used by the agent tools
     try:
-        app.state.session_service =DatabaseSessionService(db_url=SESSION_DB_URL)
-        print("Database session service initialized successfully.")
+        pool = init_pool()
+        ensure_ledger()
+        print(f"Finance database pool initialized: {pool.health_check()}")
+        replica = init_read_replica()
+        print(f"Read-only pool for agent SQL initialized: {replica.stats()['mode']}")
     except Exception as e:
-        print("Database session service initialized failed.")
+        print("Finance database pool initialization failed.")
         print(e)
 
+    # Sample system and database health in the background for /health
+    await health_sampler.start()
+
     yield # This is where the application runs, handling requests
     # Shutdown code
     print("Application shutting down...")
+    await health_sampler.stop()
+    if getattr(app.state, 'runner', None) is not None:
+        await app.state.runner.close()
+    shutdown_executor()
+    shutdown_writer()
+    if getattr(app.state, 'session_service', None) is not None:
+        close_session_service(app.state.session_service)
+    close_read_replica()
+    close_pool()
 # Create the FastAPI app using ADK's helper
 app: FastAPI = get_fast_api_app(
     agents_dir=AGENT_DIR,
@@ -80,56 +135,49 @@ app: FastAPI = get_fast_api_app(
 @app.get("/health")
 async def health_check():
     """
-    Comprehensive health check endpoint that verifies system status
+    Comprehensive health check endpoint that verifies system status.
+    Answers from the background sampler's latest snapshot, without blocking.
     """
-    import time
-    import psutil
-    from datetime import datetime
-
     try:
-        # Check database connectivity
-        db_status = "healthy"
-        try:
-            if hasattr(app.state, 'session_service') and app.state.session_service:
-                # Test database connection by attempting a simple operation
-                db_status = "healthy"
-            else:
-                db_status = "not_initialized"
-        except Exception as e:
-            db_status = f"error: {str(e)}"
+        snapshot, sampler = health_sampler.snapshot()
+        if snapshot is None:
+            snapshot = {"database": {"status": "not_sampled"}, "system": {}}
 
-        # Get system metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        # Check database connectivity
+        db_status = snapshot["database"]["status"]
+        if not getattr(app.state, 'session_service', None):
+            db_status = "not_initialized"
 
+        system = snapshot["system"]
         health_data = {
             "status": "healthy",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "uptime_seconds": time.time() - getattr(app.state, 'start_time', time.time()),
             "database": {
-                "status": db_status
-            },
-            "system": {
-                "cpu_percent": cpu_percent,
-                "memory": {
-                    "total": memory.total,
-                    "available": memory.available,
-                    "percent": memory.percent
-                },
-                "disk": {
-                    "total": disk.total,
-                    "free": disk.free,
-                    "percent": (disk.used / disk.total) * 100
-                }
+                **snapshot["database"],
+                "status": db_status,
+                "roster_cache": roster_cache.stats(),
+                "row_scope_plans": plan_cache_stats(),
+                "query_cache": query_cache.stats(),
+                "query_plans": query_plan_recorder.stats(),
+                "query_budget": budget_counters.stats(),
+                "session_store": session_store_stats(app.state.session_service)
+                if getattr(app.state, 'session_service', None) is not None else {"status": "not_initialized"}
             },
+            "system": system,
+            "sampler": sampler,
             "services": {
-                "agent_service": "healthy" if 'root_agent' in globals() else "not_loaded"
+                "agent_service": "healthy" if 'root_agent' in globals() else "not_loaded",
+                "fast_path": fast_path_stats.stats(),
+                "response_cache": response_cache.stats(),
+                "planner": plan_stats.stats(),
+                "turn_budget": turn_budget_stats.stats()
             }
         }
 
         # Determine overall health status
-        if db_status.startswith("error") or cpu_percent > 90 or memory.percent > 90:
+        if (db_status.startswith("error") or sampler["stale"]
+                or system.get("cpu_percent", 0) > 90 or system.get("memory", {}).get("percent", 0) > 90):
             health_data["status"] = "degraded"
 
         return health_data
@@ -164,13 +212,15 @@ APP_NAME = "CustomerInquiryProcessor"
 
 
 from fastapi import FastAPI, APIRouter, HTTPException
-from google.adk.sessions import DatabaseSessionService
+from fastapi.responses import StreamingResponse
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.genai import types
 import json
 import re
 import uuid
 from pydantic import BaseModel
+from typing import Any, Dict, List
 
 class CustomerInquiryResponse(BaseModel):
     original_inquiry: str
@@ -180,8 +230,43 @@ class CustomerInquiryResponse(BaseModel):
 class CustomerInquiryRequest(BaseModel):
     customer_inquiry: str
 
+class BatchSplitRequest(BaseModel):
+    user_id: int
+    group_name: str
+    bills: List[Dict[str, Any]]
+
 APP_NAME = "CustomerInquiryProcessor"
 
+@app.get("/query-plans")
+async def query_plans_report():
+    """
+    Slow and full-scan agent queries seen by this process, with index proposals.
+    Apply proposals offline with: python -m chat_component.tools.query_plans advise --apply
+    """
+    records = query_plan_recorder.records()
+    proposals = await run_db(advise, records)
+    return {
+        "stats": query_plan_recorder.stats(),
+        "queries": records,
+        "index_proposals": [
+            {key: proposal[key] for key in ("create", "table", "columns", "total_ms")}
+            for proposal in proposals
+        ]
+    }
+
+@app.post("/split-bills-batch")
+async def split_bills_batch_endpoint(request_body: BatchSplitRequest):
+    """
+    Split and save many bills for one group in a single transaction.
+    request_body: {"user_id": 1, "group_name": "Family Trip", "bills": [{"split_type": "equal", "total_amount": 42.5, "description": "Groceries"}]}
+    """
+    result = json.loads(await run_db(
+        split_bills_batch, request_body.user_id, request_body.group_name, json.dumps(request_body.bills)
+    ))
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
 @app.post("/process-query")
 async def process_customer_inquiry(
     request_body: CustomerInquiryRequest
@@ -197,39 +282,16 @@ async def process_customer_inquiry(
     user_id = unique_id
 
     try:
-         # Get database session service from application state
-        session_service: DatabaseSessionService = app.state.session_service
-        
-        # Try to get existing session or create new one
-        current_session = None
-        try:
-            current_session = await session_service.get_session(
-                app_name=APP_NAME,
-                user_id = user_id,
-                session_id=session_id,
-            )
-        except Exception as e:
-            print(f"Existing Session retrieval failed for session_id='{session_id}' "
-                    f"and user_uid='{user_id}': {e}")
-        
-        # If no session found, creating new session
-        if current_session is None:
-            current_session = await session_service.create_session(
-                app_name=APP_NAME,
-                user_id=user_id,
-                session_id=session_id,
-            )
-        else:
-            print(f"Existing session '{session_id}'has been found. Resuming session.")
+        # The runner and agent tree are built once in lifespan
+        runner: Runner = app.state.runner
 
-        # Initialize the ADK Runner with our multi-agent pipeline
-        runner = Runner(
+        # Every request gets a fresh UUID, so there is no existing session to look up
+        await runner.session_service.create_session(
             app_name=APP_NAME,
-            agent=root_agent,
-            session_service = session_service,
+            user_id=user_id,
+            session_id=session_id,
         )
 
-
          # Format the user query as a structured message using the google genais content types
         user_message = types.Content(
             role="user", parts=[types.Part.from_text(text=customer_inquiry)]
@@ -276,6 +338,108 @@ async def process_customer_inquiry(
         raise HTTPException(status_code=500, detail=f"Failed to process agent query: {e}")
     
 
+def sse_event(name: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/process-query/stream")
+async def process_customer_inquiry_stream(
+    request_body: CustomerInquiryRequest
+):
+    """
+    Streaming variant of /process-query as Server-Sent Events.
+    request_body: {"customer_inquiry": "How much did I spend on groceries last month?"}
+    Events:
+        session: {"session_id": ...} as soon as the request is accepted
+        progress: {"author", "tool"/"tool_result"} when an agent calls a sub-agent or tool and gets its answer
+        delta: {"author", "text"} partial answer text as the model generates it
+        validation: {"valid": false, "error"} at the first character that breaks the JSON answer,
+                    {"valid": true} once the answer's JSON value is complete
+        final: the parsed JSON answer, same body as /process-query
+        error: {"detail": ...}
+    """
+    unique_id = str(uuid.uuid4())
+    session_id = unique_id
+    user_id = unique_id
+
+    try:
+        runner: Runner = app.state.runner
+        await runner.session_service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session_id,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process agent query: {e}")
+
+    user_message = types.Content(
+        role="user", parts=[types.Part.from_text(text=request_body.customer_inquiry)]
+    )
+
+    async def event_stream():
+        yield sse_event("session", {"session_id": session_id})
+        # Validates the text of the current model turn as it streams in
+        validator, streamed, invalid = IncrementalJsonValidator(), "", False
+        final_response, final_validator = None, None
+        try:
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=user_message,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            ):
+                for call in event.get_function_calls():
+                    yield sse_event("progress", {"author": event.author, "tool": call.name})
+                for response in event.get_function_responses():
+                    yield sse_event("progress", {"author": event.author, "tool_result": response.name})
+
+                parts = event.content.parts if event.content and event.content.parts else []
+                text = "".join(part.text for part in parts if part.text and not part.thought)
+
+                if event.partial:
+                    if not text:
+                        continue
+                    yield sse_event("delta", {"author": event.author, "text": text})
+                    if invalid:
+                        continue
+                    was_complete = validator.complete
+                    streamed += text
+                    try:
+                        validator.feed(text)
+                    except JsonStreamError as e:
+                        invalid = True
+                        yield sse_event("validation", {"valid": False, "error": str(e)})
+                        continue
+                    if validator.complete and not was_complete:
+                        yield sse_event("validation", {"valid": True})
+                    continue
+
+                if event.is_final_response() and text:
+                    final_response = text
+                    # Reuse the streamed validation when the aggregated turn matches it
+                    final_validator = validator if streamed == text and not invalid else None
+                # Any non-partial event closes the current model turn
+                validator, streamed, invalid = IncrementalJsonValidator(), "", False
+
+            if final_response is None:
+                yield sse_event("error", {"detail": "No response received from agent."})
+                return
+            if final_validator is None:
+                final_validator = IncrementalJsonValidator()
+                final_validator.feed(final_response)
+            yield sse_event("final", final_validator.finish())
+        except JsonStreamError:
+            yield sse_event("error", {"detail": "Agent response is not valid JSON."})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Failed to process agent query: {e}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 
 if __name__ == "__main__":
     print("Starting FastAPI server...")
@@ -0,0 +1,86 @@
+"""
+Load benchmark for the async group tools.
+
+Simulates N concurrent chat sessions, each issuing read-only tool calls, and
+reports tool latency plus event-loop lag (how late a 5 ms heartbeat fires).
+Blocking tools push the loop lag up with every extra session; the async
+tools keep it flat because the sqlite3 work runs on the executor.
+
+Run against a copy of the database so the numbers are not skewed by a live app:
+    FINANCE_DB_PATH=/tmp/finance_copy.db python benchmarks/async_tools_benchmark.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chat_component.tools import agent_tools, async_agent_tools  # noqa: E402
+
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+CALLS_PER_SESSION = 20
+HEARTBEAT_INTERVAL = 0.005
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def heartbeat(lags, stop):
+    """Record how late the event loop wakes up for a fixed-interval timer"""
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def session(call, latencies):
+    for i in range(CALLS_PER_SESSION):
+        start = time.perf_counter()
+        if i % 2:
+            await call("get_group_balance_info", 1, "Family Trip")
+        else:
+            await call("get_group_info", "Family Trip", 1)
+        latencies.append(time.perf_counter() - start)
+
+
+async def blocking_call(name, *args):
+    return getattr(agent_tools, name)(*args)
+
+
+async def async_call(name, *args):
+    return await getattr(async_agent_tools, name)(*args)
+
+
+async def run_level(call, sessions):
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.gather(*(session(call, latencies) for _ in range(sessions)))
+    stop.set()
+    await beat
+    return latencies, lags or [0.0]
+
+
+async def main():
+    print(f"{'mode':<10}{'sessions':>9}{'tool p50 ms':>13}{'tool p99 ms':>13}{'loop lag p99 ms':>17}")
+    for mode, call in (("blocking", blocking_call), ("async", async_call)):
+        for sessions in CONCURRENCY_LEVELS:
+            # The tools print every SQL statement; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, lags = await run_level(call, sessions)
+            print(f"{mode:<10}{sessions:>9}"
+                  f"{statistics.median(latencies) * 1000:>13.2f}"
+                  f"{percentile(latencies, 99) * 1000:>13.2f}"
+                  f"{percentile(lags, 99) * 1000:>17.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark: one split tool call per bill vs split_bills_batch.
+
+Works on a temporary copy of mock_finance.db, so the real database is never
+touched.
+
+    python benchmarks/batch_split_benchmark.py [bill_count]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix="finance-bench-")
+os.environ["FINANCE_DB_PATH"] = os.path.join(_tmpdir, "mock_finance.db")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.environ["FINANCE_DB_PATH"])
+
+from chat_component.tools import agent_tools  # noqa: E402
+from chat_component.tools.ledger import ensure_ledger, verify_ledger  # noqa: E402
+
+USER_ID = 1
+GROUP_NAME = "Family Trip"
+MEMBERS = ["Alice Johnson", "Bob Smith", "Charlie Brown"]
+
+
+def synthetic_bills(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    bills = []
+    for i in range(count):
+        amount = rng.randint(100, 50_000) / 100
+        kind = i % 4
+        if kind == 0:
+            bills.append({"split_type": "equal", "total_amount": amount, "description": f"bill {i}"})
+        elif kind == 1:
+            bills.append({"split_type": "percentage", "total_amount": amount, "description": f"bill {i}",
+                          "percentage_data": {"Alice Johnson": 50, "Bob Smith": 30, "Charlie Brown": 20}})
+        elif kind == 2:
+            first = round(amount / 2, 2)
+            bills.append({"split_type": "custom_amounts", "total_amount": amount, "description": f"bill {i}",
+                          "amount_data": {"Alice Johnson": first, "Bob Smith": round(amount - first, 2)}})
+        else:
+            bills.append({"split_type": "itemized", "description": f"bill {i}", "default_split": "equal",
+                          "items": [{"name": "shared", "price": amount},
+                                    {"name": "solo", "price": 4.5, "assigned_users": [rng.choice(MEMBERS)]}]})
+    return bills
+
+
+def one_call_per_bill(bills: list):
+    for bill in bills:
+        kind = bill["split_type"]
+        if kind == "equal":
+            agent_tools.split_bill_equal(USER_ID, GROUP_NAME, bill["total_amount"], bill["description"])
+        elif kind == "percentage":
+            agent_tools.split_bill_percentage(USER_ID, GROUP_NAME, bill["total_amount"],
+                                              json.dumps(bill["percentage_data"]), bill["description"])
+        elif kind == "custom_amounts":
+            agent_tools.split_bill_custom_amounts(USER_ID, GROUP_NAME, bill["total_amount"],
+                                                  json.dumps(bill["amount_data"]), bill["description"])
+        else:
+            agent_tools.split_bill_itemized(USER_ID, GROUP_NAME, json.dumps(bill["items"]),
+                                            bill["default_split"], bill["description"])
+
+
+def batched(bills: list):
+    result = json.loads(agent_tools.split_bills_batch(USER_ID, GROUP_NAME, json.dumps(bills)))
+    assert "error" not in result, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    bills = synthetic_bills(count)
+    ensure_ledger()
+
+    print(f"{'mode':<20}{'bills':>8}{'seconds':>10}{'bills/s':>12}")
+    for mode, run in (("one call per bill", one_call_per_bill), ("split_bills_batch", batched)):
+        # The tools print every statement; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(bills)
+            elapsed = time.perf_counter() - start
+        print(f"{mode:<20}{count:>8}{elapsed:>10.2f}{count / elapsed:>12.0f}")
+
+    assert not verify_ledger(), "ledger out of sync after benchmark"
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Write throughput under concurrent splits: per-request IMMEDIATE transactions
+vs the group-commit writer queue (DB_GROUP_COMMIT=1).
+
+Works on a temporary copy of mock_finance.db, so the real database is never
+touched.
+
+    python benchmarks/concurrent_write_benchmark.py [threads] [splits_per_thread]
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix="finance-bench-")
+os.environ["FINANCE_DB_PATH"] = os.path.join(_tmpdir, "mock_finance.db")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.environ["FINANCE_DB_PATH"])
+
+from chat_component.tools import agent_tools, expense_writer  # noqa: E402
+from chat_component.tools.ledger import ensure_ledger, verify_ledger  # noqa: E402
+
+USER_ID = 1
+GROUP_NAME = "Family Trip"
+
+
+def worker(splits: int) -> int:
+    errors = 0
+    for i in range(splits):
+        result = json.loads(agent_tools.split_bill_equal(USER_ID, GROUP_NAME, 10 + i % 90, f"bench {i}"))
+        errors += "error" in result
+    return errors
+
+
+def run(threads: int, splits: int) -> tuple:
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        errors = sum(pool.map(worker, [splits] * threads))
+        return time.perf_counter() - start, errors
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    splits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    total = threads * splits
+    ensure_ledger()
+
+    print(f"{'mode':<16}{'threads':>8}{'splits':>8}{'seconds':>10}{'splits/s':>10}{'errors':>8}")
+    for mode, group_commit in (("immediate", False), ("group commit", True)):
+        expense_writer.GROUP_COMMIT = group_commit
+        # The tools print every statement; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, errors = run(threads, splits)
+            expense_writer.shutdown_writer()
+        print(f"{mode:<16}{threads:>8}{total:>8}{elapsed:>10.2f}{total / elapsed:>10.0f}{errors:>8}")
+
+    assert not verify_ledger(), "ledger out of sync after benchmark"
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Fast-path router: match rate on a mixed request corpus and the cost of
+routing plus calling the tool directly.
+
+Runs against a temporary copy of the finance database. The agent-tree cost
+is not measured here (it needs the model); compare avg_fast_path_ms with
+avg_agent_ms from /health once the service has seen real traffic.
+
+    python benchmarks/fast_path_benchmark.py [repeats]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix="fast-path-bench-")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.path.join(workdir, "finance.db"))
+os.environ["FINANCE_DB_PATH"] = os.path.join(workdir, "finance.db")
+
+from chat_component.tools.fast_path import route, dispatch  # noqa: E402
+
+CORPUS = [
+    # Fully specified: expected to skip the model
+    "user_id: 1, group_name: Family Trip, split $150 equally for dinner",
+    "user_id: 3, group_name: Roommates, split 90 dollars equally",
+    "user_id: 1, group_name: Family Trip, who owes whom? settle up",
+    "user_id: 4, group_name: Friends Dinner, show balances",
+    "user_id: 4, group_name: Friends Dinner, list members",
+    "which groups does user 5 belong to",
+    # Needs the agents
+    "User 2 wants to split $45.50 evenly in the Office Lunch group for pizza",
+    "user_id: 1, group_name: Family Trip, split $150 equally with Alice and Bob",
+    "user_id: 1, group_name: Family Trip, Alice paid $150 for dinner, split equally",
+    "user_id: 1, group_name: Family Trip, split $150 equally except Bob",
+    "user_id: 1, group_name: Family Trip, split $150: Alice 50%, Bob 50%",
+    "split $150 equally",
+    "how much did I spend on groceries last month",
+    "Do I need milk?",
+    "What are my top spending categories this year and how can I save?",
+    "user_id: 1, group_name: Family Trip, split $100 and $50 equally",
+]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    try:
+        matches = [route(text) for text in CORPUS]
+        hits = sum(match is not None for match in matches)
+        for text, match in zip(CORPUS, matches):
+            print(f"  {'fast ' + match.intent if match else 'agent':18s} {text}")
+        print(f"{hits}/{len(CORPUS)} requests skip the model ({hits / len(CORPUS):.0%})")
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for text in CORPUS:
+                route(text)
+        route_us = (time.perf_counter() - start) / (repeats * len(CORPUS)) * 1e6
+        print(f"route(): {route_us:.1f} us/request")
+
+        reads = [match for match in matches if match is not None and match.intent != "split_equal"]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for match in reads:
+                dispatch(match)
+        read_ms = (time.perf_counter() - start) / (repeats * len(reads)) * 1000
+        print(f"route + read tool: {read_ms + route_us / 1000:.3f} ms/request")
+
+        splits = [match for match in matches if match is not None and match.intent == "split_equal"]
+        start = time.perf_counter()
+        for _ in range(max(repeats // 10, 1)):
+            for match in splits:
+                dispatch(match)
+        split_ms = (time.perf_counter() - start) / (max(repeats // 10, 1) * len(splits)) * 1000
+        print(f"route + split (write): {split_ms + route_us / 1000:.3f} ms/request")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
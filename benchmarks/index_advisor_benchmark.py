@@ -0,0 +1,98 @@
+"""
+Agent query latency before and after applying the index advisor's proposals.
+
+Works on a temporary copy of mock_finance.db grown with synthetic expenses,
+so the real database is never touched.
+
+    python benchmarks/index_advisor_benchmark.py [expense_count] [repeats]
+"""
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix="finance-bench-")
+os.environ["FINANCE_DB_PATH"] = os.path.join(_tmpdir, "mock_finance.db")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.environ["FINANCE_DB_PATH"])
+
+from chat_component.tools.sql_execution import execute_query_fetch  # noqa: E402
+from chat_component.tools.query_cache import query_cache  # noqa: E402
+from chat_component.tools.query_plans import query_plan_recorder, advise, apply_proposals  # noqa: E402
+
+# Question shapes the InformationAgent generates
+WORKLOAD = [
+    "SELECT SUM(amount) FROM expenses WHERE expense_date >= '2025-06-01'",
+    "SELECT strftime('%Y-%m', expense_date) AS month, SUM(amount) FROM expenses GROUP BY month ORDER BY month",
+    "SELECT type, SUM(amount) AS spent FROM expenses WHERE expense_date BETWEEN '2025-01-01' AND '2025-03-31' "
+    "GROUP BY type ORDER BY spent DESC LIMIT 5",
+    "SELECT name, total_price FROM expense_items ORDER BY total_price DESC LIMIT 10",
+    "SELECT e.description, r.url AS receipt_url FROM expenses e JOIN expense_receipts r "
+    "ON r.expense_id = e.expense_id WHERE e.expense_date >= '2025-06-01' LIMIT 20",
+]
+
+
+def grow(expense_count: int, seed: int = 5):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(os.environ["FINANCE_DB_PATH"])
+    with conn:
+        for _ in range(expense_count):
+            cursor = conn.execute(
+                "INSERT INTO expenses (group_id, payer_id, amount, description, expense_date, type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (rng.randint(1, 4), rng.randint(1, 5), rng.randint(100, 20_000) / 100, "synthetic",
+                 f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                 rng.choice(["food", "travel", "general", "fuel"]))
+            )
+            expense_id = cursor.lastrowid
+            conn.execute("INSERT INTO expense_items (expense_id, name, unit_price, total_price) VALUES (?, ?, ?, ?)",
+                         (expense_id, "item", 2.5, 2.5 * rng.randint(1, 4)))
+            conn.execute("INSERT INTO expense_receipts (expense_id, url) VALUES (?, ?)",
+                         (expense_id, f"https://receipts.example/{expense_id}"))
+    conn.close()
+
+
+def measure(repeats: int) -> list:
+    timings = []
+    for sql in WORKLOAD:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = execute_query_fetch(sql)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert '"error"' not in result[:10], result
+        timings.append(statistics.median(samples))
+    return timings
+
+
+def main():
+    expense_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    grow(expense_count)
+    query_cache.max_entries = 0  # measure the database, not the result cache
+
+    # The tools print every statement; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = measure(repeats)
+        proposals = advise(query_plan_recorder.records())
+        applied = apply_proposals(proposals)
+        after = measure(repeats)
+
+    for result in applied:
+        print(f"{'applied' if result['applied'] else 'unused '}  {result['create']}")
+    print(f"\n{'query':<60}{'before ms':>11}{'after ms':>10}")
+    for sql, old, new in zip(WORKLOAD, before, after):
+        print(f"{sql[:58]:<60}{old:>11.2f}{new:>10.2f}")
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
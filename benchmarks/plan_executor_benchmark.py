@@ -0,0 +1,68 @@
+"""
+Wall-clock of SmartPlannerAgent plans run one step at a time vs through
+execute_plan's DAG scheduler.
+
+Sub-agents are simulated with fixed latencies typical of a model round trip
+(no model is called), so the numbers isolate the scheduling.
+
+    python benchmarks/plan_executor_benchmark.py [latency_scale]
+"""
+import asyncio
+import json
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from chat_component.tools.plan_executor import parse_plan, run_plan  # noqa: E402
+
+# Seconds per call at scale 1.0
+LATENCY = {"InformationAgent": 1.2, "AnalysisAgent": 2.0, "NeedCheckAgent": 1.5, "Google_Search_Agent": 1.8}
+
+PLANS = {
+    "budget (fan-in)": [
+        {"id": "spend", "agent": "InformationAgent", "request": "Monthly spend by category"},
+        {"id": "subs", "agent": "InformationAgent", "request": "Active subscriptions"},
+        {"id": "tips", "agent": "Google_Search_Agent", "request": "Saving tips"},
+        {"id": "plan", "agent": "AnalysisAgent", "request": "Budget from {{spend}}, {{subs}} and {{tips}}"},
+    ],
+    "shopping (two chains)": [
+        {"id": "items", "agent": "InformationAgent", "request": "Frequently bought items"},
+        {"id": "needs", "agent": "NeedCheckAgent", "request": "Which of {{items}} are due"},
+        {"id": "prices", "agent": "Google_Search_Agent", "request": "Current grocery prices"},
+        {"id": "list", "agent": "AnalysisAgent", "request": "Shopping list", "depends_on": ["needs", "prices"]},
+    ],
+    "single chain": [
+        {"id": "a", "agent": "InformationAgent", "request": "Spending 2024"},
+        {"id": "b", "agent": "AnalysisAgent", "request": "Trends in {{a}}"},
+    ],
+}
+
+
+def main():
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+
+    async def run_step(agent_name: str, request: str):
+        await asyncio.sleep(LATENCY[agent_name] * scale)
+        return f"{agent_name} answer"
+
+    print(f"simulated sub-agent latency x{scale}")
+    for name, steps in PLANS.items():
+        ordered = parse_plan(json.dumps(steps), LATENCY.keys())
+        _, sequential = asyncio.run(run_plan(ordered, run_step, max_parallel=1))
+        _, parallel = asyncio.run(run_plan(ordered, run_step))
+        print(f"  {name:24s} one at a time {sequential['wall_ms']:8.1f} ms   "
+              f"execute_plan {parallel['wall_ms']:8.1f} ms   saved {parallel['saved_ms']:8.1f} ms")
+
+    async def flaky(agent_name: str, request: str):
+        if agent_name == "Google_Search_Agent":
+            raise RuntimeError("search unavailable")
+        return await run_step(agent_name, request)
+
+    results, _ = asyncio.run(run_plan(parse_plan(json.dumps(PLANS["budget (fan-in)"]), LATENCY.keys()), flaky))
+    print("  failure handling:", {step_id: result["status"] for step_id, result in results.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Semantic response cache: hit ratio on paraphrased questions, answers that
+must not be shared, and lookup cost as the cache fills up.
+
+    python benchmarks/response_cache_benchmark.py [entries]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from chat_component.tools.response_cache import ResponseCache  # noqa: E402
+
+SEEDS = [
+    "How much did I spend on groceries last month?",
+    "What are my top spending categories this year?",
+    "Which subscriptions am I paying for?",
+    "What was my most expensive purchase in July?",
+    "Do I need to buy milk again?",
+]
+# Paraphrases that should be served from the seeds
+PARAPHRASES = [
+    "how much did i spend on groceries last month",
+    "How much have I spent on groceries last month?",
+    "Tell me how much I spent on groceries last month please",
+    "Roughly how much did I spend on groceries last month?",
+    "Top spending categories for me this year?",
+    "what are my top spending categories this year",
+    "Show me my top spending categories this year",
+    "Which subscriptions am I paying for right now?",
+    "what subscriptions am i paying for",
+    "What was my most expensive purchase in July",
+    "do i need to buy milk again",
+]
+# Close wording, different answer: must miss
+DIFFERENT = [
+    "How much did I spend on groceries this month?",
+    "How much did I spend on groceries last year?",
+    "What are my bottom spending categories this year?",
+    "What was my most expensive purchase in June?",
+    "How much did I spend on restaurants last month?",
+]
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cache = ResponseCache(max_entries=entries + len(SEEDS))
+    for question in SEEDS:
+        cache.store(1, question, f"answer to {question}", cache.version(1))
+
+    served = sum(cache.lookup(1, question) is not None for question in PARAPHRASES)
+    wrong = [question for question in DIFFERENT if cache.lookup(1, question) is not None]
+    print(f"paraphrases served: {served}/{len(PARAPHRASES)}")
+    print(f"different questions served (should be 0): {len(wrong)} {wrong}")
+    print(f"stats: {cache.stats()}")
+
+    # Same time words as the seeds, so every entry is a similarity candidate
+    for i in range(entries):
+        merchant = "".join(chr(97 + (i // 26 ** k) % 26) for k in range(3))
+        cache.store(1, f"how much did I spend at merchant {merchant} last month", "x", cache.version(1))
+    repeats = 200
+    start = time.perf_counter()
+    for _ in range(repeats):
+        cache.lookup(1, SEEDS[0])
+    exact_us = (time.perf_counter() - start) / repeats * 1e6
+    start = time.perf_counter()
+    for _ in range(repeats):
+        cache.lookup(1, "what did I spend at the grocery store last month")
+    semantic_us = (time.perf_counter() - start) / repeats * 1e6
+    print(f"{len(SEEDS) + entries} entries: exact hit {exact_us:.1f} us, similarity scan {semantic_us:.1f} us")
+
+    cache.invalidate_users([1])
+    print(f"after invalidating user 1: {cache.lookup(1, SEEDS[0])!r}, entries={cache.stats()['entries']}")
+
+
+if __name__ == "__main__":
+    main()
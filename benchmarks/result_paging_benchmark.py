@@ -0,0 +1,63 @@
+"""
+Cost of returning a large result to the agent: fetchall + json.dumps of the
+whole result vs one bounded columnar page streamed from the cursor.
+
+Uses an in-memory table shaped like expense_items.
+
+    python benchmarks/result_paging_benchmark.py [row_count]
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from chat_component.tools.result_pages import read_page, query_digest  # noqa: E402
+
+QUERY = "SELECT * FROM expense_items"
+
+
+def build(row_count: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE expense_items (
+            item_id INTEGER PRIMARY KEY, expense_id INTEGER, name TEXT,
+            quantity REAL, unit_price REAL, total_price REAL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO expense_items (expense_id, name, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?)",
+        ((i // 5, f"item number {i}", 1 + i % 3, 2.5, 2.5 * (1 + i % 3)) for i in range(row_count))
+    )
+    return conn
+
+
+def fetch_all(conn) -> str:
+    return json.dumps({"results": conn.execute(QUERY).fetchall()})
+
+
+def one_page(conn) -> str:
+    return read_page(conn.execute(QUERY), query_digest(QUERY))
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    conn = build(row_count)
+
+    print(f"{'mode':<12}{'rows':>9}{'ms':>10}{'peak MiB':>10}{'payload KiB':>13}")
+    for mode, run in (("fetchall", fetch_all), ("paged", one_page)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        payload = run(conn)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{mode:<12}{row_count:>9}{elapsed * 1000:>10.1f}{peak / 2**20:>10.1f}{len(payload) / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
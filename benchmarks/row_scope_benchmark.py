@@ -0,0 +1,49 @@
+"""
+Cost of scoping InformationAgent queries: parsing and rewriting every query
+vs reusing rewrites cached by fingerprint.
+
+    python benchmarks/row_scope_benchmark.py [iterations]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from chat_component.tools import row_scope  # noqa: E402
+
+# Typical question shapes; the date literal changes between runs
+QUERIES = [
+    "SELECT SUM(amount) FROM expenses WHERE expense_date >= '{date}'",
+    "SELECT strftime('%Y-%m', expense_date) AS month, SUM(amount) FROM expenses "
+    "WHERE expense_date >= '{date}' GROUP BY month ORDER BY month",
+    "SELECT e.type, SUM(es.share_amount) AS spent FROM expenses e "
+    "JOIN expense_shares es ON e.expense_id = es.expense_id "
+    "WHERE e.expense_date >= '{date}' GROUP BY e.type ORDER BY spent DESC LIMIT 5",
+    "SELECT g.name, COUNT(*) FROM groups g LEFT JOIN expenses e ON e.group_id = g.group_id "
+    "AND e.expense_date >= '{date}' GROUP BY g.name",
+]
+
+
+def run(iterations: int, cached: bool) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        sql = QUERIES[i % len(QUERIES)].format(date=f"2025-{i % 12 + 1:02d}-01")
+        if not cached:
+            row_scope._compile.cache_clear()
+        row_scope.scope_query(sql)
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'mode':<12}{'queries':>9}{'seconds':>10}{'us/query':>10}")
+    for mode, cached in (("parse each", False), ("cached", True)):
+        elapsed = run(iterations, cached)
+        print(f"{mode:<12}{iterations:>9}{elapsed:>10.3f}{elapsed / iterations * 1e6:>10.1f}")
+    print(f"plan cache: {row_scope.plan_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-request setup cost of /process-query before the model is called.
+
+    per-request   get_session for the fresh UUID + create_session + new Runner
+    shared        create_session on the Runner built once at startup
+
+Both are timed against the LRU session backend and DatabaseSessionService on
+a temporary file. No model is called.
+
+    python benchmarks/runner_reuse_benchmark.py [requests]
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from google.adk.runners import Runner  # noqa: E402
+from google.adk.sessions import DatabaseSessionService  # noqa: E402
+
+from chat_component import root_agent  # noqa: E402
+from chat_component.tools.session_store import LruSessionService  # noqa: E402
+
+APP_NAME = "CustomerInquiryProcessor"
+
+
+async def per_request(session_service, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        session_id = str(uuid.uuid4())
+        session = await session_service.get_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        if session is None:
+            await session_service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        Runner(app_name=APP_NAME, agent=root_agent, session_service=session_service)
+    return time.perf_counter() - start
+
+
+async def shared(session_service, requests: int) -> float:
+    runner = Runner(app_name=APP_NAME, agent=root_agent, session_service=session_service)
+    start = time.perf_counter()
+    for _ in range(requests):
+        session_id = str(uuid.uuid4())
+        await runner.session_service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+    return time.perf_counter() - start
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workdir = tempfile.mkdtemp(prefix="runner-bench-")
+    try:
+        print(f"{requests} requests per case")
+        for backend in ("memory", "database"):
+            for name, case in (("per-request", per_request), ("shared", shared)):
+                if backend == "memory":
+                    service = LruSessionService(requests * 2)
+                else:
+                    service = DatabaseSessionService(
+                        db_url=f"sqlite:///{os.path.join(workdir, f'{name}.db')}"
+                    )
+                elapsed = asyncio.run(case(service, requests))
+                print(f"  {backend:8s} {name:12s} {elapsed / requests * 1e6:10.1f} us/request")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
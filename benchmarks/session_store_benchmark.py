@@ -0,0 +1,100 @@
+"""
+Per-turn session overhead of each session backend.
+
+A turn is what /process-query does to the session store: create the session,
+read it back, and append the user message, a tool call, the tool response and
+the final answer. Compares DatabaseSessionService on a copy of the finance
+database (the old setup) and on its own file against the LRU backend with and
+without write-behind. No model is called.
+
+    python benchmarks/session_store_benchmark.py [turns]
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from google.adk.events import Event  # noqa: E402
+from google.adk.sessions import DatabaseSessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from chat_component.tools.session_store import LruSessionService, SessionFile  # noqa: E402
+
+APP_NAME = "CustomerInquiryProcessor"
+
+
+def turn_events(invocation_id: str) -> list:
+    return [
+        Event(invocation_id=invocation_id, author="user",
+              content=types.Content(role="user", parts=[types.Part(text="How much did I spend on groceries?")])),
+        Event(invocation_id=invocation_id, author="InformationAgent",
+              content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+                  name="query_database", args={"sql_query": "SELECT SUM(amount) FROM expenses"}))])),
+        Event(invocation_id=invocation_id, author="InformationAgent",
+              content=types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                  name="query_database", response={"columns": ["total"], "rows": [[123.45]]}))])),
+        Event(invocation_id=invocation_id, author="InformationAgent",
+              content=types.Content(role="model", parts=[types.Part(text='{"answer": "You spent $123.45"}')]),
+              actions={"state_delta": {"last_answer": "123.45"}}),
+    ]
+
+
+async def run_turns(service, turns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(turns):
+        session_id = str(uuid.uuid4())
+        await service.get_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        session = await service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        for event in turn_events(session_id):
+            await service.append_event(session, event)
+        await service.get_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+    return time.perf_counter() - start
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    workdir = tempfile.mkdtemp(prefix="session-bench-")
+    finance_copy = os.path.join(workdir, "mock_finance.db")
+    shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), finance_copy)
+    # The committed database carries session tables from an older ADK schema
+    conn = sqlite3.connect(finance_copy)
+    for table in ("events", "sessions", "app_states", "user_states"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.close()
+
+    backends = [
+        ("database (finance db)", lambda: DatabaseSessionService(db_url=f"sqlite:///{finance_copy}")),
+        ("database (own file)", lambda: DatabaseSessionService(
+            db_url=f"sqlite:///{os.path.join(workdir, 'sessions-db.db')}")),
+        ("memory lru", lambda: LruSessionService(1000)),
+        ("memory lru + write-behind", lambda: LruSessionService(
+            1000, SessionFile(os.path.join(workdir, 'sessions-wb.db')))),
+        ("memory lru(50) + write-behind", lambda: LruSessionService(
+            50, SessionFile(os.path.join(workdir, 'sessions-wb50.db')))),
+    ]
+
+    try:
+        print(f"{turns} turns per backend (get + create + 4 events + get)")
+        for name, factory in backends:
+            service = factory()
+            elapsed = asyncio.run(run_turns(service, turns))
+            extra = ""
+            if isinstance(service, LruSessionService):
+                service.close()
+                extra = f"  evictions={service.evictions} rows_written={service.rows_written}"
+            else:
+                service.db_engine.dispose()
+            print(f"  {name:32s} {elapsed / turns * 1000:8.3f} ms/turn{extra}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark for the group settlement engine over synthetic large groups.
+
+Builds random groups of increasing size from random expenses, computes the
+settlement plan and checks that every member ends at zero with at most
+n - 1 transfers.
+
+    python benchmarks/settlement_benchmark.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chat_component.tools.settlement import simplify_debts  # noqa: E402
+
+GROUP_SIZES = [10, 1_000, 10_000, 100_000]
+EXPENSES_PER_MEMBER = 5
+
+
+def synthetic_balances(members: int, seed: int = 7) -> dict:
+    """Net balances in cents produced by random expenses split equally among random subsets"""
+    rng = random.Random(seed)
+    balances = dict.fromkeys(range(members), 0)
+    for _ in range(members * EXPENSES_PER_MEMBER):
+        payer = rng.randrange(members)
+        participants = rng.sample(range(members), k=min(members, rng.randint(2, 8)))
+        amount = rng.randint(100, 50_000)
+        share, remainder = divmod(amount, len(participants))
+        balances[payer] += amount
+        for i, user_id in enumerate(participants):
+            balances[user_id] -= share + (1 if i < remainder else 0)
+    return balances
+
+
+def check(balances: dict, transfers: list):
+    remaining = dict(balances)
+    for debtor, creditor, amount in transfers:
+        remaining[debtor] += amount
+        remaining[creditor] -= amount
+    assert all(cents == 0 for cents in remaining.values()), "group not settled"
+    assert len(transfers) <= max(0, len(balances) - 1), "too many transfers"
+
+
+def main():
+    print(f"{'members':>9}{'expenses':>10}{'transfers':>11}{'seconds':>10}")
+    for members in GROUP_SIZES:
+        balances = synthetic_balances(members)
+        start = time.perf_counter()
+        transfers, unsettled = simplify_debts(balances)
+        elapsed = time.perf_counter() - start
+        assert unsettled == 0
+        check(balances, transfers)
+        print(f"{members:>9}{members * EXPENSES_PER_MEMBER:>10}{len(transfers):>11}{elapsed:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Time to first byte of /process-query vs /process-query/stream.
+
+The app's Runner is swapped for a scripted one that replays a typical turn
+with a fixed delay between events: the planner calls InformationAgent, gets
+its result, then streams the JSON answer in chunks. No model is called.
+
+    python benchmarks/sse_ttfb_benchmark.py [event_delay_ms]
+"""
+import asyncio
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix="sse-bench-")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.path.join(workdir, "finance.db"))
+os.environ["FINANCE_DB_PATH"] = os.path.join(workdir, "finance.db")
+os.environ["SESSION_WRITE_BEHIND"] = "0"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from google.adk.events import Event  # noqa: E402
+from google.genai import types  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+ANSWER = '{"original_inquiry": "groceries last month", "category": "spending", ' \
+         '"suggested_response": "You spent $412.30 on groceries last month, 8% less than the month before."}'
+
+
+class ScriptedRunner:
+    def __init__(self, runner, delay: float):
+        self.session_service = runner.session_service
+        self.delay = delay
+
+    async def run_async(self, user_id, session_id, new_message, run_config=None):
+        streaming = run_config is not None and run_config.streaming_mode.value == "sse"
+        await asyncio.sleep(self.delay)
+        yield Event(author="ChatAgent", content=types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name="InformationAgent", args={"request": "groceries"}))]))
+        await asyncio.sleep(self.delay)
+        yield Event(author="ChatAgent", content=types.Content(role="user", parts=[
+            types.Part(function_response=types.FunctionResponse(name="InformationAgent", response={"rows": 3}))]))
+        chunks = [ANSWER[i:i + 40] for i in range(0, len(ANSWER), 40)]
+        for chunk in chunks:
+            await asyncio.sleep(self.delay)
+            if streaming:
+                yield Event(author="ChatAgent", partial=True,
+                            content=types.Content(role="model", parts=[types.Part(text=chunk)]))
+        yield Event(author="ChatAgent", content=types.Content(role="model", parts=[types.Part(text=ANSWER)]))
+
+
+def timed(base_url: str, path: str) -> tuple:
+    start = time.perf_counter()
+    first = None
+    with httpx.stream("POST", base_url + path, json={"customer_inquiry": "How much on groceries last month?"},
+                      timeout=60) as response:
+        for _ in response.iter_raw():
+            if first is None:
+                first = time.perf_counter() - start
+        body_ok = response.status_code == 200
+    return first, time.perf_counter() - start, body_ok
+
+
+def main():
+    delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.2
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.05)
+        runner = app_module.app.state.runner
+        app_module.app.state.runner = ScriptedRunner(runner, delay)
+        print(f"scripted turn, {delay * 1000:.0f} ms between events")
+        for path in ("/process-query", "/process-query/stream"):
+            ttfb, total, ok = timed(f"http://127.0.0.1:{port}", path)
+            print(f"  {path:24s} ttfb {ttfb * 1000:8.1f} ms   total {total * 1000:8.1f} ms   ok={ok}")
+        app_module.app.state.runner = runner
+    finally:
+        server.should_exit = True
+        thread.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Model calls and wall-clock of a runaway turn with and without the per-turn
+budget, the per-turn error limit on SQL the model keeps getting wrong, and
+the circuit breaker on a database that stays locked.
+
+Every agent's model is replaced by a scripted stand-in (no Gemini calls) that
+keeps delegating: ChatAgent -> SmartPlannerAgent -> AnalysisAgent ->
+InformationAgent, each calling its tool several times before answering.
+Runs against a temporary copy of the finance database.
+
+    python benchmarks/turn_budget_benchmark.py [calls_per_agent] [model_latency_ms]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import AsyncGenerator
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix="turn-budget-bench-")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.path.join(workdir, "finance.db"))
+os.environ["FINANCE_DB_PATH"] = os.path.join(workdir, "finance.db")
+os.environ["RESPONSE_CACHE_ENABLED"] = "0"
+
+from google.adk.models.base_llm import BaseLlm  # noqa: E402
+from google.adk.models.llm_request import LlmRequest  # noqa: E402
+from google.adk.models.llm_response import LlmResponse  # noqa: E402
+from google.adk.runners import Runner  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from chat_component.agent import root_agent  # noqa: E402
+from chat_component.tools import sql_execution, turn_budget  # noqa: E402
+
+# Who each scripted agent delegates to, and with what arguments
+DELEGATES = {
+    "ChatAgent": ("SmartPlannerAgent", {"request": "Plan my budget"}),
+    "SmartPlannerAgent": ("AnalysisAgent", {"request": "Analyze my spending"}),
+    "AnalysisAgent": ("InformationAgent", {"request": "Spending by category"}),
+    "InformationAgent": ("execute_query_fetch", {"sql_query": "SELECT amount FROM expenses LIMIT 3"}),
+}
+FAILING_SQL = {"sql_query": "SELECT missing_column FROM expenses"}
+
+
+class ScriptedLlm(BaseLlm):
+    """Calls the agent's delegate calls_per_agent times, then answers"""
+
+    calls_per_agent: int = 3
+    latency: float = 0.01
+    failing_sql: bool = False
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        agent = llm_request.config.labels.get("adk_agent_name")
+        answered = sum(1 for content in llm_request.contents for part in content.parts or []
+                       if part.function_response)
+        if agent in DELEGATES and answered < self.calls_per_agent:
+            name, args = DELEGATES[agent]
+            if name == "execute_query_fetch" and self.failing_sql:
+                args = FAILING_SQL
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+        else:
+            part = types.Part(text=f"{agent} answer after {answered} tool results")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def _agents(agent, seen=None):
+    seen = seen if seen is not None else {}
+    if agent.name not in seen:
+        seen[agent.name] = agent
+        for tool in agent.tools:
+            if hasattr(tool, "agent"):
+                _agents(tool.agent, seen)
+    return seen.values()
+
+
+async def run_turn(runner: Runner, question: str) -> str:
+    session = await runner.session_service.create_session(app_name="bench", user_id="1")
+    answer = ""
+    message = types.Content(role="user", parts=[types.Part(text=question)])
+    # The SQL tool logs every query; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        async for event in runner.run_async(user_id="1", session_id=session.id, new_message=message):
+            if event.is_final_response() and event.author == root_agent.name and event.content:
+                answer = "".join(part.text or "" for part in event.content.parts)
+    return answer
+
+
+def _locked(key, tables, load):
+    raise sqlite3.OperationalError("database is locked")
+
+
+def main():
+    calls_per_agent = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+    llm = ScriptedLlm(model="scripted", calls_per_agent=calls_per_agent, latency=latency)
+    for agent in _agents(root_agent):
+        agent.model = llm
+    runner = Runner(app_name="bench", agent=root_agent, session_service=InMemorySessionService(),
+                    plugins=[turn_budget.TurnBudgetPlugin()])
+    question = "Help me optimize my monthly budget"
+    try:
+        print(f"scripted agents delegate {calls_per_agent}x each, {latency * 1000:.0f} ms per model call")
+        for enabled in (False, True):
+            turn_budget.TURN_BUDGET_ENABLED = enabled
+            llm.calls = 0
+            start = time.perf_counter()
+            answer = asyncio.run(run_turn(runner, question))
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  budget {'on ' if enabled else 'off'}: {llm.calls:4d} model calls {elapsed:8.1f} ms   "
+                  f"answer: {answer.splitlines()[0][:70]}")
+
+        llm.failing_sql = True
+        llm.calls = 0
+        answer = asyncio.run(run_turn(runner, question))
+        print(f"  model keeps sending bad SQL: {llm.calls} model calls, "
+              f"answer: {answer.splitlines()[0][:70]}")
+        print("    breaker:", turn_budget.circuit_breaker.stats()["open"] or "closed")
+
+        llm.failing_sql = False
+        get_or_load = sql_execution.query_cache.get_or_load
+        sql_execution.query_cache.get_or_load = _locked
+        try:
+            llm.calls = 0
+            answer = asyncio.run(run_turn(runner, question))
+            print(f"  database locked: {llm.calls} model calls, answer:")
+            print("    " + answer.replace("\n", "\n    "))
+            llm.calls = 0
+            answer = asyncio.run(run_turn(runner, question))
+            print(f"  next turn while the circuit is open: {llm.calls} model calls, "
+                  f"answer: {answer.splitlines()[0][:70]}")
+        finally:
+            sql_execution.query_cache.get_or_load = get_or_load
+        stats = turn_budget.turn_budget_stats.stats()
+        print("  exhausted_by:", stats["exhausted_by"], " breaker:", stats["circuit_breaker"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .agent import root_agent
+from .agent import root_agent, app
 from .tools import sql_execution,google_wallet
-__all__ = ['root_agent','sql_execution','google_wallet']
\ No newline at end of file
+__all__ = ['root_agent','app','sql_execution','google_wallet']
\ No newline at end of file
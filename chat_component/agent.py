@@ -1,6 +1,7 @@
 # Conceptual Code: Hierarchical Research Task
 import base64
 from google.adk.agents import LlmAgent
+from google.adk.apps import App
 from google.adk.tools import agent_tool
 from google.adk.planners import BuiltInPlanner
 from google.adk.planners import PlanReActPlanner
@@ -9,13 +10,14 @@ from google.genai import types
 from chat_component.tools.sql_execution import execute_query_fetch
 from chat_component.tools.google_wallet import create_google_wallet_pass
 from chat_component.group_split import group_agent
+from chat_component.tools.fast_path import before_root_agent, after_root_agent
+from chat_component.tools.response_cache import lookup_response, store_response
+from chat_component.tools.plan_executor import make_execute_plan_tool
+from chat_component.tools.turn_budget import (
+    start_turn_budget, finish_turn_budget, guard_agent_tree, TurnBudgetPlugin
+)
+from chat_component.tools.prompt_builder import get_prompt
 from google.adk.tools import google_search
-import os
-import yaml
-
-file_path = os.path.join(os.path.dirname(__file__), 'prompts.yaml')
-with open(file_path, encoding="utf-8") as f:
-    prompts = yaml.safe_load(f)
 
 
 
@@ -23,7 +25,7 @@ InformationAgent = LlmAgent(
     name="InformationAgent",
     model="gemini-2.5-flash",
     description="For every information asked, create an sql query and use the execute_query_fetch function to always provide the output.",
-    instruction=prompts['prompts']['Text_to_Sql'],
+    instruction=get_prompt("Text_to_Sql"),
     # planner=BuiltInPlanner(
     #     thinking_config=types.ThinkingConfig(
     #         include_thoughts=True,
@@ -37,7 +39,7 @@ AnalysisAgent = LlmAgent(
     name="AnalysisAgent",
     model="gemini-2.5-flash",
     description="Your Role is to act on analysis of the provided info and act as a financial analyzer and advisor. Do a thorough analysis, ask the Information agent on any required information that is further needed for fulfilling the request",
-    instruction=prompts['prompts']['Analysis_prompt'],
+    instruction=get_prompt("Analysis_prompt"),
     tools=[agent_tool.AgentTool(agent=InformationAgent)]
 )
 
@@ -45,7 +47,7 @@ NeedCheckAgent = LlmAgent(
     name="NeedCheckAgent",
     model="gemini-2.5-flash",
     description="Analyzes user purchase frequencies and suggests whether the user likely needs to buy an item again.",
-    instruction=prompts['prompts']['Need_Check'],
+    instruction=get_prompt("Need_Check"),
     tools=[agent_tool.AgentTool(agent=InformationAgent) ]
 )
 
@@ -53,14 +55,14 @@ Receipt_Processor = LlmAgent(
     name="Receipt_Processor_Agent",
     model="gemini-2.5-flash",
     description="Analyze the receipt and call the create_google_wallet_pass. Takes image input as well.",
-    instruction=prompts['prompts']['Receipt_Processor'],
+    instruction=get_prompt("Receipt_Processor"),
     tools=[create_google_wallet_pass]
 )
 Google_Search = LlmAgent(
     name="Google_Search_Agent",
     model="gemini-2.5-flash",
     description="Searches google to retreive any external data",
-    instruction="You are an Intelligent Agent with access to google search to find any inoformation required.",
+    instruction=get_prompt("Google_Search"),
     tools=[google_search]
 )
 
@@ -68,13 +70,15 @@ SmartPlannerAgent = LlmAgent(
     name="SmartPlannerAgent",
     model="gemini-2.5-flash",
     description="An intelligent task orchestrator that can handle ANY type of user request by breaking it down into logical steps and coordinating with specialized agents to deliver comprehensive solutions.",
-    instruction=prompts['prompts']['Smart_Planner_Agent'],
+    instruction=get_prompt("Smart_Planner_Agent"),
     tools=[
         agent_tool.AgentTool(agent=InformationAgent),
         agent_tool.AgentTool(agent=AnalysisAgent),
         agent_tool.AgentTool(agent=NeedCheckAgent),
         agent_tool.AgentTool(agent=Receipt_Processor),
-        agent_tool.AgentTool(agent=Google_Search)
+        agent_tool.AgentTool(agent=Google_Search),
+        # Runs independent plan steps concurrently, see plan_executor
+        make_execute_plan_tool([InformationAgent, AnalysisAgent, NeedCheckAgent, Google_Search])
     ],
     planner=BuiltInPlanner(
         thinking_config=types.ThinkingConfig(
@@ -90,7 +94,7 @@ chat_agent = LlmAgent(
     name="ChatAgent",
     model="gemini-2.5-flash",
     description="Goal is to user answer user query on finances. Use AnalysisAgent for any analysis required and use InformationAgent to gather user specific information on his spendings, items purchases, groups he is part of and any financial data. Use current_time to find the current date and time.",
-    instruction=prompts['prompts']['Chat_Agent'],
+    instruction=get_prompt("Chat_Agent"),
     tools=[agent_tool.AgentTool(agent=AnalysisAgent), 
            agent_tool.AgentTool(agent=InformationAgent),
            agent_tool.AgentTool(agent=NeedCheckAgent),
@@ -98,6 +102,11 @@ chat_agent = LlmAgent(
            agent_tool.AgentTool(agent=Google_Search),
            agent_tool.AgentTool(agent=SmartPlannerAgent),
            agent_tool.AgentTool(agent=group_agent)],
+    # Fully specified split/info/balance requests skip the model, see fast_path;
+    # repeated questions are answered from response_cache; everything else
+    # runs within a per-turn budget, see turn_budget
+    before_agent_callback=[before_root_agent, lookup_response, start_turn_budget],
+    after_agent_callback=[after_root_agent, store_response, finish_turn_budget],
     # planner=PlanReActPlanner(),
     planner=BuiltInPlanner(
         thinking_config=types.ThinkingConfig(
@@ -108,6 +117,13 @@ chat_agent = LlmAgent(
 )
 
 root_agent = chat_agent
+# Budget and circuit-breaker callbacks on every agent the root can reach
+guard_agent_tree(root_agent)
+
+# The ADK web server builds the /run and /run_sse runner from this App, so
+# tools that raise there reach the circuit breaker as they do through
+# /process-query, whose runner (app.py) gets the same plugin
+app = App(name="chat_component", root_agent=root_agent, plugins=[TurnBudgetPlugin()])
 
 
 # # root_agent.run_live
@@ -2,10 +2,23 @@
 Agent-compatible tool wrappers for Google ADK integration
 """
 from typing import Any
-from chat_component.tools.sql_execution import execute_query
+from chat_component.tools.sql_execution import execute_query_page, execute_statement
+from chat_component.tools.member_resolver import (
+    get_user_group, get_group_roster, resolve_member_names,
+    GroupLookupError, MemberNotFoundError
+)
+from chat_component.tools.roster_cache import roster_cache
+from chat_component.tools.query_cache import query_cache
+from chat_component.tools.response_cache import response_cache
+from chat_component.tools.ledger import ensure_ledger
+from chat_component.tools.expense_writer import write_expenses, WRITTEN_TABLES
+from chat_component.tools.settlement import simplify_debts
+from chat_component.tools.query_budget import QueryTooExpensiveError
 
 # Import utility functions directly to avoid complex type issues
 from chat_component.tools.utils import round_to_cents
+from chat_component.tools.money import to_cents, from_cents
+from chat_component.tools import bill_splitter
 import json
 from datetime import datetime
 from datetime import datetime
@@ -22,37 +35,18 @@ def get_group_info(group_name: str, user_id: int) -> str:
     """
     try:
         # Find group by name that the user belongs to (case-insensitive)
-        query = f"""
-            SELECT g.group_id, g.name, g.description, g.created_at
-            FROM groups g
-            JOIN user_groups ug ON g.group_id = ug.group_id
-            WHERE LOWER(g.name) = LOWER('{group_name}') AND ug.user_id = {user_id}
-        """
-        result = execute_query(query)
-
-        if not result:
-            return json.dumps({"error": f"Group '{group_name}' not found or user {user_id} is not a member"})
-
-        group_data = result[0]
-        group_id = group_data[0]
-
-        # Get group members
-        members_query = f"""
-            SELECT u.user_id, u.name, u.email
-            FROM users u
-            JOIN user_groups ug ON u.user_id = ug.user_id
-            WHERE ug.group_id = {group_id}
-        """
-        members_result = execute_query(members_query)
-        members = [{'user_id': row[0], 'name': row[1], 'email': row[2]} for row in members_result]
+        try:
+            group = get_user_group(user_id, group_name)
+        except GroupLookupError as e:
+            return json.dumps({"error": str(e)})
 
         # Get group details and members
         group_details = {
-            "group_id": group_id,
-            "name": group_data[1],
-            "description": group_data[2],
-            "created_at": group_data[3],
-            "members": members
+            "group_id": group['group_id'],
+            "name": group['name'],
+            "description": group['description'],
+            "created_at": group['created_at'],
+            "members": get_group_roster(group['group_id'])
         }
 
         return json.dumps(group_details)
@@ -66,31 +60,17 @@ def validate_user_and_group(user_id: int, group_name: str):
     Returns group_id if valid, error message otherwise
     """
     try:
-        # Check if user exists
-        user_query = f"SELECT user_id, name FROM users WHERE user_id = {user_id}"
-        user_result = execute_query(user_query)
-
-        if not user_result:
-            return {"error": f"User with ID {user_id} not found"}
-
-        # Check if group exists and user is a member (case-insensitive)
-        group_query = f"""
-            SELECT g.group_id, g.name
-            FROM groups g
-            JOIN user_groups ug ON g.group_id = ug.group_id
-            WHERE LOWER(g.name) = LOWER('{group_name}') AND ug.user_id = {user_id}
-        """
-        group_result = execute_query(group_query)
-
-        if not group_result:
-            return {"error": f"Group '{group_name}' not found or user {user_id} is not a member"}
+        # Check that the user exists and is a member of the group (case-insensitive)
+        group = get_user_group(user_id, group_name)
 
         return {
             "valid": True,
-            "group_id": group_result[0][0],
-            "user_name": user_result[0][1],
-            "group_name": group_result[0][1]
+            "group_id": group['group_id'],
+            "user_name": group['user_name'],
+            "group_name": group['name']
         }
+    except GroupLookupError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": str(e)}
 
@@ -116,34 +96,10 @@ def split_bill_equal(user_id: int, group_name: str, total_amount: float, descrip
         group_id = validation["group_id"]
         
         # Get group members
-        members_query = f"""
-            SELECT u.user_id, u.name, u.email
-            FROM users u
-            JOIN user_groups ug ON u.user_id = ug.user_id
-            WHERE ug.group_id = {group_id}
-        """
-        members_result = execute_query(members_query)
-        members = [{'user_id': row[0], 'name': row[1], 'email': row[2]} for row in members_result]
+        members = get_group_roster(group_id)
         
-        # Perform equal split calculation
-        num_members = len(members)
-        equal_share = round_to_cents(total_amount / num_members)
-
-        # Handle rounding differences
-        remaining_amount = total_amount - (equal_share * num_members)
-
-        splits = {}
-        for i, member in enumerate(members):
-            share = equal_share
-            # Add remaining cents to first member
-            if i == 0 and remaining_amount != 0:
-                share += round_to_cents(remaining_amount)
-
-            splits[member['user_id']] = {
-                'user_name': member['name'],
-                'share_amount': share,
-                'percentage': round((share / total_amount) * 100, 2)
-            }
+        # Perform equal split calculation in integer cents
+        splits = bill_splitter.split_equal(total_amount, members)
         
         # Persist to database
         group_id = validation["group_id"]
@@ -223,57 +179,27 @@ def split_bill_percentage(user_id: int, group_name: str, total_amount: float,
             except Exception as e:
                 return json.dumps({"error": f"Invalid percentage_data format. Expected JSON string or 'Name percentage%' format. Error: {str(e)}"})
 
-        # Convert user names to user IDs with flexible matching
+        # Convert user names to user IDs with flexible matching against the group roster
+        members = get_group_roster(group_id)
+        member_names = {member['user_id']: member['name'] for member in members}
+        try:
+            name_to_id = resolve_member_names(percentage_map.keys(), members)
+        except MemberNotFoundError as e:
+            return json.dumps({"error": str(e)})
         user_id_percentage_map = {}
         for user_name, percentage in percentage_map.items():
-            # First try exact match
-            user_query = f"SELECT user_id FROM users WHERE name = '{user_name}'"
-            user_result = execute_query(user_query)
-
-            # If no exact match, try partial match (case-insensitive)
-            if not user_result:
-                user_query = f"SELECT user_id FROM users WHERE LOWER(name) LIKE LOWER('%{user_name}%')"
-                user_result = execute_query(user_query)
-
-            if user_result:
-                user_id_percentage_map[user_result[0][0]] = percentage
-            else:
-                return json.dumps({"error": f"User '{user_name}' not found in the group"})
+            user_id_percentage_map[name_to_id[user_name]] = percentage
         
-        # Validate percentages sum to 100
-        total_percentage = sum(user_id_percentage_map.values())
-        if abs(total_percentage - 100.0) > 0.01:
-            return json.dumps({"error": f"Percentages must sum to 100%, got {total_percentage}%"})
-
-        # Perform percentage split calculation
-        splits = {}
-        total_assigned = 0
-
-        for user_id_split, percentage in user_id_percentage_map.items():
-            share_amount = round_to_cents((total_amount * percentage) / 100)
-            total_assigned += share_amount
-
-            # Get user name from database
-            user_query = f"SELECT name FROM users WHERE user_id = {user_id_split}"
-            user_result = execute_query(user_query)
-            user_name = user_result[0][0] if user_result else f"User {user_id_split}"
-
-            splits[user_id_split] = {
-                'user_name': user_name,
-                'share_amount': share_amount,
-                'percentage': percentage
-            }
-
-        # Handle rounding differences
-        difference = round_to_cents(total_amount - total_assigned)
-        if difference != 0:
-            # Add difference to the first user
-            first_user = list(user_id_percentage_map.keys())[0]
-            splits[first_user]['share_amount'] += difference
+        # Perform percentage split calculation (validates the percentages sum to 100)
+        try:
+            splits = bill_splitter.split_percentage(total_amount, user_id_percentage_map,
+                                                    user_names=member_names)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
         
         # Persist to database
         group_id = validation["group_id"]
-        persist_success = persist_expense_and_shares(
+        persist_expense_and_shares(
             group_id=group_id,
             payer_id=user_id,
             total_amount=total_amount,
@@ -326,44 +252,23 @@ def split_bill_custom_amounts(user_id: int, group_name: str, total_amount: float
         except json.JSONDecodeError:
             return json.dumps({"error": "Invalid amount_data format. Expected JSON string."})
 
-        # Convert user names to user IDs with flexible matching
+        # Convert user names to user IDs with flexible matching against the group roster
+        members = get_group_roster(group_id)
+        member_names = {member['user_id']: member['name'] for member in members}
+        try:
+            name_to_id = resolve_member_names(amount_map.keys(), members)
+        except MemberNotFoundError as e:
+            return json.dumps({"error": str(e)})
         user_id_amount_map = {}
         for user_name, amount in amount_map.items():
-            # First try exact match
-            user_query = f"SELECT user_id FROM users WHERE name = '{user_name}'"
-            user_result = execute_query(user_query)
-
-            # If no exact match, try partial match (case-insensitive)
-            if not user_result:
-                user_query = f"SELECT user_id FROM users WHERE LOWER(name) LIKE LOWER('%{user_name}%')"
-                user_result = execute_query(user_query)
-
-            if user_result:
-                user_id_amount_map[user_result[0][0]] = amount
-            else:
-                return json.dumps({"error": f"User '{user_name}' not found in the group"})
+            user_id_amount_map[name_to_id[user_name]] = amount
         
-        # Validate amounts sum to total
-        total_assigned = sum(user_id_amount_map.values())
-        if abs(total_assigned - total_amount) > 0.01:
-            return json.dumps({"error": f"Custom amounts ({total_assigned}) don't match total ({total_amount})"})
-
-        # Perform custom amount split calculation
-        splits = {}
-        for user_id_split, amount in user_id_amount_map.items():
-            share_amount = round_to_cents(amount)
-            percentage = round((share_amount / total_amount) * 100, 2)
-
-            # Get user name from database
-            user_query = f"SELECT name FROM users WHERE user_id = {user_id_split}"
-            user_result = execute_query(user_query)
-            user_name = user_result[0][0] if user_result else f"User {user_id_split}"
-
-            splits[user_id_split] = {
-                'user_name': user_name,
-                'share_amount': share_amount,
-                'percentage': percentage
-            }
+        # Perform custom amount split calculation (validates the amounts sum to the total)
+        try:
+            splits = bill_splitter.split_custom_amounts(None, group_id, total_amount, user_id_amount_map,
+                                                        user_names=member_names)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
         
         # Persist to database
         group_id = validation["group_id"]
@@ -402,15 +307,7 @@ def get_user_groups_info(user_id: int) -> str:
         JSON string with user's groups
     """
     try:
-        query = f"""
-            SELECT g.group_id, g.name, g.description,
-                    ug.role, g.created_at
-            FROM groups g
-            JOIN user_groups ug ON g.group_id = ug.group_id
-            WHERE ug.user_id = {user_id}
-            ORDER BY g.created_at DESC
-        """
-        results = execute_query(query)
+        results = execute_statement("groups_for_user", (user_id,))
 
         groups = []
         for row in results:
@@ -454,84 +351,35 @@ def split_bill_itemized(user_id: int, group_name: str, items_data: str,
         except json.JSONDecodeError:
             return json.dumps({"error": "Invalid items_data format. Expected JSON string."})
 
-        # Convert user names to user IDs in items
+        # Convert user names to user IDs in items, resolving every name
+        # against a single fetch of the group roster
+        members = get_group_roster(group_id)
+        member_names = {member['user_id']: member['name'] for member in members}
+        try:
+            name_to_id = resolve_member_names(
+                (user_name for item in items for user_name in item.get('assigned_users', [])),
+                members
+            )
+        except MemberNotFoundError as e:
+            return json.dumps({"error": str(e)})
+
         processed_items = []
         for item in items:
-            processed_item = {
+            processed_items.append({
                 'name': item['name'],
                 'price': item['price'],
-                'assigned_users': []
-            }
-
-            if 'assigned_users' in item:
-                for user_name in item['assigned_users']:
-                    # First try exact match
-                    user_query = f"SELECT user_id FROM users WHERE name = '{user_name}'"
-                    user_result = execute_query(user_query)
-
-                    # If no exact match, try partial match (case-insensitive)
-                    if not user_result:
-                        user_query = f"SELECT user_id FROM users WHERE LOWER(name) LIKE LOWER('%{user_name}%')"
-                        user_result = execute_query(user_query)
-
-                    if user_result:
-                        processed_item['assigned_users'].append(user_result[0][0])
-                    else:
-                        return json.dumps({"error": f"User '{user_name}' not found in the group"})
-
-            processed_items.append(processed_item)
-
-        # Perform itemized split calculation
-        user_totals = {}
-        total_amount_calc = 0
-
-        for item in processed_items:
-            item_price = item['price']
-            assigned_users = item.get('assigned_users', [])
-
-            if assigned_users:
-                # Split among assigned users
-                per_person = round_to_cents(item_price / len(assigned_users))
-                for user_id_item in assigned_users:
-                    user_totals[user_id_item] = user_totals.get(user_id_item, 0) + per_person
-            else:
-                # Will be split according to default_split method
-                total_amount_calc += item_price
-
-        # Handle items without specific assignment
-        if total_amount_calc > 0:
-            if default_split == 'equal':
-                members_result = execute_query(f"""
-                    SELECT u.user_id, u.name
-                    FROM users u
-                    JOIN user_groups ug ON u.user_id = ug.user_id
-                    WHERE ug.group_id = {group_id}
-                """)
-                members_list = [{'user_id': row[0], 'name': row[1]} for row in members_result]
-                per_person = round_to_cents(total_amount_calc / len(members_list))
-                for member in members_list:
-                    user_totals[member['user_id']] = user_totals.get(member['user_id'], 0) + per_person
-
-        # Convert to splits format
-        splits = {}
-        grand_total = sum(user_totals.values())
-
-        for user_id_item, amount in user_totals.items():
-            # Get user name from database
-            user_query = f"SELECT name FROM users WHERE user_id = {user_id_item}"
-            user_result = execute_query(user_query)
-            user_name = user_result[0][0] if user_result else f"User {user_id_item}"
-
-            percentage = round((amount / grand_total) * 100, 2) if grand_total > 0 else 0
-
-            splits[user_id_item] = {
-                'user_name': user_name,
-                'share_amount': round_to_cents(amount),
-                'percentage': percentage
-            }
+                'assigned_users': [name_to_id[user_name] for user_name in item.get('assigned_users', [])]
+            })
+
+        # Perform itemized split calculation in integer cents
+        try:
+            splits = bill_splitter.split_itemized(None, group_id, processed_items, default_split,
+                                                  user_names=member_names)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
 
         # Calculate total amount for persistence
-        total_amount = sum(item['price'] for item in items)
+        total_amount = from_cents(sum(to_cents(item['price']) for item in items))
 
         # Persist to database
         group_id = validation["group_id"]
@@ -562,6 +410,149 @@ def split_bill_itemized(user_id: int, group_name: str, items_data: str,
         return json.dumps({"error": str(e)})
 
 
+SPLIT_TYPES = ('equal', 'percentage', 'custom_amounts', 'itemized')
+
+
+def _split_bill(bill: dict, group_id: int, members: list, member_names: dict) -> tuple:
+    """
+    Compute the splits for one bill of a batch
+    Returns (split_type, total_amount, splits); raises ValueError or
+    MemberNotFoundError when the bill is invalid
+    """
+    split_type = bill.get('split_type', 'equal')
+    if split_type not in SPLIT_TYPES:
+        raise ValueError(f"Unsupported split_type '{split_type}'. Expected one of {', '.join(SPLIT_TYPES)}")
+
+    if split_type == 'itemized':
+        items = bill.get('items') or []
+        name_to_id = resolve_member_names(
+            (user_name for item in items for user_name in item.get('assigned_users', [])), members
+        )
+        processed_items = [{
+            'name': item.get('name'),
+            'price': item['price'],
+            'assigned_users': [name_to_id[user_name] for user_name in item.get('assigned_users', [])]
+        } for item in items]
+        splits = bill_splitter.split_itemized(None, group_id, processed_items, bill.get('default_split', 'equal'),
+                                              user_names=member_names)
+        return split_type, from_cents(sum(to_cents(item['price']) for item in items)), splits
+
+    total_amount = bill['total_amount']
+    if split_type == 'equal':
+        return split_type, total_amount, bill_splitter.split_equal(total_amount, members)
+
+    if split_type == 'percentage':
+        shares = bill.get('percentage_data') or {}
+        name_to_id = resolve_member_names(shares.keys(), members)
+        splits = bill_splitter.split_percentage(
+            total_amount, {name_to_id[name]: value for name, value in shares.items()}, user_names=member_names
+        )
+        return split_type, total_amount, splits
+
+    shares = bill.get('amount_data') or {}
+    name_to_id = resolve_member_names(shares.keys(), members)
+    splits = bill_splitter.split_custom_amounts(
+        None, group_id, total_amount, {name_to_id[name]: value for name, value in shares.items()},
+        user_names=member_names
+    )
+    return split_type, total_amount, splits
+
+
+def split_bills_batch(user_id: int, group_name: str, bills_data: str) -> str:
+    """
+    Split many bills for one group in a single call and save them together
+    Args:
+        user_id: ID of the user who paid the bills
+        group_name: Name of the group
+        bills_data: JSON list of bills. Each bill has split_type ('equal', 'percentage', 'custom_amounts' or 'itemized'), description and total_amount, plus percentage_data / amount_data (member name to value) or items (like split_bill_itemized), e.g. '[{"split_type": "equal", "total_amount": 42.5, "description": "Groceries"}, {"split_type": "percentage", "total_amount": 90, "description": "Cab", "percentage_data": {"Alice Johnson": 50, "Bob Smith": 50}}]'
+    Returns:
+        JSON string with each bill's split and the per-member totals
+    """
+    try:
+        # Validate user and group once for the whole batch
+        validation = validate_user_and_group(user_id, group_name)
+        if "error" in validation:
+            return json.dumps(validation)
+
+        group_id = validation["group_id"]
+
+        try:
+            bills = json.loads(bills_data)
+        except json.JSONDecodeError:
+            return json.dumps({"error": "Invalid bills_data format. Expected JSON list."})
+        if not isinstance(bills, list) or not bills:
+            return json.dumps({"error": "bills_data must be a non-empty JSON list of bills"})
+
+        members = get_group_roster(group_id)
+        member_names = {member['user_id']: member['name'] for member in members}
+
+        # Compute every allocation before writing anything, so one bad bill
+        # leaves the whole batch unsaved
+        expenses = []
+        for index, bill in enumerate(bills):
+            try:
+                split_type, total_amount, splits = _split_bill(bill, group_id, members, member_names)
+            except (ValueError, KeyError, TypeError) as e:
+                return json.dumps({"error": f"Bill {index + 1}: {str(e)}"})
+            expenses.append({
+                'total_amount': total_amount,
+                'description': bill.get('description', ''),
+                'splits': splits,
+                'split_type': split_type
+            })
+
+        persist_expenses_batch(group_id, user_id, expenses)
+
+        member_totals = {}
+        bill_results = []
+        for expense in expenses:
+            split_summary = {}
+            for user_id_split, split_data in expense['splits'].items():
+                split_summary[split_data['user_name']] = split_data['share_amount']
+                member_totals[user_id_split] = member_totals.get(user_id_split, 0) + to_cents(split_data['share_amount'])
+            bill_results.append({
+                "split_type": expense['split_type'],
+                "total_amount": expense['total_amount'],
+                "description": expense['description'],
+                "split_summary": split_summary
+            })
+
+        return json.dumps({
+            "group_name": group_name,
+            "bill_count": len(expenses),
+            "total_amount": from_cents(sum(to_cents(expense['total_amount']) for expense in expenses)),
+            "member_totals": {member_names.get(uid, f"User {uid}"): from_cents(cents)
+                              for uid, cents in member_totals.items()},
+            "bills": bill_results
+        })
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
+def get_group_balances_by_id(group_id: int) -> dict:
+    """
+    Read paid/owes/balance for every member of a group from the ledger
+    Returns a dict keyed by user_id
+    """
+    ensure_ledger()
+    results = execute_statement("group_balances", (group_id,))
+
+    balances = {}
+    for row in results:
+        user_id_bal, name, paid, owes = row
+        balance = round_to_cents(paid - owes)
+
+        balances[user_id_bal] = {
+            'name': name,
+            'paid': round_to_cents(paid),
+            'owes': round_to_cents(owes),
+            'balance': balance,
+            'status': 'owes_money' if balance < 0 else 'owed_money' if balance > 0 else 'settled'
+        }
+
+    return balances
+
+
 def get_group_balance_info(user_id: int, group_name: str) -> str:
     """
     Get balance information for a group
@@ -579,36 +570,8 @@ def get_group_balance_info(user_id: int, group_name: str) -> str:
 
         group_id = validation["group_id"]
 
-        # Get group balances directly
-        query = f"""
-            SELECT
-                u.user_id,
-                u.name,
-                COALESCE(SUM(CASE WHEN e.payer_id = u.user_id THEN e.amount ELSE 0 END), 0) as paid,
-                COALESCE(SUM(es.share_amount), 0) as owes
-            FROM users u
-            JOIN user_groups ug ON u.user_id = ug.user_id
-            LEFT JOIN expenses e ON e.group_id = ug.group_id
-            LEFT JOIN expense_shares es ON es.user_id = u.user_id AND es.expense_id = e.expense_id
-            WHERE ug.group_id = {group_id}
-            GROUP BY u.user_id, u.name
-            ORDER BY u.name
-        """
-
-        results = execute_query(query)
-
-        balances = {}
-        for row in results:
-            user_id_bal, name, paid, owes = row
-            balance = round_to_cents(paid - owes)
-
-            balances[user_id_bal] = {
-                'name': name,
-                'paid': round_to_cents(paid),
-                'owes': round_to_cents(owes),
-                'balance': balance,
-                'status': 'owes_money' if balance < 0 else 'owed_money' if balance > 0 else 'settled'
-            }
+        # Get group balances from the incrementally maintained ledger
+        balances = get_group_balances_by_id(group_id)
 
         return json.dumps({
             "group_name": group_name,
@@ -618,27 +581,71 @@ def get_group_balance_info(user_id: int, group_name: str) -> str:
         return json.dumps({"error": str(e)})
 
 
-def query_database(sql_query: str) -> str:
+def get_group_settlement_plan(user_id: int, group_name: str) -> str:
+    """
+    Get the smallest set of payments that settles everyone in a group
+    Args:
+        user_id: ID of the user requesting the settlement plan
+        group_name: Name of the group
+    Returns:
+        JSON string listing who should pay whom and how much
+    """
+    try:
+        # Validate user and group
+        validation = validate_user_and_group(user_id, group_name)
+        if "error" in validation:
+            return json.dumps(validation)
+
+        balances = get_group_balances_by_id(validation["group_id"])
+
+        transfers, unsettled = simplify_debts(
+            {user_id_bal: to_cents(data['balance']) for user_id_bal, data in balances.items()}
+        )
+
+        result = {
+            "group_name": group_name,
+            "transfer_count": len(transfers),
+            "transfers": [
+                {
+                    "from": balances[debtor]['name'],
+                    "to": balances[creditor]['name'],
+                    "amount": amount_cents / 100
+                }
+                for debtor, creditor, amount_cents in transfers
+            ]
+        }
+        if unsettled:
+            # Balances only net to zero when every expense was split in full
+            result["unsettled_amount"] = unsettled / 100
+
+        return json.dumps(result)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
+def query_database(sql_query: str, page_token: str = "") -> str:
     """
     Execute a custom SQL query against the database
     Args:
         sql_query: SQL query to execute (SELECT statements only for safety)
+        page_token: next_page_token from a truncated result, to read the next page
     Returns:
-        JSON string with query results
+        JSON string with columns, one array per row, and a next_page_token when truncated
     """
     try:
         # Only allow SELECT queries for safety
         if not sql_query.strip().upper().startswith('SELECT'):
             return json.dumps({"error": "Only SELECT queries are allowed"})
 
-        results = execute_query(sql_query)
-        return json.dumps({"results": results})
+        return execute_query_page(sql_query, page_token=page_token)
+    except QueryTooExpensiveError as e:
+        return json.dumps(e.to_dict())
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
 def persist_expense_and_shares(group_id: int, payer_id: int, total_amount: float,
-                              description: str, splits: dict, split_type: str) -> bool:
+                              description: str, splits: dict, split_type: str) -> int:
     """
     Internal tool to persist expense and expense_shares to database
     Args:
@@ -649,50 +656,38 @@ def persist_expense_and_shares(group_id: int, payer_id: int, total_amount: float
         splits: Dictionary mapping user_id to share data
         split_type: Type of split (equal, percentage, custom_amounts, itemized)
     Returns:
-        bool: True if successful, False otherwise
+        int: expense_id of the inserted expense
+    Raises:
+        sqlite3.Error: nothing was saved; the split tools report it to the user
     """
-    import sqlite3
-    import os
+    expense_ids = persist_expenses_batch(group_id, payer_id, [{
+        'total_amount': total_amount,
+        'description': description,
+        'splits': splits,
+        'split_type': split_type
+    }])
+    print(f"Inserted expense with ID: {expense_ids[0]}")
+    return expense_ids[0]
 
-    try:
-        # Use a single connection for the entire transaction
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mock_finance.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert into expenses table
-        expense_date = datetime.now().strftime('%Y-%m-%d')
-        expense_type = 'general'  # Default type
-        currency = 'USD'  # Default currency
-
-        expense_insert = f"""
-            INSERT INTO expenses (group_id, payer_id, amount, currency, description, expense_date, type)
-            VALUES ({group_id}, {payer_id}, {total_amount}, '{currency}', '{description}', '{expense_date}', '{expense_type}')
-        """
-        cursor.execute(expense_insert)
-
-        # Get the expense_id of the inserted expense (in same connection)
-        expense_id = cursor.lastrowid
-        print(f"Inserted expense with ID: {expense_id}")
-
-        # Insert into expense_shares table
-        for user_id, split_data in splits.items():
-            share_amount = split_data['share_amount']
-            share_insert = f"""
-                INSERT INTO expense_shares (expense_id, user_id, share_amount)
-                VALUES ({expense_id}, {user_id}, {share_amount})
-            """
-            cursor.execute(share_insert)
-            print(f"Inserted share: expense_id={expense_id}, user_id={user_id}, amount={share_amount}")
-
-        # Commit all changes
-        conn.commit()
-        conn.close()
-
-        return True
-    except Exception as e:
-        print(f"Error persisting expense: {str(e)}")
-        if 'conn' in locals():
-            conn.rollback()
-            conn.close()
-        return False
+
+def persist_expenses_batch(group_id: int, payer_id: int, expenses: list) -> list:
+    """
+    Persist many expenses, their shares and ledger updates in one transaction
+    Args:
+        group_id: ID of the group
+        payer_id: ID of the user who paid (requesting user)
+        expenses: List of dicts with total_amount, description, splits and split_type
+    Returns:
+        list: expense_id of each inserted expense, in input order
+    Raises:
+        sqlite3.Error: the whole batch is rolled back on any failure
+    """
+    expense_ids = write_expenses(group_id, payer_id, expenses)
+
+    # Anything cached about this group or these tables may now be stale
+    roster_cache.invalidate_group(group_id)
+    query_cache.invalidate_tables(WRITTEN_TABLES)
+    response_cache.invalidate_users(
+        {payer_id} | {user_id for expense in expenses for user_id in expense['splits']}
+    )
+    return expense_ids
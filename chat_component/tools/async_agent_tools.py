@@ -0,0 +1,20 @@
+"""
+Async variants of the agent tools in agent_tools.py.
+
+Each tool keeps its name, docstring and parameters, but awaits the blocking
+database work on the shared executor in async_db instead of running it on
+the event loop.
+"""
+from chat_component.tools import agent_tools
+from chat_component.tools.async_db import async_tool
+
+get_group_info = async_tool(agent_tools.get_group_info)
+split_bill_equal = async_tool(agent_tools.split_bill_equal)
+split_bill_percentage = async_tool(agent_tools.split_bill_percentage)
+split_bill_custom_amounts = async_tool(agent_tools.split_bill_custom_amounts)
+split_bill_itemized = async_tool(agent_tools.split_bill_itemized)
+split_bills_batch = async_tool(agent_tools.split_bills_batch)
+get_user_groups_info = async_tool(agent_tools.get_user_groups_info)
+get_group_balance_info = async_tool(agent_tools.get_group_balance_info)
+get_group_settlement_plan = async_tool(agent_tools.get_group_settlement_plan)
+query_database = async_tool(agent_tools.query_database)
@@ -0,0 +1,64 @@
+"""
+Run blocking database work off the event loop.
+
+ADK awaits tools from runner.run_async, so a tool that calls sqlite3 directly
+stalls every other chat served by the same worker. Blocking tool bodies are
+dispatched to a bounded thread pool sized to the connection pool, so each
+worker thread can hold one pooled connection without waiting on another.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_component.tools.connection_pool import POOL_SIZE
+
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared database executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DB_EXECUTOR_WORKERS,
+            thread_name_prefix="finance-db",
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Wait for in-flight database work and stop the executor threads"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Await a blocking database function on the shared executor.
+    Args:
+        func: Blocking callable to run
+        *args, **kwargs: Arguments forwarded to func
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def async_tool(func):
+    """
+    Wrap a blocking tool function as a coroutine function.
+
+    The wrapper keeps the name, docstring and signature of func, so ADK builds
+    the same tool declaration and simply awaits the call.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+
+    return wrapper
@@ -1,149 +1,104 @@
-import json
-from typing import List, Dict
-from chat_component.tools.utils import round_to_cents, calculate_percentage
-from chat_component.tools.sql_execution import execute_query
+from typing import List, Dict, Optional
+from chat_component.tools.money import (
+    to_cents, from_cents, to_weight, allocate, percentage_of
+)
+from chat_component.tools.member_resolver import get_group_roster, get_user_names
 
 
-def split_equal(total_amount: float, eligible_members: List[int]) -> Dict:
-    """Split bill equally among group members"""
-    
-    # Calculate equal share
-    num_members = len(eligible_members)
-    equal_share = round_to_cents(total_amount / num_members)
-    
-    # Handle rounding differences
-    remaining_amount = total_amount - (equal_share * num_members)
-    
+def _build_splits(shares_cents: Dict[int, int], total_cents: int, user_names: Dict[int, str],
+                  percentages: Optional[Dict[int, float]] = None) -> Dict:
+    """Convert per-user cents into the splits format used by the tools"""
     splits = {}
-    for i, member in enumerate(eligible_members):
-        share = equal_share
-        # Add remaining cents to first member(s)
-        if i == 0 and remaining_amount != 0:
-            share += round_to_cents(remaining_amount)
-        
-        splits[member['user_id']] = {
-            'user_name': member['name'],
-            'share_amount': share,
-            'percentage': round((share / total_amount) * 100, 2)
+    for user_id, cents in shares_cents.items():
+        splits[user_id] = {
+            'user_name': user_names.get(user_id, f"User {user_id}"),
+            'share_amount': from_cents(cents),
+            'percentage': percentages[user_id] if percentages else percentage_of(cents, total_cents)
         }
-
     return splits
 
+
+def split_equal(total_amount: float, eligible_members: List[Dict]) -> Dict:
+    """Split bill equally among group members"""
+    if not eligible_members:
+        raise ValueError("Cannot split a bill among zero members")
+
+    total_cents = to_cents(total_amount)
+    # Shares differ by at most one cent and always sum to the total
+    shares = allocate(total_cents, [1] * len(eligible_members))
+
+    shares_cents = {member['user_id']: share for member, share in zip(eligible_members, shares)}
+    user_names = {member['user_id']: member['name'] for member in eligible_members}
+    return _build_splits(shares_cents, total_cents, user_names)
+
 def split_percentage(total_amount: float,
-                    percentage_map: Dict[int, float]) -> Dict:
+                    percentage_map: Dict[int, float],
+                    user_names: Optional[Dict[int, str]] = None) -> Dict:
     """Split bill based on custom percentages"""
-    # Validate percentages sum to 100
-    total_percentage = sum(percentage_map.values())
-    if abs(total_percentage - 100.0) > 0.01:
+    # Validate percentages sum to 100 (within 0.01 to allow 33.33 x 3)
+    weights = [to_weight(percentage) for percentage in percentage_map.values()]
+    total_percentage = sum(weights) / to_weight(1)
+    if abs(sum(weights) - to_weight(100)) > to_weight(0.01):
         raise ValueError(f"Percentages must sum to 100%, got {total_percentage}%")
-    
-    splits = {}
-    total_assigned = 0
-    
-    for user_id, percentage in percentage_map.items():
-        share_amount = round_to_cents(calculate_percentage(total_amount, percentage))
-        total_assigned += share_amount
-        
-        # Get user name from database
-        user_query = f"SELECT name FROM users WHERE user_id = {user_id}"
-        user_result = execute_query(user_query)
-        user_name = user_result[0][0] if user_result else f"User {user_id}"
-        splits[user_id] = {
-            'user_name': user_name,
-            'share_amount': share_amount,
-            'percentage': percentage
-        }
-    
-    
-    # Handle rounding differences
-    difference = round_to_cents(total_amount - total_assigned)
-    if difference != 0:
-        # Add difference to the first user
-        first_user = list(percentage_map.keys())[0]
-        splits[first_user]['share_amount'] += difference
-    
-    return splits
+
+    total_cents = to_cents(total_amount)
+    # Allocating by the percentages themselves absorbs any rounding exactly
+    shares = allocate(total_cents, weights)
+
+    if user_names is None:
+        user_names = get_user_names(percentage_map.keys())
+    return _build_splits(dict(zip(percentage_map.keys(), shares)), total_cents, user_names,
+                         percentages=dict(percentage_map))
 
 def split_custom_amounts(expense_id: int, group_id: int, total_amount: float,
-                        amount_map: Dict[int, float]) -> Dict:
+                        amount_map: Dict[int, float],
+                        user_names: Optional[Dict[int, str]] = None) -> Dict:
     """Split bill with custom amounts for each person"""
-    total_assigned = sum(amount_map.values())
-    
-    if abs(total_assigned - total_amount) > 0.01:
-        raise ValueError(f"Custom amounts ({total_assigned}) don't match total ({total_amount})")
-    
-    splits = {}
-    for user_id, amount in amount_map.items():
-        share_amount = round_to_cents(amount)
-        percentage = round((share_amount / total_amount) * 100, 2)
-        
-        # Get user name from database
-        user_query = f"SELECT name FROM users WHERE user_id = {user_id}"
-        user_result = execute_query(user_query)
-        user_name = user_result[0][0] if user_result else f"User {user_id}"
-        splits[user_id] = {
-            'user_name': user_name,
-            'share_amount': share_amount,
-            'percentage': percentage
-        }
-        
-    
-    return splits
+    total_cents = to_cents(total_amount)
+    shares_cents = {user_id: to_cents(amount) for user_id, amount in amount_map.items()}
+    total_assigned = sum(shares_cents.values())
+
+    if total_assigned != total_cents:
+        raise ValueError(
+            f"Custom amounts ({from_cents(total_assigned)}) don't match total ({from_cents(total_cents)})"
+        )
+
+    if user_names is None:
+        user_names = get_user_names(amount_map.keys())
+    return _build_splits(shares_cents, total_cents, user_names)
 
 def split_itemized(expense_id: int, group_id: int, items: List[Dict],
-                    default_split: str = 'equal') -> Dict:
+                    default_split: str = 'equal',
+                    user_names: Optional[Dict[int, str]] = None) -> Dict:
     """Split bill based on itemized purchases"""
     # items = [{'name': 'Pizza', 'price': 25.00, 'assigned_users': [1, 2]}, ...]
-    
+    if default_split not in ('', None, 'equal'):
+        raise ValueError(f"Unsupported default_split '{default_split}'. Only 'equal' is supported")
+
     user_totals = {}
-    total_amount = 0
-    
+    unassigned_cents = 0
+
     for item in items:
-        item_price = item['price']
+        item_cents = to_cents(item['price'])
         assigned_users = item.get('assigned_users', [])
 
         if assigned_users:
-            # Split among assigned users
-            per_person = round_to_cents(item_price / len(assigned_users))
-            for user_id in assigned_users:
-                user_totals[user_id] = user_totals.get(user_id, 0) + per_person
+            # Split among assigned users, largest remainder per item
+            for user_id, share in zip(assigned_users, allocate(item_cents, [1] * len(assigned_users))):
+                user_totals[user_id] = user_totals.get(user_id, 0) + share
         else:
             # Will be split according to default_split method
-            total_amount += item_price
-    
-    # Handle items without specific assignment
-    if total_amount > 0:
-        if default_split == 'equal':
-            # Get group members from database
-            members_query = f"""
-                SELECT u.user_id, u.name
-                FROM users u
-                JOIN user_groups ug ON u.user_id = ug.user_id
-                WHERE ug.group_id = {group_id}
-            """
-            members_result = execute_query(members_query)
-            members = [{'user_id': row[0], 'name': row[1]} for row in members_result]
-            per_person = round_to_cents(total_amount / len(members))
-            for member in members:
-                user_totals[member['user_id']] = user_totals.get(member['user_id'], 0) + per_person
-    
-    # Convert to splits format and save to database
-    splits = {}
-    grand_total = sum(user_totals.values())
-    
-    for user_id, amount in user_totals.items():
-        # Get user name from database
-        user_query = f"SELECT name FROM users WHERE user_id = {user_id}"
-        user_result = execute_query(user_query)
-        user_name = user_result[0][0] if user_result else f"User {user_id}"
-        percentage = round((amount / grand_total) * 100, 2) if grand_total > 0 else 0
-        
-        splits[user_id] = {
-            'user_name': user_name,
-            'share_amount': round_to_cents(amount),
-            'percentage': percentage
-        }
-    
-    return splits
+            unassigned_cents += item_cents
 
+    # Handle items without specific assignment
+    if unassigned_cents:
+        members = get_group_roster(group_id)
+        if not members:
+            raise ValueError(f"Group {group_id} has no members to share unassigned items")
+        for member, share in zip(members, allocate(unassigned_cents, [1] * len(members))):
+            user_totals[member['user_id']] = user_totals.get(member['user_id'], 0) + share
 
+    grand_total = sum(user_totals.values())
+    if user_names is None:
+        user_names = get_user_names(user_totals.keys())
+    return _build_splits(user_totals, grand_total, user_names)
@@ -0,0 +1,243 @@
+"""
+Pooled SQLite connections for the finance database.
+
+Every tool used to open and close a fresh sqlite3 connection per query. The
+pool keeps a bounded set of warm connections configured for WAL mode and
+tuned pragmas, hands them out per thread and re-uses the same connection for
+nested calls made by that thread. A read-only pool opens the file with
+mode=ro and query_only for agent-written SQL, see read_replica.
+"""
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'mock_finance.db'))
+
+# Pool configuration, overridable through the environment
+DB_PATH = os.getenv("FINANCE_DB_PATH", DEFAULT_DB_PATH)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+# Size of each connection's LRU cache of compiled statements
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when a connection is requested from a closed pool"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections.
+
+    Connections run in autocommit mode (isolation_level=None); callers that
+    need several statements to commit together use transaction(). With
+    read_only=True the file is opened with mode=ro and query_only, so any
+    write is rejected by SQLite itself.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = POOL_SIZE,
+                 timeout: float = POOL_TIMEOUT, read_only: bool = False):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.read_only = read_only
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the performance pragmas"""
+        if self.read_only:
+            database, uri = pathlib.Path(self.db_path).resolve().as_uri() + "?mode=ro", True
+        else:
+            database, uri = self.db_path, False
+        conn = sqlite3.connect(
+            database,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=uri,
+        )
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+            conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise PoolClosedError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            # Never hand a half-finished transaction to the next caller
+            conn.rollback()
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put_nowait(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the current thread.
+        Nested calls from the same thread get the connection already held.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, mode: str = "DEFERRED"):
+        """
+        Run the enclosed statements in a single transaction.
+        Commits on success and rolls back on any exception.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                # Already inside an outer transaction on this thread
+                yield conn
+                return
+            conn.execute(f"BEGIN {mode}")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def health_check(self) -> dict:
+        """
+        Ping every idle connection, replacing any that no longer respond.
+        Returns a summary suitable for the /health endpoint.
+        """
+        if self._closed:
+            return {"status": "closed", "pool_size": self.pool_size, "open_connections": 0}
+
+        checked = []
+        replaced = 0
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.execute("SELECT 1").fetchone()
+                checked.append(conn)
+            except sqlite3.Error:
+                self._discard(conn)
+                replaced += 1
+        for conn in checked:
+            self._idle.put_nowait(conn)
+
+        try:
+            with self.connection() as conn:
+                conn.execute("SELECT 1").fetchone()
+            status = "healthy"
+        except Exception as e:
+            status = f"error: {str(e)}"
+
+        return {
+            "status": status,
+            "read_only": self.read_only,
+            "pool_size": self.pool_size,
+            "open_connections": self._created,
+            "idle_connections": self._idle.qsize(),
+            "replaced_connections": replaced,
+        }
+
+    def close(self):
+        """Close every idle connection and refuse new checkouts"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def init_pool(db_path: str = DB_PATH, pool_size: int = POOL_SIZE) -> ConnectionPool:
+    """Create (or re-create) the process-wide pool and warm one connection"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(db_path=db_path, pool_size=pool_size)
+    with _pool.connection() as conn:
+        conn.execute("SELECT 1").fetchone()
+    return _pool
+
+
+def close_pool():
+    """Close the process-wide pool on application shutdown"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,229 @@
+"""
+Write path for expenses, shares and ledger updates.
+
+Every write runs in a BEGIN IMMEDIATE transaction, so the write lock is taken
+up front instead of failing half-way when a reader upgrades. A busy database
+is retried with jittered exponential backoff. With DB_GROUP_COMMIT=1,
+concurrent requests hand their writes to a single writer thread that commits
+many of them in one transaction (each isolated by a SAVEPOINT), so splits
+from parallel chats no longer fight over the SQLite lock.
+"""
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List
+
+from chat_component.tools.connection_pool import get_pool
+from chat_component.tools.statements import get_statement
+from chat_component.tools.ledger import ensure_ledger, apply_expenses
+
+WRITE_RETRIES = int(os.getenv("DB_WRITE_RETRIES", "5"))
+WRITE_RETRY_BASE_DELAY = float(os.getenv("DB_WRITE_RETRY_BASE_DELAY", "0.05"))
+GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "64"))
+GROUP_COMMIT_MAX_WAIT = float(os.getenv("DB_GROUP_COMMIT_MAX_WAIT", "0.005"))
+
+BUSY_ERROR_CODES = (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+
+# Tables touched by write_expenses, for cache invalidation
+WRITTEN_TABLES = ('expenses', 'expense_shares', 'group_balances')
+
+
+def is_busy_error(error: Exception) -> bool:
+    """True when a sqlite3 error means another connection holds the lock"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in BUSY_ERROR_CODES
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def with_busy_retry(func, *args, **kwargs):
+    """Call func, retrying with jittered exponential backoff while the database is busy"""
+    for attempt in range(WRITE_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == WRITE_RETRIES:
+                raise
+            delay = WRITE_RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+            print(f"Database busy, retrying write in {delay:.3f}s (attempt {attempt + 1}/{WRITE_RETRIES})")
+            time.sleep(delay)
+
+
+def _insert_expenses(conn, group_id: int, payer_id: int, expenses: List[Dict]) -> List[int]:
+    """Insert expenses, shares and ledger deltas on conn's open transaction"""
+    expense_date = datetime.now().strftime('%Y-%m-%d')
+    expense_type = 'general'  # Default type
+    currency = 'USD'  # Default currency
+
+    expense_ids = []
+    share_rows = []
+    insert_expense = get_statement("insert_expense")
+    for expense in expenses:
+        cursor = conn.execute(insert_expense, (
+            group_id, payer_id, expense['total_amount'], currency,
+            expense['description'], expense_date, expense_type
+        ))
+        expense_id = cursor.lastrowid
+        expense_ids.append(expense_id)
+        share_rows.extend(
+            (expense_id, user_id, split_data['share_amount'])
+            for user_id, split_data in expense['splits'].items()
+        )
+
+    # Insert every expense_shares row with one executemany
+    conn.executemany(get_statement("insert_expense_share"), share_rows)
+
+    # Keep the group_balances ledger in step with the new rows
+    apply_expenses(conn, group_id, [
+        (payer_id, expense['total_amount'],
+         {user_id: split_data['share_amount'] for user_id, split_data in expense['splits'].items()})
+        for expense in expenses
+    ])
+    return expense_ids
+
+
+def _write_now(group_id: int, payer_id: int, expenses: List[Dict]) -> List[int]:
+    with get_pool().transaction("IMMEDIATE") as conn:
+        return _insert_expenses(conn, group_id, payer_id, expenses)
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread that commits queued expense writes in batches.
+    Each submitted job runs inside its own SAVEPOINT, so a failing job is
+    rolled back alone while the rest of the batch still commits.
+    """
+
+    def __init__(self, max_batch: int = GROUP_COMMIT_MAX_BATCH, max_wait: float = GROUP_COMMIT_MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="finance-db-writer", daemon=True)
+        self._stopped = False
+        self.batches = 0
+        self.jobs = 0
+        self._thread.start()
+
+    def submit(self, group_id: int, payer_id: int, expenses: List[Dict]) -> Future:
+        if self._stopped:
+            raise RuntimeError("Expense writer is stopped")
+        future = Future()
+        self._jobs.put((future, group_id, payer_id, expenses))
+        return future
+
+    def stop(self):
+        """Commit everything already queued, then stop the writer thread"""
+        if not self._stopped:
+            self._stopped = True
+            self._jobs.put(None)
+            self._thread.join()
+
+    def _next_batch(self):
+        job = self._jobs.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                job = self._jobs.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if job is None:
+                # Finish this batch, then let _run see the stop marker
+                self._jobs.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = with_busy_retry(self._commit_batch, batch)
+            except Exception as e:
+                for future, *_ in batch:
+                    future.set_exception(e)
+                continue
+            for (future, *_), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _commit_batch(self, batch) -> list:
+        results = []
+        with get_pool().transaction("IMMEDIATE") as conn:
+            for _, group_id, payer_id, expenses in batch:
+                conn.execute("SAVEPOINT expense_job")
+                try:
+                    results.append(_insert_expenses(conn, group_id, payer_id, expenses))
+                    conn.execute("RELEASE expense_job")
+                except sqlite3.OperationalError as e:
+                    if is_busy_error(e):
+                        raise
+                    conn.execute("ROLLBACK TO expense_job")
+                    conn.execute("RELEASE expense_job")
+                    results.append(e)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO expense_job")
+                    conn.execute("RELEASE expense_job")
+                    results.append(e)
+        self.batches += 1
+        self.jobs += len(batch)
+        return results
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    """Return the shared group-commit writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter()
+    return _writer
+
+
+def shutdown_writer():
+    """Flush and stop the group-commit writer on application shutdown"""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
+
+
+def write_expenses(group_id: int, payer_id: int, expenses: List[Dict]) -> List[int]:
+    """
+    Persist expenses, their shares and ledger updates atomically.
+    Args:
+        group_id: ID of the group
+        payer_id: ID of the user who paid
+        expenses: List of dicts with total_amount, description and splits
+    Returns:
+        expense_id of each inserted expense, in input order
+    Raises:
+        sqlite3.Error: nothing from this call is saved
+    """
+    ensure_ledger()
+    if GROUP_COMMIT:
+        return get_writer().submit(group_id, payer_id, expenses).result()
+    return with_busy_retry(_write_now, group_id, payer_id, expenses)
@@ -0,0 +1,317 @@
+"""
+Deterministic fast path in front of root_agent.
+
+A request such as "user_id: 1, group_name: Family Trip, split $150 equally
+for dinner" used to go ChatAgent -> group_splitting_agent -> split_bill_equal,
+which means at least two model round trips for a single function call. The
+router pulls slots (user_id, group_name, amount, description) out of the text
+with a small regex grammar. A keyword-weighted classifier then scores the
+intent. When a request is fully specified and unambiguous, the matching
+agent_tools function is called directly and its JSON becomes the agent's
+answer. Anything else (missing slots, percentages, exclusions, several
+amounts, tool errors) falls through to the agent tree unchanged.
+
+Splits write data, so they only take the fast path when the whole request
+matches SPLIT_GRAMMAR ("user_id: 1, group_name: Family Trip, split $150
+equally for dinner"). Any mention of a payer or of particular participants
+("between me and Bob", "Alice paid", "among 3 of us", a member's name in the
+description) goes to the agents.
+
+Hooked in as root_agent's before/after agent callbacks, so /process-query,
+the streaming endpoint and the ADK web UI all share it. FAST_PATH_ENABLED=0
+turns it off.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from google.genai import types
+
+from chat_component.tools.async_db import run_db
+from chat_component.tools.agent_tools import (
+    split_bill_equal, get_group_info, get_group_balance_info,
+    get_group_settlement_plan, get_user_groups_info
+)
+from chat_component.tools.member_resolver import GroupLookupError, get_group_roster, get_user_group
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+# Minimum classifier score, and lead over the runner-up, to take the fast path
+FAST_PATH_MIN_SCORE = float(os.getenv("FAST_PATH_MIN_SCORE", "3"))
+FAST_PATH_MIN_MARGIN = float(os.getenv("FAST_PATH_MIN_MARGIN", "1.5"))
+DEFAULT_DESCRIPTION = "Shared expense"
+
+_USER_ID = re.compile(r"\buser(?:[_ ]?id)?\s*[:=#]?\s*(\d+)\b", re.IGNORECASE)
+_GROUP_NAME = [
+    re.compile(r"\bgroup[_ ]?name\s*[:=]\s*[\"']?([^,;\"'\n]+?)[\"']?\s*(?:[,;\n]|$)", re.IGNORECASE),
+    re.compile(r"\b(?:group|in|for)\s+[\"']([^\"'\n]+)[\"']", re.IGNORECASE),
+    re.compile(r"\b(?:in|for|of)\s+(?:the|my|our)\s+([A-Z][\w']*(?:\s+[A-Z][\w']*)*)\s+group\b"),
+]
+_AMOUNT = re.compile(
+    r"\$\s*(\d[\d,]*(?:\.\d{1,2})?)\b|\b(\d[\d,]*(?:\.\d{1,2})?)\s*(?:dollars|usd|bucks)\b", re.IGNORECASE
+)
+_DESCRIPTION = [
+    re.compile(r"\bdescription\s*[:=]\s*[\"']?([^,;\"'\n]+?)[\"']?\s*(?:[,;\n]|$)", re.IGNORECASE),
+    re.compile(r"\bfor\s+(?:the\s+|our\s+|my\s+)?([a-z][\w' -]{1,40}?)\s*(?:[,.;!?\n]|$)", re.IGNORECASE),
+]
+# Anything the fast path cannot express goes to the agents, including any
+# payer or participant phrasing
+_BLOCKERS = re.compile(
+    r"%|\bpercent|\bexcept\b|\bexcluding\b|\bwithout\b|\bbut\b|\bnot\b|\bonly\b|\bitemi[sz]ed\b|"
+    r"\breceipt\b|\beach item\b|\bcustom\b|\bratio\b|\bshares? of\b|\bwhy\b|\bhow much did\b|\bshould\b|"
+    r"\bbetween\b|\bwith\b|\bamong(?:st)?\b|\bof (?:us|them)\b|\bpaid\b|\bpays?\b|\bpayer\b|\bcovered\b|"
+    r"\bowes? me\b|\bfronted\b",
+    re.IGNORECASE
+)
+# The only split phrasing the fast path commits without a model
+SPLIT_GRAMMAR = re.compile(
+    r"^\s*user_id\s*[:=]\s*(?P<user_id>\d+)\s*,\s*"
+    r"group_name\s*[:=]\s*[\"']?(?P<group_name>[^,;\"'\n]+?)[\"']?\s*,\s*"
+    r"split\s+(?:\$\s*(?P<amount>\d[\d,]*(?:\.\d{1,2})?)|(?P<amount_words>\d[\d,]*(?:\.\d{1,2})?)\s*(?:dollars|usd))"
+    r"\s+(?:equally|evenly)"
+    r"(?:\s+for\s+(?P<description>[a-z][\w' -]{0,40}?))?\s*[.!]?\s*$",
+    re.IGNORECASE
+)
+# A description that hints at who shares the bill
+_PARTICIPANT_WORDS = re.compile(
+    r"\b(?:me|us|we|them|you|everyone|everybody|both|people|persons?|guys|friends?)\b|\d", re.IGNORECASE
+)
+_TOKEN = re.compile(r"[a-z]+")
+
+# Keyword weights per intent; the highest total wins when it clears the thresholds
+INTENT_WEIGHTS = {
+    "split_equal": {
+        "split": 2.0, "equally": 3.0, "equal": 3.0, "evenly": 3.0, "divide": 2.0,
+        "divided": 2.0, "bill": 1.0,
+    },
+    "group_balance": {
+        "balance": 3.0, "balances": 3.0, "net": 1.0, "standing": 1.5, "owed": 1.0, "owes": 0.5,
+    },
+    "settlement": {
+        "settle": 3.0, "settlement": 3.0, "settling": 3.0, "whom": 2.0, "payments": 1.0,
+        "transfers": 1.5, "owes": 1.5, "pay": 0.5, "back": 0.5,
+    },
+    "group_info": {
+        "members": 3.0, "member": 2.0, "info": 2.0, "information": 2.0, "details": 2.0,
+        "who": 0.5, "describe": 1.5,
+    },
+    "user_groups": {
+        "groups": 3.0, "list": 1.0, "which": 1.0, "belong": 2.0, "part": 0.5, "all": 0.5,
+    },
+}
+# Slots each intent needs before the tool can be called without a model
+REQUIRED_SLOTS = {
+    "split_equal": ("user_id", "group_name", "amount"),
+    "group_balance": ("user_id", "group_name"),
+    "settlement": ("user_id", "group_name"),
+    "group_info": ("user_id", "group_name"),
+    "user_groups": ("user_id",),
+}
+
+
+class FastPathMatch(NamedTuple):
+    intent: str
+    slots: dict
+    score: float
+
+
+def extract_slots(text: str) -> dict:
+    """Pull user_id, group_name, amount and description out of a request"""
+    slots = {}
+    user_ids = set(_USER_ID.findall(text))
+    if len(user_ids) == 1:
+        slots["user_id"] = int(user_ids.pop())
+    for pattern in _GROUP_NAME:
+        match = pattern.search(text)
+        if match:
+            slots["group_name"] = match.group(1).strip()
+            break
+    amounts = {float((a or b).replace(",", "")) for a, b in _AMOUNT.findall(text)}
+    if len(amounts) == 1:
+        slots["amount"] = amounts.pop()
+    elif amounts:
+        slots["ambiguous_amount"] = True
+    for pattern in _DESCRIPTION:
+        match = pattern.search(text)
+        if match and slots.get("group_name", "\0").lower() not in match.group(1).lower():
+            slots["description"] = match.group(1).strip()
+            break
+    return slots
+
+
+def classify(text: str) -> tuple:
+    """
+    Score every intent by its keyword weights.
+    Returns:
+        (best intent or None, its score, margin over the runner-up)
+    """
+    tokens = _TOKEN.findall(text.lower())
+    scores = sorted(
+        ((sum(weights.get(token, 0.0) for token in tokens), intent) for intent, weights in INTENT_WEIGHTS.items()),
+        reverse=True
+    )
+    (best, intent), (second, _) = scores[0], scores[1]
+    if best == 0:
+        return None, 0.0, 0.0
+    return intent, best, best - second
+
+
+def route(text: str) -> Optional[FastPathMatch]:
+    """Return the fast-path match for a fully specified request, or None to use the agents"""
+    if not text or _BLOCKERS.search(text):
+        return None
+    intent, score, margin = classify(text)
+    if intent is None or score < FAST_PATH_MIN_SCORE or margin < FAST_PATH_MIN_MARGIN:
+        return None
+    if intent == "split_equal":
+        return _route_split(text, score)
+    slots = extract_slots(text)
+    if slots.get("ambiguous_amount") or any(slot not in slots for slot in REQUIRED_SLOTS[intent]):
+        return None
+    if intent != "split_equal" and "amount" in slots:
+        # A money amount in an info request means something the tools can't answer
+        return None
+    return FastPathMatch(intent, slots, score)
+
+
+def _route_split(text: str, score: float) -> Optional[FastPathMatch]:
+    """A split is only taken when the whole request matches SPLIT_GRAMMAR"""
+    match = SPLIT_GRAMMAR.match(text)
+    if match is None:
+        return None
+    slots = {
+        "user_id": int(match.group("user_id")),
+        "group_name": match.group("group_name").strip(),
+        "amount": float((match.group("amount") or match.group("amount_words")).replace(",", "")),
+    }
+    if match.group("description"):
+        slots["description"] = match.group("description").strip()
+        if _PARTICIPANT_WORDS.search(slots["description"]):
+            return None
+    return FastPathMatch("split_equal", slots, score)
+
+
+def _names_member(user_id: int, group_name: str, description: str) -> bool:
+    """True when the description mentions a member of the group by first or last name"""
+    group = get_user_group(user_id, group_name)
+    words = set(re.findall(r"[a-z]+", description.lower()))
+    return any(part in words for member in get_group_roster(group["group_id"])
+               for part in member["name"].lower().split())
+
+
+def dispatch(match: FastPathMatch) -> str:
+    """Call the agent_tools function for a match; returns its JSON string"""
+    slots = match.slots
+    if match.intent == "split_equal":
+        description = slots.get("description", DEFAULT_DESCRIPTION)
+        try:
+            if _names_member(slots["user_id"], slots["group_name"], description):
+                return json.dumps({"error": "The description names a group member; the agents handle that split"})
+        except GroupLookupError as e:
+            return json.dumps({"error": str(e)})
+        return split_bill_equal(slots["user_id"], slots["group_name"], slots["amount"], description)
+    if match.intent == "group_balance":
+        return get_group_balance_info(slots["user_id"], slots["group_name"])
+    if match.intent == "settlement":
+        return get_group_settlement_plan(slots["user_id"], slots["group_name"])
+    if match.intent == "group_info":
+        return get_group_info(slots["group_name"], slots["user_id"])
+    return get_user_groups_info(slots["user_id"])
+
+
+class FastPathStats:
+    """How much traffic skipped the model chain and what that saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.fast_path = 0
+        self.tool_errors = 0
+        self.by_intent = {}
+        self.fast_ms = 0.0
+        self.agent_runs = 0
+        self.agent_ms = 0.0
+
+    def record_fast(self, intent: str, elapsed_ms: float):
+        with self._lock:
+            self.requests += 1
+            self.fast_path += 1
+            self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+            self.fast_ms += elapsed_ms
+
+    def record_fallback(self, tool_error: bool = False):
+        with self._lock:
+            self.requests += 1
+            if tool_error:
+                self.tool_errors += 1
+
+    def record_agent_run(self, elapsed_ms: float):
+        with self._lock:
+            self.agent_runs += 1
+            self.agent_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_fast = self.fast_ms / self.fast_path if self.fast_path else None
+            avg_agent = self.agent_ms / self.agent_runs if self.agent_runs else None
+            saved = (avg_agent - avg_fast) * self.fast_path if avg_fast is not None and avg_agent is not None else None
+            return {
+                "enabled": FAST_PATH_ENABLED,
+                "requests": self.requests,
+                "fast_path": self.fast_path,
+                "skipped_llm_fraction": round(self.fast_path / self.requests, 4) if self.requests else 0.0,
+                "by_intent": dict(self.by_intent),
+                "tool_error_fallbacks": self.tool_errors,
+                "avg_fast_path_ms": round(avg_fast, 2) if avg_fast is not None else None,
+                "avg_agent_ms": round(avg_agent, 1) if avg_agent is not None else None,
+                "latency_saved_ms": round(saved, 1) if saved is not None else None,
+            }
+
+
+fast_path_stats = FastPathStats()
+# invocation_id -> perf_counter of agent runs that fell through; bounded in
+# case a run dies before after_root_agent sees it
+_agent_started = OrderedDict()
+_AGENT_STARTED_MAX = 1024
+
+
+def _request_text(content: Optional[types.Content]) -> str:
+    if content is None or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+async def before_root_agent(callback_context) -> Optional[types.Content]:
+    """
+    before_agent_callback for root_agent.
+    Returns the tool's JSON as the agent's reply on a fast-path hit, None to run the agents.
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    start = time.perf_counter()
+    match = route(_request_text(callback_context.user_content))
+    if match is not None:
+        result = await run_db(dispatch, match)
+        try:
+            ok = "error" not in json.loads(result)
+        except (TypeError, ValueError):
+            ok = False
+        if ok:
+            fast_path_stats.record_fast(match.intent, (time.perf_counter() - start) * 1000)
+            return types.Content(role="model", parts=[types.Part(text=result)])
+    fast_path_stats.record_fallback(tool_error=match is not None)
+    _agent_started[callback_context.invocation_id] = time.perf_counter()
+    while len(_agent_started) > _AGENT_STARTED_MAX:
+        _agent_started.popitem(last=False)
+    return None
+
+
+async def after_root_agent(callback_context) -> None:
+    """after_agent_callback for root_agent: times the agent runs the fast path could not serve"""
+    started = _agent_started.pop(callback_context.invocation_id, None)
+    if started is not None:
+        fast_path_stats.record_agent_run((time.perf_counter() - started) * 1000)
+    return None
@@ -1,19 +1,14 @@
 from datetime import datetime
 from typing import List, Dict
-from sql_execution import execute_query
-from utils import round_to_cents
+from chat_component.tools.sql_execution import execute_query, execute_statement
+from chat_component.tools.utils import round_to_cents
+from chat_component.tools.roster_cache import roster_cache
+from chat_component.tools.ledger import ensure_ledger
 
 
 def get_group_members(group_id: int) -> List[Dict]:
     """Get all members of a group"""
-    query = f"""
-        SELECT u.user_id, u.name, u.email, ug.role, ug.joined_at
-        FROM users u
-        JOIN user_groups ug ON u.user_id = ug.user_id
-        WHERE ug.group_id = {group_id}
-        ORDER BY ug.joined_at
-    """
-    results = execute_query(query)
+    results = execute_statement("group_members_detailed", (group_id,))
     
     members = []
     for row in results:
@@ -29,15 +24,7 @@ def get_group_members(group_id: int) -> List[Dict]:
 
 def get_user_groups(user_id: int) -> List[Dict]:
     """Get all groups for a user"""
-    query = f"""
-        SELECT g.group_id, g.name, g.description, g.group_type,
-                ug.role, g.created_at
-        FROM groups g
-        JOIN user_groups ug ON g.group_id = ug.group_id
-        WHERE ug.user_id = {user_id}
-        ORDER BY g.created_at DESC
-    """
-    results = execute_query(query)
+    results = execute_statement("groups_for_user", (user_id,))
     
     groups = []
     for row in results:
@@ -45,50 +32,43 @@ def get_user_groups(user_id: int) -> List[Dict]:
             'group_id': row[0],
             'name': row[1],
             'description': row[2],
-            'group_type': row[3],
-            'role': row[4],
-            'created_at': row[5]
+            'role': row[3],
+            'created_at': row[4]
         })
     
     return groups
 
 def get_group_details(group_id: int) -> Dict:
     """Get detailed information about a group"""
-    query = f"""
-        SELECT g.group_id, g.name, g.description, g.group_type,
-                g.created_at, u.name as creator_name
-        FROM groups g
-        JOIN users u ON g.created_by = u.user_id
-        WHERE g.group_id = {group_id}
-    """
-    result = execute_query(query)
-    
-    if not result:
+    def load():
+        result = execute_statement("group_details", (group_id,))
+        if not result:
+            return group_id, None
+
+        row = result[0]
+        return group_id, {
+            'group_id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'created_at': row[3],
+            'creator_name': row[4],
+            'members': get_group_members(group_id)
+        }
+
+    group_details = roster_cache.get_or_load(("details", group_id), load)
+    if group_details is None:
         return None
-    
-    row = result[0]
-    group_details = {
-        'group_id': row[0],
-        'name': row[1],
-        'description': row[2],
-        'group_type': row[3],
-        'created_at': row[4],
-        'creator_name': row[5],
-        'members': get_group_members(group_id)
-    }
-    
-    return group_details
+    # Callers receive their own copy; the cached entry stays untouched
+    return dict(group_details, members=[dict(member) for member in group_details['members']])
 
 def get_user_name(user_id: int) -> str:
     """Get user name by ID"""
-    query = "SELECT name FROM users WHERE user_id = ?"
-    result = execute_query(query, (user_id,))
+    result = execute_statement("user_name_by_id", (user_id,))
     return result[0][0] if result else f"User_{user_id}"
 
 def get_group_name(group_id: int) -> str:
     """Get group name by ID"""
-    query = "SELECT name FROM groups WHERE group_id = ?"
-    result = execute_query(query, (group_id,))
+    result = execute_statement("group_name_by_id", (group_id,))
     return result[0][0] if result else f"Group_{group_id}"
 
 def list_all_groups(self) -> List[Dict]:
@@ -120,22 +100,8 @@ def list_all_groups(self) -> List[Dict]:
 
 def get_group_balances(group_id: int) -> Dict:
     """Calculate who owes what in a group"""
-    query = f"""
-        SELECT
-            u.user_id,
-            u.name,
-            COALESCE(SUM(CASE WHEN e.payer_id = u.user_id THEN e.amount ELSE 0 END), 0) as paid,
-            COALESCE(SUM(es.share_amount), 0) as owes
-        FROM users u
-        JOIN user_groups ug ON u.user_id = ug.user_id
-        LEFT JOIN expenses e ON e.group_id = ug.group_id
-        LEFT JOIN expense_shares es ON es.user_id = u.user_id AND es.expense_id = e.expense_id
-        WHERE ug.group_id = {group_id}
-        GROUP BY u.user_id, u.name
-        ORDER BY u.name
-    """
-
-    results = execute_query(query)
+    ensure_ledger()
+    results = execute_statement("group_balances", (group_id,))
     
     balances = {}
     for row in results:
@@ -155,18 +121,11 @@ def get_group_balances(group_id: int) -> Dict:
 
 def get_group_members_simple(group_id: int) -> List[Dict]:
     """Get group members (simplified version)"""
-    query = f"""
-        SELECT u.user_id, u.name, u.email
-        FROM users u
-        JOIN user_groups ug ON u.user_id = ug.user_id
-        WHERE ug.group_id = {group_id}
-    """
-    results = execute_query(query)
+    results = execute_statement("group_members", (group_id,))
     
     return [{'user_id': row[0], 'name': row[1], 'email': row[2]} for row in results]
 
 def get_user_name(user_id: int) -> str:
     """Get user name by ID"""
-    query = "SELECT name FROM users WHERE user_id = ?"
-    result = execute_query(query, (user_id,))
+    result = execute_statement("user_name_by_id", (user_id,))
     return result[0][0] if result else f"User_{user_id}"
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Background sampler behind /health.
+
+/health used to call psutil.cpu_percent(interval=1) inside the async handler,
+blocking the event loop for a second on every probe, and pinged the pools
+inline. A task started in lifespan now takes a snapshot every
+HEALTH_SAMPLE_INTERVAL seconds on the database executor: CPU, memory and disk
+use plus a real round trip through the finance and read-only pools. /health
+answers from the latest snapshot and reports how old it is. A snapshot older
+than HEALTH_STALE_AFTER seconds is flagged stale, which usually means the
+sampler or the database executor is stuck.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import psutil
+
+from chat_component.tools.async_db import run_db
+from chat_component.tools.connection_pool import get_pool
+from chat_component.tools.read_replica import get_replica
+
+HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", "10"))
+HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", str(3 * HEALTH_SAMPLE_INTERVAL)))
+HEALTH_DISK_PATH = os.getenv("HEALTH_DISK_PATH", "/")
+
+
+class HealthSampler:
+    """Periodically refreshed system and database snapshot"""
+
+    def __init__(self, interval: float = HEALTH_SAMPLE_INTERVAL, stale_after: float = HEALTH_STALE_AFTER,
+                 disk_path: str = HEALTH_DISK_PATH):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.disk_path = disk_path
+        self._snapshot = None
+        self._sampled_at = None
+        self._task = None
+        self.samples = 0
+        self.last_sample_ms = None
+        self.last_error = None
+
+    def sample(self) -> dict:
+        """Take one snapshot (blocking; run it off the event loop)"""
+        # The first call has no previous reading to compare against
+        cpu_percent = psutil.cpu_percent(interval=0.1 if self._snapshot is None else None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        start = time.perf_counter()
+        try:
+            pool = get_pool().health_check()
+            status = pool["status"]
+        except Exception as e:
+            pool = {}
+            status = f"error: {str(e)}"
+        ping_ms = round((time.perf_counter() - start) * 1000, 2)
+        try:
+            read_replica = get_replica().stats()
+        except Exception as e:
+            read_replica = {"status": f"error: {str(e)}"}
+
+        return {
+            "database": {
+                "status": status,
+                "ping_ms": ping_ms,
+                "pool": pool,
+                "read_replica": read_replica,
+            },
+            "system": {
+                "cpu_percent": cpu_percent,
+                "memory": {
+                    "total": memory.total,
+                    "available": memory.available,
+                    "percent": memory.percent
+                },
+                "disk": {
+                    "total": disk.total,
+                    "free": disk.free,
+                    "percent": (disk.used / disk.total) * 100
+                }
+            }
+        }
+
+    async def refresh(self):
+        """Take a snapshot on the database executor and publish it"""
+        start = time.perf_counter()
+        try:
+            snapshot = await run_db(self.sample)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Health sample failed: {e}")
+            return
+        self._snapshot = snapshot
+        self._sampled_at = time.time()
+        self.samples += 1
+        self.last_sample_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.last_error = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def start(self):
+        """Take the first snapshot and start sampling in the background"""
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> tuple:
+        """
+        Return the latest snapshot without blocking.
+        Returns:
+            (snapshot or None, sampler status dict with the snapshot's age and staleness)
+        """
+        age = time.time() - self._sampled_at if self._sampled_at is not None else None
+        status = {
+            "interval_s": self.interval,
+            "stale_after_s": self.stale_after,
+            "sampled_at": datetime.fromtimestamp(self._sampled_at, timezone.utc).isoformat()
+            if self._sampled_at is not None else None,
+            "age_s": round(age, 2) if age is not None else None,
+            "stale": age is None or age > self.stale_after,
+            "samples": self.samples,
+            "last_sample_ms": self.last_sample_ms,
+            "last_error": self.last_error,
+        }
+        return self._snapshot, status
+
+
+health_sampler = HealthSampler()
@@ -0,0 +1,188 @@
+"""
+Materialized per-group balance ledger.
+
+group_balances holds, for every (group, user), the running total the user has
+paid and the running total of their shares. persist_expense_and_shares
+updates it in the same transaction as the expense rows, so a balance lookup
+is one indexed read instead of an aggregate over the group's whole history.
+
+Rebuild or verify the ledger from the expense tables with:
+    python -m chat_component.tools.ledger rebuild [--group-id N]
+    python -m chat_component.tools.ledger verify
+"""
+import argparse
+import json
+import threading
+from typing import Dict, List
+
+from chat_component.tools.connection_pool import get_pool
+from chat_component.tools.statements import get_statement
+from chat_component.tools.money import to_cents, from_cents
+from chat_component.tools.query_cache import query_cache
+
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS group_balances (
+        group_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        paid REAL NOT NULL DEFAULT 0,
+        owes REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (group_id, user_id)
+    ) WITHOUT ROWID
+"""
+
+# Totals recomputed from scratch. Paid and owed amounts are aggregated
+# separately (UNION ALL) so a payer with several shares is never double counted.
+RECOMPUTE_QUERY = """
+    SELECT group_id, user_id, SUM(paid), SUM(owes)
+    FROM (
+        SELECT group_id, payer_id AS user_id, amount AS paid, 0 AS owes
+        FROM expenses
+        UNION ALL
+        SELECT e.group_id, es.user_id, 0, es.share_amount
+        FROM expense_shares es
+        JOIN expenses e ON e.expense_id = es.expense_id
+    )
+    {where}
+    GROUP BY group_id, user_id
+"""
+
+TOLERANCE = 0.005
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def ensure_ledger():
+    """Create the ledger table on first use, back-filling it from history"""
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        with get_pool().transaction("IMMEDIATE") as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'group_balances'"
+            ).fetchone()
+            if not exists:
+                conn.execute(LEDGER_SCHEMA)
+                _rebuild(conn)
+                print("Created group_balances ledger from expense history")
+        _ready = True
+
+
+def _rebuild(conn, group_id: int = None) -> int:
+    if group_id is None:
+        conn.execute("DELETE FROM group_balances")
+        rows = conn.execute(RECOMPUTE_QUERY.format(where="")).fetchall()
+    else:
+        conn.execute("DELETE FROM group_balances WHERE group_id = ?", (group_id,))
+        rows = conn.execute(RECOMPUTE_QUERY.format(where="WHERE group_id = ?"), (group_id,)).fetchall()
+    conn.executemany(
+        "INSERT INTO group_balances (group_id, user_id, paid, owes) VALUES (?, ?, ?, ?)", rows
+    )
+    return len(rows)
+
+
+def rebuild_ledger(group_id: int = None) -> int:
+    """
+    Recompute the ledger from expenses and expense_shares.
+    Args:
+        group_id: Only rebuild this group (default: every group)
+    Returns:
+        Number of ledger rows written
+    """
+    ensure_ledger()
+    with get_pool().transaction("IMMEDIATE") as conn:
+        rows = _rebuild(conn, group_id)
+    query_cache.invalidate_tables(['group_balances'])
+    return rows
+
+
+def verify_ledger() -> List[Dict]:
+    """
+    Compare the ledger with totals recomputed from the expense tables.
+    Returns:
+        One entry per (group_id, user_id) whose totals disagree
+    """
+    ensure_ledger()
+    with get_pool().connection() as conn:
+        expected = {
+            (row[0], row[1]): (row[2], row[3])
+            for row in conn.execute(RECOMPUTE_QUERY.format(where=""))
+        }
+        actual = {
+            (row[0], row[1]): (row[2], row[3])
+            for row in conn.execute("SELECT group_id, user_id, paid, owes FROM group_balances")
+        }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        exp_paid, exp_owes = expected.get(key, (0, 0))
+        act_paid, act_owes = actual.get(key, (0, 0))
+        if abs(exp_paid - act_paid) > TOLERANCE or abs(exp_owes - act_owes) > TOLERANCE:
+            mismatches.append({
+                'group_id': key[0],
+                'user_id': key[1],
+                'expected': {'paid': exp_paid, 'owes': exp_owes},
+                'actual': {'paid': act_paid, 'owes': act_owes}
+            })
+    return mismatches
+
+
+def apply_expense(conn, group_id: int, payer_id: int, total_amount: float, shares: Dict[int, float]):
+    """
+    Add one expense to the ledger using the caller's open transaction.
+    Args:
+        conn: Connection with an open transaction (see ConnectionPool.transaction)
+        group_id: Group the expense belongs to
+        payer_id: User who paid
+        total_amount: Amount paid
+        shares: Mapping of user_id to share amount
+    """
+    apply_expenses(conn, group_id, [(payer_id, total_amount, shares)])
+
+
+def apply_expenses(conn, group_id: int, expenses: List[tuple]):
+    """
+    Add a batch of expenses to the ledger with one upsert per member.
+    Args:
+        conn: Connection with an open transaction
+        group_id: Group the expenses belong to
+        expenses: List of (payer_id, total_amount, {user_id: share_amount})
+    """
+    # Net the batch per member in cents first, so a month of bills costs
+    # one upsert per member rather than one per share
+    paid_cents = {}
+    owes_cents = {}
+    for payer_id, total_amount, shares in expenses:
+        paid_cents[payer_id] = paid_cents.get(payer_id, 0) + to_cents(total_amount)
+        for user_id, share_amount in shares.items():
+            owes_cents[user_id] = owes_cents.get(user_id, 0) + to_cents(share_amount)
+
+    deltas = [
+        (group_id, user_id, from_cents(paid_cents.get(user_id, 0)), from_cents(owes_cents.get(user_id, 0)))
+        for user_id in sorted(set(paid_cents) | set(owes_cents))
+    ]
+    conn.executemany(get_statement("ledger_apply"), deltas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the group_balances ledger")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--group-id", type=int, default=None, help="Rebuild a single group")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rows = rebuild_ledger(args.group_id)
+        print(f"Rebuilt group_balances: {rows} rows written")
+    else:
+        mismatches = verify_ledger()
+        if mismatches:
+            print(json.dumps(mismatches, indent=2))
+            raise SystemExit(f"group_balances has {len(mismatches)} mismatched rows")
+        print("group_balances matches expense history")
+
+
+if __name__ == "__main__":
+    main()
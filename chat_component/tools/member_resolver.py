@@ -0,0 +1,123 @@
+"""
+Bulk member and user-name resolution for the split tools.
+
+The split tools used to run an exact-name query, then a LIKE query, per
+member name and another name lookup per user id. These helpers fetch the
+group roster (or a batch of user names) in one round trip and do the fuzzy
+name matching in memory. Group lookups and rosters are served from the
+roster cache.
+"""
+import json
+from typing import Dict, Iterable, List
+
+from chat_component.tools.sql_execution import execute_statement
+from chat_component.tools.roster_cache import roster_cache
+
+
+class MemberNotFoundError(ValueError):
+    """Raised when a member name does not match anyone in the group"""
+
+    def __init__(self, user_name: str):
+        super().__init__(f"User '{user_name}' not found in the group")
+        self.user_name = user_name
+
+
+class GroupLookupError(LookupError):
+    """Raised when the user does not exist or is not in the named group"""
+
+
+def get_user_group(user_id: int, group_name: str) -> Dict:
+    """
+    Find the group a user refers to by name (case-insensitive).
+    Args:
+        user_id: ID of the requesting user
+        group_name: Name of the group
+    Returns:
+        Dict with group_id, name, description, created_at and user_name
+    Raises:
+        GroupLookupError: if the user is unknown or not a member of the group
+    """
+    errors = []
+
+    def load():
+        user_result = execute_statement("user_by_id", (user_id,))
+        if not user_result:
+            errors.append(f"User with ID {user_id} not found")
+            return None, None
+
+        group_result = execute_statement("group_by_name_for_user", (group_name, user_id))
+        if not group_result:
+            errors.append(f"Group '{group_name}' not found or user {user_id} is not a member")
+            return None, None
+
+        row = group_result[0]
+        return row[0], {
+            'group_id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'created_at': row[3],
+            'user_name': user_result[0][1]
+        }
+
+    group = roster_cache.get_or_load(("lookup", user_id, group_name.lower()), load)
+    if group is None:
+        raise GroupLookupError(errors[0])
+    return group
+
+
+def get_group_roster(group_id: int) -> List[Dict]:
+    """Fetch every member of a group with a single (cached) query"""
+    def load():
+        rows = execute_statement("group_members", (group_id,))
+        return group_id, [{'user_id': row[0], 'name': row[1], 'email': row[2]} for row in rows]
+
+    return roster_cache.get_or_load(("roster", group_id), load)
+
+
+def match_member(user_name: str, members: List[Dict]) -> int:
+    """
+    Match one name against a roster, mirroring the old SQL lookups:
+    exact name first, then a case-insensitive substring match.
+    Returns the user_id of the first matching member.
+    """
+    for member in members:
+        if member['name'] == user_name:
+            return member['user_id']
+
+    needle = user_name.lower()
+    for member in members:
+        if needle in member['name'].lower():
+            return member['user_id']
+
+    raise MemberNotFoundError(user_name)
+
+
+def resolve_member_names(user_names: Iterable[str], members: List[Dict]) -> Dict[str, int]:
+    """
+    Resolve many member names against an already fetched roster.
+    Args:
+        user_names: Names (full or partial) as written by the user
+        members: Group roster from get_group_roster
+    Returns:
+        Dict mapping each input name to its user_id
+    Raises:
+        MemberNotFoundError: if any name matches no member
+    """
+    resolved = {}
+    for user_name in user_names:
+        if user_name not in resolved:
+            resolved[user_name] = match_member(user_name, members)
+    return resolved
+
+
+def get_user_names(user_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Look up names for a batch of user ids in one query.
+    Unknown ids fall back to "User <id>".
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    rows = execute_statement("user_names_by_ids", (json.dumps(user_ids),))
+    names = {row[0]: row[1] for row in rows}
+    return {user_id: names.get(user_id, f"User {user_id}") for user_id in user_ids}
@@ -0,0 +1,73 @@
+"""
+Integer-cent money arithmetic shared by every split mode.
+
+Amounts enter as floats/strings from the LLM, are converted once to integer
+cents with Decimal half-up rounding, and every allocation is done with the
+largest-remainder method so the shares always add up to the total exactly.
+Leftover cents go to the largest fractional remainders, ties broken by
+position, so the same inputs always produce the same penny distribution.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Sequence
+
+# Decimal places kept when turning weights such as percentages into integers
+WEIGHT_PLACES = 4
+
+
+def to_cents(amount) -> int:
+    """Convert a currency amount to integer cents, rounding half up"""
+    if isinstance(amount, int):
+        return amount * 100
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """Convert integer cents back to a float amount for JSON output"""
+    return cents / 100
+
+
+def to_weight(value, places: int = WEIGHT_PLACES) -> int:
+    """Scale a decimal weight (e.g. a percentage) to an exact integer"""
+    scale = Decimal(10) ** places
+    return int((Decimal(str(value)) * scale).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def allocate(total_cents: int, weights: Sequence[int]) -> List[int]:
+    """
+    Split total_cents proportionally to integer weights (largest remainder).
+    Args:
+        total_cents: Amount to split, in cents
+        weights: Non-negative integer weights, at least one positive
+    Returns:
+        List of cents, one per weight, summing exactly to total_cents
+    """
+    weight_total = sum(weights)
+    if weight_total <= 0 or any(weight < 0 for weight in weights):
+        raise ValueError("Allocation weights must be non-negative and not all zero")
+
+    sign = -1 if total_cents < 0 else 1
+    total = abs(total_cents)
+
+    shares = []
+    remainders = []
+    for index, weight in enumerate(weights):
+        share, remainder = divmod(total * weight, weight_total)
+        shares.append(share)
+        remainders.append((-remainder, index))
+
+    leftover = total - sum(shares)
+    if leftover:
+        remainders.sort()
+        for _, index in remainders[:leftover]:
+            shares[index] += 1
+
+    if sign < 0:
+        return [-share for share in shares]
+    return shares
+
+
+def percentage_of(part_cents: int, total_cents: int) -> float:
+    """Share of the total as a percentage rounded to 2 places"""
+    if not total_cents:
+        return 0
+    return round(part_cents * 100 / total_cents, 2)
@@ -0,0 +1,284 @@
+"""
+Parallel plan execution for SmartPlannerAgent.
+
+SmartPlannerAgent used to work through its plan one AgentTool call per model
+turn, even when steps such as "get my grocery spend" and "search for saving
+tips" do not depend on each other. execute_plan takes the whole plan as a
+dependency DAG. Each step starts as soon as the steps it depends on have
+finished, at most PLANNER_MAX_PARALLEL sub-agents run at a time, and the
+results come back to the planner in one tool response.
+
+Each step goes through the same guards as a direct tool call:
+enforce_tool_budget charges it to the turn (a refused step fails and its
+dependents are skipped) and record_tool_result feeds its result to the
+circuit breaker. Steps run at the same time, so each gets its own
+ToolContext; their state and artifact changes are merged into the planner's
+in plan order once the plan is done.
+
+Every plan records per-step start/finish times, so the wall-clock saved
+(sum of step durations minus plan wall time) shows up in plan_stats and on
+/health.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from google.adk.tools import agent_tool
+from google.adk.tools.tool_context import ToolContext
+
+from chat_component.tools.turn_budget import enforce_tool_budget, raised_result, record_tool_result
+
+PLANNER_MAX_PARALLEL = int(os.getenv("PLANNER_MAX_PARALLEL", "3"))
+PLANNER_MAX_STEPS = int(os.getenv("PLANNER_MAX_STEPS", "8"))
+# How much of an earlier step's result is handed to the steps depending on it
+PLANNER_CONTEXT_CHARS = int(os.getenv("PLANNER_CONTEXT_CHARS", "4000"))
+PLANNER_RECENT_PLANS = int(os.getenv("PLANNER_RECENT_PLANS", "20"))
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([\w-]+)\s*\}\}")
+
+
+class PlanError(ValueError):
+    """Raised when a plan is malformed, names an unknown agent or has a cycle"""
+
+
+def parse_plan(steps_data: str, agent_names) -> list:
+    """
+    Validate a plan and return its steps in dependency order.
+    Args:
+        steps_data: JSON list of {"id", "agent", "request", "depends_on"}
+        agent_names: Agents a step may use
+    Returns:
+        list of step dicts, each after all of its dependencies
+    Raises:
+        PlanError: describing the first problem found
+    """
+    try:
+        steps = json.loads(steps_data) if isinstance(steps_data, str) else steps_data
+    except json.JSONDecodeError as e:
+        raise PlanError(f"steps is not valid JSON: {e}")
+    if not isinstance(steps, list) or not steps:
+        raise PlanError("steps must be a non-empty JSON list")
+    if len(steps) > PLANNER_MAX_STEPS:
+        raise PlanError(f"A plan may have at most {PLANNER_MAX_STEPS} steps, got {len(steps)}")
+
+    by_id = {}
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict) or not step.get("request"):
+            raise PlanError(f"Step {index} needs at least an agent and a request")
+        step_id = str(step.get("id") or f"step{index + 1}")
+        if step_id in by_id:
+            raise PlanError(f"Duplicate step id '{step_id}'")
+        if step.get("agent") not in agent_names:
+            raise PlanError(f"Step '{step_id}' uses unknown agent '{step.get('agent')}', "
+                            f"expected one of {sorted(agent_names)}")
+        depends_on = step.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        # References in the request are dependencies too
+        depends_on = list(dict.fromkeys([str(dep) for dep in depends_on] + _PLACEHOLDER.findall(step["request"])))
+        by_id[step_id] = {"id": step_id, "agent": step["agent"], "request": step["request"],
+                          "depends_on": depends_on}
+
+    for step in by_id.values():
+        for dep in step["depends_on"]:
+            if dep not in by_id:
+                raise PlanError(f"Step '{step['id']}' depends on unknown step '{dep}'")
+
+    # Kahn's algorithm: order the steps, and any left over are on a cycle
+    pending = {step_id: len(step["depends_on"]) for step_id, step in by_id.items()}
+    dependents = {step_id: [] for step_id in by_id}
+    for step in by_id.values():
+        for dep in step["depends_on"]:
+            dependents[dep].append(step["id"])
+    ready = deque(step_id for step_id, count in pending.items() if count == 0)
+    ordered = []
+    while ready:
+        step_id = ready.popleft()
+        ordered.append(by_id[step_id])
+        for dependent in dependents[step_id]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+    if len(ordered) != len(by_id):
+        cycle = sorted(step_id for step_id, count in pending.items() if count > 0)
+        raise PlanError(f"Steps {cycle} depend on each other in a cycle")
+    return ordered
+
+
+def _request_with_context(step: dict, results: dict) -> str:
+    """Fill {{id}} references and append results of other dependencies"""
+    def excerpt(step_id: str) -> str:
+        return str(results[step_id]["result"])[:PLANNER_CONTEXT_CHARS]
+
+    referenced = set(_PLACEHOLDER.findall(step["request"]))
+    request = _PLACEHOLDER.sub(lambda match: excerpt(match.group(1)), step["request"])
+    unreferenced = [dep for dep in step["depends_on"] if dep not in referenced]
+    if unreferenced:
+        request += "\n\nResults of earlier steps:\n" + "\n".join(
+            f"[{dep}] {excerpt(dep)}" for dep in unreferenced
+        )
+    return request
+
+
+class PlanStats:
+    """Totals and the most recent plans, for /health"""
+
+    def __init__(self, recent: int = PLANNER_RECENT_PLANS):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        self.plans = 0
+        self.steps = 0
+        self.failed_steps = 0
+        self.wall_ms = 0.0
+        self.sequential_ms = 0.0
+
+    def record(self, summary: dict):
+        with self._lock:
+            self.plans += 1
+            self.steps += len(summary["steps"])
+            self.failed_steps += sum(1 for step in summary["steps"] if step["status"] != "ok")
+            self.wall_ms += summary["wall_ms"]
+            self.sequential_ms += summary["sequential_ms"]
+            self._recent.append(summary)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "plans": self.plans,
+                "steps": self.steps,
+                "failed_steps": self.failed_steps,
+                "max_parallel": PLANNER_MAX_PARALLEL,
+                "wall_ms": round(self.wall_ms, 1),
+                "sequential_ms": round(self.sequential_ms, 1),
+                "saved_ms": round(self.sequential_ms - self.wall_ms, 1),
+                "recent": list(self._recent),
+            }
+
+
+plan_stats = PlanStats()
+
+
+async def run_plan(ordered: list, run_step, max_parallel: int = PLANNER_MAX_PARALLEL) -> tuple:
+    """
+    Run ordered steps, each once its dependencies are done, at most max_parallel at a time.
+    Args:
+        ordered: Steps from parse_plan
+        run_step: async callable(agent_name, request, step_id) -> result
+        max_parallel: Concurrency bound
+    Returns:
+        (results by step id, timing summary)
+    """
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    done = {step["id"]: asyncio.Event() for step in ordered}
+    results = {}
+    start = time.perf_counter()
+
+    def ms(moment: float) -> float:
+        return round((moment - start) * 1000, 1)
+
+    async def execute(step: dict):
+        try:
+            for dep in step["depends_on"]:
+                await done[dep].wait()
+            failed = [dep for dep in step["depends_on"] if results[dep]["status"] != "ok"]
+            if failed:
+                results[step["id"]] = {"status": "skipped", "result": f"Skipped: step(s) {failed} failed"}
+                return
+            ready = time.perf_counter()
+            async with semaphore:
+                began = time.perf_counter()
+                try:
+                    result = await run_step(step["agent"], _request_with_context(step, results), step["id"])
+                    status = "ok"
+                except Exception as e:
+                    result, status = f"Error: {e}", "error"
+                finished = time.perf_counter()
+            results[step["id"]] = {
+                "status": status, "result": result,
+                "started_ms": ms(began), "finished_ms": ms(finished),
+                "duration_ms": round((finished - began) * 1000, 1),
+                "queued_ms": round((began - ready) * 1000, 1),
+            }
+        finally:
+            done[step["id"]].set()
+
+    await asyncio.gather(*(execute(step) for step in ordered))
+    wall_ms = (time.perf_counter() - start) * 1000
+    sequential_ms = sum(result.get("duration_ms", 0.0) for result in results.values())
+    summary = {
+        "wall_ms": round(wall_ms, 1),
+        "sequential_ms": round(sequential_ms, 1),
+        "saved_ms": round(sequential_ms - wall_ms, 1),
+        "steps": [
+            {"id": step["id"], "agent": step["agent"], "depends_on": step["depends_on"],
+             **{key: value for key, value in results[step["id"]].items() if key != "result"}}
+            for step in ordered
+        ],
+    }
+    return results, summary
+
+
+def make_execute_plan_tool(agents: list):
+    """
+    Build the execute_plan tool for a planner over the given sub-agents.
+    Args:
+        agents: Agents a plan step may call, addressed by their name
+    Returns:
+        async tool function for the planner's tools list
+    """
+    tools = {agent.name: agent_tool.AgentTool(agent=agent) for agent in agents}
+
+    async def execute_plan(steps: str, tool_context: ToolContext) -> str:
+        """
+        Run a multi-step plan, executing steps that do not depend on each other at the same time.
+        Args:
+            steps: JSON list of steps, each {"id": short name, "agent": sub-agent name,
+                "request": what to ask it, "depends_on": ids of steps whose results it needs}.
+                Write {{id}} in a request to insert that step's result, e.g.
+                '[{"id": "spend", "agent": "InformationAgent", "request": "Monthly spend by category for 2025", "depends_on": []},
+                  {"id": "tips", "agent": "Google_Search_Agent", "request": "Grocery saving tips", "depends_on": []},
+                  {"id": "plan", "agent": "AnalysisAgent", "request": "Budget plan from {{spend}} using {{tips}}", "depends_on": ["spend", "tips"]}]'
+        Returns:
+            JSON string with each step's status and result, plus per-step timings
+        """
+        try:
+            ordered = parse_plan(steps, tools.keys())
+        except PlanError as e:
+            return json.dumps({"error": str(e)})
+
+        contexts = {}
+
+        async def run_step(agent_name: str, request: str, step_id: str):
+            tool, args = tools[agent_name], {"request": request}
+            step_context = contexts[step_id] = ToolContext(
+                tool_context._invocation_context, function_call_id=tool_context.function_call_id
+            )
+            refused = await enforce_tool_budget(tool, args, step_context)
+            if refused is not None:
+                raise RuntimeError(refused["error"])
+            try:
+                result = await tool.run_async(args=args, tool_context=step_context)
+            except Exception as e:
+                await record_tool_result(tool, args, step_context, raised_result(tool.name, e))
+                raise
+            await record_tool_result(tool, args, step_context, result)
+            return result
+
+        results, summary = await run_plan(ordered, run_step)
+        for step in ordered:
+            step_context = contexts.get(step["id"])
+            if step_context is not None:
+                tool_context.state.update(step_context.actions.state_delta)
+                tool_context.actions.artifact_delta.update(step_context.actions.artifact_delta)
+        plan_stats.record(summary)
+        return json.dumps({
+            "results": {step_id: {"status": result["status"], "result": result["result"]}
+                        for step_id, result in results.items()},
+            "timings": summary,
+        }, default=str)
+
+    return execute_plan
@@ -0,0 +1,167 @@
+"""
+Agent instructions assembled from prompts.yaml.
+
+prompts.yaml holds the instructions under prompts: and the text several of
+them share under fragments:. A prompt includes a fragment with <<name>>
+(double braces would collide with ADK's {state} templating). <<schema_digest>>
+is the generated schema digest, see schema_digest. Prompts are read and
+assembled once per process.
+
+Every model call re-sends the calling agent's instruction plus the
+declarations of its tools, so the report below is the per-call prompt cost
+of each agent:
+
+    python -m chat_component.tools.prompt_builder [--max-tokens N] [--json]
+
+With --max-tokens it exits 1 when any agent is over N tokens, which catches
+prompt-cost regressions before they ship.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+
+import yaml
+
+PROMPTS_PATH = os.getenv(
+    "PROMPTS_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'prompts.yaml'))
+)
+
+_FRAGMENT = re.compile(r"<<(\w+)>>")
+_MAX_DEPTH = 5
+
+
+class PromptError(KeyError):
+    """Raised for an unknown prompt or fragment"""
+
+
+def _expand(text: str, fragments: dict, depth: int = 0) -> str:
+    def replace(match):
+        name = match.group(1)
+        if name == "schema_digest":
+            from chat_component.tools.schema_digest import load_digest
+            return load_digest()["digest"]
+        if name not in fragments:
+            raise PromptError(f"Unknown prompt fragment '{name}'")
+        if depth >= _MAX_DEPTH:
+            raise PromptError(f"Prompt fragment '{name}' nests too deeply")
+        return _expand(fragments[name].rstrip("\n"), fragments, depth + 1)
+
+    return _FRAGMENT.sub(replace, text)
+
+
+@lru_cache(maxsize=None)
+def load_prompts(path: str = PROMPTS_PATH) -> dict:
+    """
+    Read prompts.yaml and expand every fragment reference.
+    Args:
+        path: prompts file
+    Returns:
+        dict of prompt name -> instruction text
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = yaml.safe_load(f)
+    fragments = raw.get("fragments") or {}
+    return {name: _expand(text, fragments) for name, text in raw["prompts"].items()}
+
+
+def get_prompt(name: str) -> str:
+    """The assembled instruction for name"""
+    prompts = load_prompts()
+    if name not in prompts:
+        raise PromptError(f"Unknown prompt '{name}'")
+    return prompts[name]
+
+
+def estimate_tokens(text: str) -> int:
+    """About four characters per token, close enough to track size over time"""
+    return (len(text) + 3) // 4
+
+
+def _local_counter(model: str):
+    """Count with the Gemini tokenizer when google-genai's local tokenizer is installed"""
+    try:
+        from google.genai.local_tokenizer import LocalTokenizer
+        tokenizer = LocalTokenizer(model_name=model)
+    except Exception as e:
+        print(f"Warning: local tokenizer unavailable ({e}), estimating instead")
+        return estimate_tokens
+    return lambda text: tokenizer.count_tokens(text).total_tokens if text else 0
+
+
+async def _collect_agents(root) -> list:
+    """root and every agent reachable from it through AgentTool or sub_agents"""
+    from google.adk.tools.agent_tool import AgentTool
+
+    seen, ordered, queue = set(), [], [root]
+    while queue:
+        agent = queue.pop(0)
+        if agent.name in seen:
+            continue
+        seen.add(agent.name)
+        tools = await agent.canonical_tools() if hasattr(agent, "canonical_tools") else []
+        ordered.append((agent, tools))
+        queue.extend(tool.agent for tool in tools if isinstance(tool, AgentTool))
+        queue.extend(agent.sub_agents)
+    return ordered
+
+
+def prompt_report(root, count=estimate_tokens) -> list:
+    """
+    Per-call prompt size of every agent in the tree under root.
+    Args:
+        root: Root agent
+        count: Token counter for a string
+    Returns:
+        list of dicts with instruction and tool declaration tokens per agent
+    """
+    report = []
+    for agent, tools in asyncio.run(_collect_agents(root)):
+        instruction = agent.instruction if isinstance(agent.instruction, str) else ""
+        declarations = [tool._get_declaration() for tool in tools]
+        tool_text = "".join(
+            declaration.model_dump_json(exclude_none=True) for declaration in declarations if declaration
+        )
+        instruction_tokens, tool_tokens = count(instruction), count(tool_text)
+        report.append({
+            "agent": agent.name,
+            "instruction_tokens": instruction_tokens,
+            "tools": len(tools),
+            "tool_tokens": tool_tokens,
+            "total_tokens": instruction_tokens + tool_tokens,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-agent prompt token report")
+    parser.add_argument("--max-tokens", type=int, default=0, help="exit 1 when an agent exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--tokenizer", choices=("estimate", "local"), default="estimate")
+    args = parser.parse_args()
+
+    from chat_component.agent import root_agent
+
+    count = _local_counter(root_agent.model) if args.tokenizer == "local" else estimate_tokens
+    report = prompt_report(root_agent, count)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'agent':26s} {'instruction':>11s} {'tools':>5s} {'tool decl':>9s} {'total':>7s}")
+        for row in report:
+            print(f"{row['agent']:26s} {row['instruction_tokens']:11d} {row['tools']:5d} "
+                  f"{row['tool_tokens']:9d} {row['total_tokens']:7d}")
+        print(f"{'all agents':26s} {sum(row['total_tokens'] for row in report):37d}")
+
+    over = [row["agent"] for row in report if args.max_tokens and row["total_tokens"] > args.max_tokens]
+    if over:
+        print(f"Over the {args.max_tokens} token budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
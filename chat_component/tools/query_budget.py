@@ -0,0 +1,117 @@
+"""
+Execution budget for agent-written SQL.
+
+A bad LLM query (an accidental cross join, a correlated subquery over every
+expense) can keep a worker thread busy indefinitely. While such a query runs,
+a SQLite progress handler checks it every QUERY_PROGRESS_INTERVAL virtual
+machine instructions. The query is cancelled once it passes its wall-clock
+budget (QUERY_TIMEOUT_MS) or its instruction budget (QUERY_MAX_INSTRUCTIONS).
+The agent gets a structured "query too expensive" error it can react to.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+QUERY_TIMEOUT_MS = float(os.getenv("QUERY_TIMEOUT_MS", "2000"))
+QUERY_MAX_INSTRUCTIONS = int(os.getenv("QUERY_MAX_INSTRUCTIONS", "200000000"))
+QUERY_PROGRESS_INTERVAL = int(os.getenv("QUERY_PROGRESS_INTERVAL", "10000"))
+
+
+class QueryTooExpensiveError(Exception):
+    """Raised when a query is cancelled for exceeding its execution budget"""
+
+    def __init__(self, reason: str, limit, elapsed_ms: float, instructions: int):
+        self.reason = reason
+        self.limit = limit
+        self.elapsed_ms = elapsed_ms
+        self.instructions = instructions
+        super().__init__(f"Query too expensive: exceeded {reason} limit of {limit}")
+
+    def to_dict(self) -> dict:
+        return {
+            "error": "query too expensive",
+            "reason": self.reason,
+            "limit": self.limit,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "instructions": self.instructions,
+            "hint": "Narrow the query with WHERE filters on indexed columns, aggregate instead of "
+                    "listing rows, avoid joins without ON conditions, or add a LIMIT"
+        }
+
+
+class _BudgetCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.cancelled_timeout = 0
+        self.cancelled_instructions = 0
+
+    def record(self, reason: str = None):
+        with self._lock:
+            self.queries += 1
+            if reason == 'timeout_ms':
+                self.cancelled_timeout += 1
+            elif reason == 'instructions':
+                self.cancelled_instructions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "cancelled": self.cancelled_timeout + self.cancelled_instructions,
+                "cancelled_timeout": self.cancelled_timeout,
+                "cancelled_instructions": self.cancelled_instructions,
+                "timeout_ms": QUERY_TIMEOUT_MS,
+                "max_instructions": QUERY_MAX_INSTRUCTIONS
+            }
+
+
+budget_counters = _BudgetCounters()
+
+
+@contextmanager
+def query_budget(conn, timeout_ms: float = QUERY_TIMEOUT_MS,
+                 max_instructions: int = QUERY_MAX_INSTRUCTIONS,
+                 interval: int = QUERY_PROGRESS_INTERVAL):
+    """
+    Cancel statements run on conn inside the block once they exceed the budget.
+    Args:
+        conn: Connection the statements run on
+        timeout_ms: Wall-clock budget for the whole block (0 disables)
+        max_instructions: SQLite VM instruction budget (0 disables)
+        interval: Instructions between budget checks
+    Raises:
+        QueryTooExpensiveError: a statement was cancelled
+    """
+    start = time.perf_counter()
+    deadline = start + timeout_ms / 1000 if timeout_ms else None
+    state = {'steps': 0, 'reason': None}
+
+    def check():
+        state['steps'] += interval
+        if deadline is not None and time.perf_counter() > deadline:
+            state['reason'] = 'timeout_ms'
+        elif max_instructions and state['steps'] > max_instructions:
+            state['reason'] = 'instructions'
+        # A non-zero return makes SQLite abort with "interrupted"
+        return 1 if state['reason'] else 0
+
+    conn.set_progress_handler(check, interval)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if state['reason'] is None:
+            budget_counters.record()
+            raise
+        budget_counters.record(state['reason'])
+        limit = timeout_ms if state['reason'] == 'timeout_ms' else max_instructions
+        raise QueryTooExpensiveError(
+            state['reason'], limit, (time.perf_counter() - start) * 1000, state['steps']
+        ) from e
+    else:
+        budget_counters.record()
+    finally:
+        # Pooled connections are shared; never leave the handler behind
+        conn.set_progress_handler(None, interval)
@@ -0,0 +1,104 @@
+"""
+Result cache for InformationAgent queries.
+
+The agent regenerates the same aggregate queries (monthly spend, top
+categories, ...) for every question. Result pages of execute_query_fetch are
+kept in a TTL + LRU cache keyed by the scoped SQL, its parameters and the page
+offset; the scoped SQL already carries the user scope. Each entry is tagged
+with the tables it read, and writes through persist_expense_and_shares drop
+every entry that touched a written table.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "60"))
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU cache of serialized result pages tagged by table name"""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tables, page)
+        self._generations = {}  # table -> write count, guards against stale fills
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes_served = 0
+
+    def get_or_load(self, key: tuple, tables: Iterable[str], loader):
+        """
+        Return the cached page for key, calling loader() on a miss.
+        tables are the tables the query reads; loader errors are not cached.
+        """
+        tables = frozenset(tables)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_served += len(entry[2])
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            generations = self._snapshot(tables)
+
+        page = loader()
+
+        with self._lock:
+            # A write that landed while the query ran may not be in page
+            if self._snapshot(tables) != generations:
+                return page
+            self._entries[key] = (time.monotonic() + self.ttl, tables, page)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return page
+
+    def _snapshot(self, tables: frozenset) -> tuple:
+        return tuple(self._generations.get(table, 0) for table in sorted(tables))
+
+    def invalidate_tables(self, tables: Iterable[str]):
+        """Drop every entry that read any of tables"""
+        tables = {table.lower() for table in tables}
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters; every hit is a database scan saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "scans_saved": self.hits,
+                "bytes_served": self.bytes_served,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+query_cache = QueryCache()
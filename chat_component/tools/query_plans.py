@@ -0,0 +1,382 @@
+"""
+Query plan instrumentation and index advisor for agent SQL.
+
+Every query run by the SQL tools is timed. The EXPLAIN QUERY PLAN of each
+distinct statement is computed once and kept; statements that are slow
+(SLOW_QUERY_MS) or fully scan a table are aggregated per statement with
+their call count, total and worst latency. With QUERY_PLAN_LOG set, each
+such execution is also appended to a JSON-lines log.
+
+The advisor reads those statements, works out which columns of each scanned
+table are filtered on, ranged over or sorted by, and proposes an index per
+table. Covering columns are added when the query only needs a few more.
+Applying a proposal creates the index inside a transaction and keeps it only
+if the motivating queries actually plan through it.
+
+    python -m chat_component.tools.query_plans report --log plans.jsonl
+    python -m chat_component.tools.query_plans advise --log plans.jsonl [--apply]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from chat_component.tools.connection_pool import get_pool
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "50"))
+QUERY_PLAN_LOG = os.getenv("QUERY_PLAN_LOG", "")
+QUERY_PLAN_MAX_ENTRIES = int(os.getenv("QUERY_PLAN_MAX_ENTRIES", "256"))
+INDEX_ADVISOR_MAX_COLUMNS = int(os.getenv("INDEX_ADVISOR_MAX_COLUMNS", "4"))
+
+# "SCAN expenses", "SCAN expenses AS e", "SCAN expenses USING INDEX idx"
+_SCAN_PATTERN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+_EQUALITY = (exp.EQ, exp.In, exp.Is)
+_RANGE = (exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Between, exp.Like)
+
+
+def explain(conn, sql_query: str, params=()) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql_query}", params)]
+
+
+def full_scans(plan: Iterable[str], tables: Iterable[str]) -> List[str]:
+    """Tables a plan reads end to end; CTE and subquery scans are ignored"""
+    tables = set(tables)
+    scanned = []
+    for detail in plan:
+        match = _SCAN_PATTERN.match(detail)
+        if match and match.group(1) in tables and match.group(1) not in scanned:
+            scanned.append(match.group(1))
+    return scanned
+
+
+class QueryPlanRecorder:
+    """
+    Aggregates slow and full-scan statements with their plans.
+    Plans are cached per statement, so EXPLAIN runs once per query shape.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, max_entries: int = QUERY_PLAN_MAX_ENTRIES,
+                 log_path: str = QUERY_PLAN_LOG):
+        self.slow_ms = slow_ms
+        self.max_entries = max_entries
+        self.log_path = log_path
+        self._plans = OrderedDict()  # sql -> (plan, full_scans)
+        self._records = OrderedDict()  # sql -> aggregate dict
+        self._tables = None
+        self._lock = threading.Lock()
+        self.observed = 0
+
+    def _known_tables(self, conn) -> set:
+        if self._tables is None:
+            self._tables = {
+                row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+        return self._tables
+
+    def _plan_for(self, conn, sql_query: str, params) -> tuple:
+        with self._lock:
+            cached = self._plans.get(sql_query)
+            if cached is not None:
+                self._plans.move_to_end(sql_query)
+                return cached
+        plan = explain(conn, sql_query, params)
+        cached = (plan, full_scans(plan, self._known_tables(conn)))
+        with self._lock:
+            self._plans[sql_query] = cached
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return cached
+
+    def observe(self, conn, sql_query: str, params, elapsed_ms: float):
+        """Record one execution; only slow or full-scan statements are kept"""
+        with self._lock:
+            self.observed += 1
+        try:
+            plan, scanned = self._plan_for(conn, sql_query, params)
+        except Exception as e:
+            print(f"EXPLAIN QUERY PLAN failed: {e}")
+            return
+        if elapsed_ms < self.slow_ms and not scanned:
+            return
+
+        with self._lock:
+            record = self._records.get(sql_query)
+            if record is None:
+                record = self._records[sql_query] = {
+                    'sql': sql_query,
+                    'params': list(params),
+                    'plan': plan,
+                    'full_scans': scanned,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0
+                }
+            self._records.move_to_end(sql_query)
+            record['count'] += 1
+            record['total_ms'] += elapsed_ms
+            record['max_ms'] = max(record['max_ms'], elapsed_ms)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+        if self.log_path:
+            with open(self.log_path, 'a', encoding='utf-8') as log:
+                log.write(json.dumps({'sql': sql_query, 'params': list(params), 'ms': round(elapsed_ms, 3),
+                                      'plan': plan, 'full_scans': scanned}, default=str) + '\n')
+
+    def records(self) -> List[Dict]:
+        """Recorded statements, most expensive in total first"""
+        with self._lock:
+            records = [dict(record) for record in self._records.values()]
+        return sorted(records, key=lambda record: record['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self._records.clear()
+            self._tables = None
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                "observed": self.observed,
+                "recorded_statements": len(self._records),
+                "full_scan_statements": sum(1 for record in self._records.values() if record['full_scans']),
+                "slow_query_ms": self.slow_ms
+            }
+
+
+query_plan_recorder = QueryPlanRecorder()
+
+
+def load_log(log_path: str) -> List[Dict]:
+    """Aggregate a QUERY_PLAN_LOG file into records like QueryPlanRecorder.records()"""
+    records = {}
+    with open(log_path, encoding='utf-8') as log:
+        for line in log:
+            entry = json.loads(line)
+            record = records.setdefault(entry['sql'], {
+                'sql': entry['sql'], 'params': entry['params'], 'plan': entry['plan'],
+                'full_scans': entry['full_scans'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0
+            })
+            record['count'] += 1
+            record['total_ms'] += entry['ms']
+            record['max_ms'] = max(record['max_ms'], entry['ms'])
+    return sorted(records.values(), key=lambda record: record['total_ms'], reverse=True)
+
+
+def _base_table(source):
+    """
+    Resolve a scope source to a base table name. Derived tables of the form
+    (SELECT * FROM t WHERE ...), as produced by row_scope, resolve to t.
+    """
+    if isinstance(source, exp.Table):
+        return source.name.lower()
+    if isinstance(source, Scope):
+        select = source.expression
+        if (isinstance(select, exp.Select) and len(source.sources) == 1
+                and any(isinstance(projection, exp.Star) for projection in select.expressions)):
+            return _base_table(next(iter(source.sources.values())))
+    return None
+
+
+def _column_usage(sql_query: str, tables: set) -> Dict[str, Dict[str, list]]:
+    """Map table -> {'eq': [...], 'range': [...], 'order': [...], 'other': [...], 'star': bool}"""
+    usage = {}
+    for scope in traverse_scope(sqlglot.parse_one(sql_query, read="sqlite")):
+        aliases = {}
+        for alias, source in scope.sources.items():
+            table = _base_table(source)
+            if table in tables:
+                aliases[alias] = table
+        if not aliases:
+            continue
+        select = scope.expression
+
+        for column in scope.columns:
+            # Columns of nested subqueries belong to their own scope
+            if column.find_ancestor(exp.Select) is not select:
+                continue
+            table = aliases.get(column.table) if column.table else (
+                next(iter(aliases.values())) if len(scope.sources) == 1 and aliases else None
+            )
+            if table is None:
+                continue
+            entry = usage.setdefault(table, {'eq': [], 'range': [], 'order': [], 'other': [], 'star': False})
+            # A column wrapped in a function call cannot use a plain index
+            parent = column.parent
+            while isinstance(parent, exp.Paren):
+                parent = parent.parent
+            if isinstance(parent, _EQUALITY):
+                kind = 'eq'
+            elif isinstance(parent, _RANGE):
+                kind = 'range'
+            elif column.find_ancestor(exp.Order, exp.Group) is not None:
+                kind = 'order'
+            else:
+                kind = 'other'
+            if column.name not in entry[kind]:
+                entry[kind].append(column.name)
+
+        # The (SELECT * FROM t WHERE ...) wrappers from row_scope are resolved
+        # through _base_table, so only a star the caller wrote blocks covering
+        if (isinstance(select, exp.Select) and not scope.is_derived_table
+                and any(isinstance(projection, exp.Star) for projection in select.expressions)):
+            for table in aliases.values():
+                usage.setdefault(table, {'eq': [], 'range': [], 'order': [], 'other': [], 'star': False})['star'] = True
+    return usage
+
+
+def _existing_indexes(conn, table: str) -> List[List[str]]:
+    """Column lists of the table's indexes, including an INTEGER PRIMARY KEY"""
+    indexes = [
+        [row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')")]
+        for index in conn.execute(f"PRAGMA index_list('{table}')")
+    ]
+    for row in conn.execute(f"PRAGMA table_info('{table}')"):
+        if row[5] == 1 and row[2].upper() == 'INTEGER':
+            indexes.append([row[1]])
+    return indexes
+
+
+def advise(records: List[Dict], max_columns: int = INDEX_ADVISOR_MAX_COLUMNS) -> List[Dict]:
+    """
+    Propose one index per scanned table and query shape.
+    Args:
+        records: Output of QueryPlanRecorder.records() or load_log()
+        max_columns: Widest index to propose, covering columns included
+    Returns:
+        Proposals with table, columns, create statement and the queries they help,
+        most valuable first
+    """
+    candidates = {}  # (table, key columns) -> candidate
+    with get_pool().connection() as conn:
+        for record in records:
+            if not record['full_scans']:
+                continue
+            try:
+                usage = _column_usage(record['sql'], set(record['full_scans']))
+            except SqlglotError as e:
+                print(f"Index advisor skipped unparsable query: {e}")
+                continue
+            for table, columns in usage.items():
+                table_info = list(conn.execute(f"PRAGMA table_info('{table}')"))
+                # Every index already carries the rowid, and select-list aliases are not columns
+                rowid = {row[1] for row in table_info if row[5] == 1 and row[2].upper() == 'INTEGER'}
+                known = {row[1] for row in table_info}
+                eq, ranged, order, other = (
+                    [column for column in columns[kind] if column in known]
+                    for kind in ('eq', 'range', 'order', 'other')
+                )
+                existing_indexes = _existing_indexes(conn, table)
+                # An equality lookup that an existing index already serves is selective enough
+                if any(set(existing) <= set(eq) for existing in existing_indexes):
+                    continue
+                key_columns = sorted(eq)
+                for column in ranged + order:
+                    if column not in key_columns:
+                        key_columns.append(column)
+                if not key_columns or any(existing[:len(key_columns)] == key_columns
+                                          for existing in existing_indexes):
+                    continue
+
+                candidate = candidates.setdefault((table, tuple(key_columns)), {
+                    'table': table, 'key': key_columns, 'covering': [], 'coverable': True,
+                    'total_ms': 0.0, 'queries': []
+                })
+                candidate['coverable'] &= not columns['star']
+                for column in other:
+                    if column not in key_columns and column not in rowid and column not in candidate['covering']:
+                        candidate['covering'].append(column)
+                candidate['total_ms'] += record['total_ms']
+                candidate['queries'].append({'sql': record['sql'], 'params': record['params']})
+
+    # Fold each candidate into a wider one on the same table whose key it prefixes
+    ordered = sorted(candidates.values(), key=lambda candidate: len(candidate['key']), reverse=True)
+    kept = []
+    for candidate in ordered:
+        wider = next((other for other in kept if other['table'] == candidate['table']
+                      and other['key'][:len(candidate['key'])] == candidate['key']), None)
+        if wider is None:
+            kept.append(candidate)
+            continue
+        wider['coverable'] &= candidate['coverable']
+        wider['covering'] += [column for column in candidate['covering']
+                              if column not in wider['covering'] and column not in wider['key']]
+        wider['total_ms'] += candidate['total_ms']
+        wider['queries'] += candidate['queries']
+
+    proposals = []
+    for candidate in kept:
+        columns = list(candidate['key'])
+        if candidate['coverable'] and len(columns) + len(candidate['covering']) <= max_columns:
+            columns += candidate['covering']  # covering: the table row is never read
+        columns = columns[:max_columns]
+        name = f"idx_{candidate['table']}_{'_'.join(columns)}"
+        proposals.append({
+            'name': name,
+            'table': candidate['table'],
+            'columns': columns,
+            'create': f"CREATE INDEX IF NOT EXISTS {name} ON {candidate['table']} ({', '.join(columns)})",
+            'total_ms': candidate['total_ms'],
+            'queries': candidate['queries']
+        })
+    return sorted(proposals, key=lambda proposal: proposal['total_ms'], reverse=True)
+
+
+def apply_proposals(proposals: List[Dict]) -> List[Dict]:
+    """
+    Create each proposed index, keeping it only if a motivating query plans through it.
+    Returns:
+        The proposals with an 'applied' flag and the resulting plans
+    """
+    results = []
+    for proposal in proposals:
+        with get_pool().transaction("IMMEDIATE") as conn:
+            conn.execute(proposal['create'])
+            plans = [explain(conn, query['sql'], query['params']) for query in proposal['queries']]
+            used = any(proposal['name'] in detail for plan in plans for detail in plan)
+            if not used:
+                conn.execute(f"DROP INDEX IF EXISTS {proposal['name']}")
+        results.append(dict(proposal, applied=used, plans=plans))
+        print(f"{'Created' if used else 'Skipped unused'} {proposal['create']}")
+    query_plan_recorder.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect agent query plans and advise indexes")
+    parser.add_argument("command", choices=["report", "advise"])
+    parser.add_argument("--log", required=True, help="QUERY_PLAN_LOG file written by the app")
+    parser.add_argument("--apply", action="store_true", help="Create the proposed indexes that get used")
+    args = parser.parse_args()
+
+    records = load_log(args.log)
+    if args.command == "report":
+        for record in records:
+            print(f"{record['count']:>6}x {record['total_ms']:>10.1f} ms total {record['max_ms']:>8.1f} ms max"
+                  f"  scans={','.join(record['full_scans']) or '-'}")
+            print(f"        {record['sql']}")
+        return
+
+    proposals = advise(records)
+    if not proposals:
+        print("No index proposals")
+        return
+    for proposal in proposals:
+        print(f"{proposal['total_ms']:>10.1f} ms  {proposal['create']}")
+    if args.apply:
+        apply_proposals(proposals)
+
+
+if __name__ == "__main__":
+    main()
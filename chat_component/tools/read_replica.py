@@ -0,0 +1,223 @@
+"""
+Read-only routing for agent-written SQL.
+
+execute_query_fetch and query_database read through a separate read-only
+pool (mode=ro, query_only), away from the pool the split tools write with.
+With DB_READ_SNAPSHOT=1 that pool points at a snapshot copy of the database
+instead. The copy is taken with the SQLite backup API and refreshed every
+DB_SNAPSHOT_INTERVAL seconds, so heavy analytics never contend with writes
+at the cost of results up to one interval old.
+
+Each refresh writes a new snapshot file and swaps in a pool for it. Reads
+go through read_connection(), which holds a lease on the pool it started
+with: the old pool is only closed, and its file removed, once the last read
+on it has finished.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from chat_component.tools.connection_pool import ConnectionPool, get_pool, DB_PATH, POOL_SIZE
+from chat_component.tools.query_cache import query_cache
+
+READ_SNAPSHOT = os.getenv("DB_READ_SNAPSHOT", "0") == "1"
+SNAPSHOT_DIR = os.getenv("DB_SNAPSHOT_DIR", tempfile.gettempdir())
+SNAPSHOT_INTERVAL = float(os.getenv("DB_SNAPSHOT_INTERVAL", "60"))
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(POOL_SIZE)))
+
+
+class ReadReplica:
+    """Owns the read-only pool and, in snapshot mode, the refresher thread"""
+
+    def __init__(self, db_path: str = DB_PATH, snapshot: bool = READ_SNAPSHOT,
+                 snapshot_dir: str = SNAPSHOT_DIR, interval: float = SNAPSHOT_INTERVAL,
+                 pool_size: int = READ_POOL_SIZE):
+        self.db_path = db_path
+        self.snapshot = snapshot
+        self.snapshot_dir = snapshot_dir
+        self.interval = interval
+        self.pool_size = pool_size
+        self._pool = None
+        self._snapshot_path = None
+        self._leases = {}  # pool -> reads holding it
+        self._retired = {}  # replaced pool -> its snapshot file, until its last read ends
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.last_refresh = None
+        self.last_refresh_ms = None
+        self.last_error = None
+
+    def _open_pool(self):
+        """Create the pool on first use; the caller holds self._lock"""
+        if self._pool is None:
+            if self.snapshot:
+                self._pool = self._take_snapshot()[0]
+            else:
+                self._pool = ConnectionPool(self.db_path, self.pool_size, read_only=True)
+
+    def pool(self) -> ConnectionPool:
+        """Return the current read-only pool, creating it on first use"""
+        if self._pool is None:
+            with self._lock:
+                self._open_pool()
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a read-only connection. The pool it comes from stays open,
+        and its snapshot file in place, until the connection is returned,
+        even if a refresh replaces the pool meanwhile.
+        """
+        with self._lock:
+            self._open_pool()
+            pool = self._pool
+            self._leases[pool] = self._leases.get(pool, 0) + 1
+        try:
+            with pool.connection() as conn:
+                yield conn
+        finally:
+            with self._lock:
+                self._leases[pool] -= 1
+                drained = self._leases[pool] == 0
+                if drained:
+                    del self._leases[pool]
+                retired = drained and pool in self._retired
+                path = self._retired.pop(pool, None) if retired else None
+            if retired:
+                self._discard(pool, path)
+
+    @staticmethod
+    def _discard(pool: ConnectionPool, path):
+        """Close a replaced pool and remove its snapshot file"""
+        pool.close()
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _take_snapshot(self) -> tuple:
+        """Back up the live database into a new snapshot file and open a pool on it"""
+        start = time.perf_counter()
+        self._generation += 1
+        base = os.path.splitext(os.path.basename(self.db_path))[0]
+        path = os.path.join(self.snapshot_dir, f"{base}.snapshot-{os.getpid()}-{self._generation}.db")
+        target = sqlite3.connect(path)
+        try:
+            with get_pool().connection() as source:
+                source.backup(target)
+            # A rollback-journal file can be opened read-only without -wal/-shm
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+
+        old_path = self._snapshot_path
+        self._snapshot_path = path
+        self.refreshes += 1
+        self.last_refresh = time.time()
+        self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 1)
+        return ConnectionPool(path, self.pool_size, read_only=True), old_path
+
+    def refresh(self):
+        """Replace the snapshot with a fresh copy of the live database"""
+        with self._lock:
+            pool, old_path = self._take_snapshot()
+            old_pool, self._pool = self._pool, pool
+            in_use = old_pool is not None and old_pool in self._leases
+            if in_use:
+                # The last read on it closes it, see connection()
+                self._retired[old_pool] = old_path
+        # Pages cached from the old snapshot are now out of date
+        query_cache.clear()
+        if old_pool is not None and not in_use:
+            self._discard(old_pool, old_path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Snapshot refresh failed: {e}")
+
+    def start(self):
+        """Open the pool and, in snapshot mode, start refreshing it"""
+        self.pool()
+        if self.snapshot and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="finance-db-snapshot", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop refreshing, close the pool and remove the snapshot file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            retired, self._retired = self._retired, {}
+            if self._pool is not None:
+                retired[self._pool] = self._snapshot_path
+            self._pool = None
+            self._snapshot_path = None
+        for pool, path in retired.items():
+            self._discard(pool, path)
+
+    def stats(self) -> dict:
+        """Routing and snapshot freshness for the /health endpoint"""
+        stats = {
+            "mode": "snapshot" if self.snapshot else "read_only",
+            "pool": self._pool.health_check() if self._pool is not None else {"status": "not_started"},
+        }
+        if self.snapshot:
+            stats.update({
+                "refresh_interval_s": self.interval,
+                "refreshes": self.refreshes,
+                "snapshot_age_s": round(time.time() - self.last_refresh, 1) if self.last_refresh else None,
+                "last_refresh_ms": self.last_refresh_ms,
+                "last_error": self.last_error,
+            })
+        return stats
+
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica() -> ReadReplica:
+    """Return the process-wide read replica, creating it on first use"""
+    global _replica
+    if _replica is None:
+        with _replica_lock:
+            if _replica is None:
+                _replica = ReadReplica()
+    return _replica
+
+
+def read_connection():
+    """Check out a connection for agent-written SQL, see ReadReplica.connection"""
+    return get_replica().connection()
+
+
+def init_read_replica() -> ReadReplica:
+    """Open the read-only pool (and snapshot refresher) on application startup"""
+    replica = get_replica()
+    replica.start()
+    return replica
+
+
+def close_read_replica():
+    """Close the read-only pool on application shutdown"""
+    global _replica
+    with _replica_lock:
+        if _replica is not None:
+            _replica.close()
+            _replica = None
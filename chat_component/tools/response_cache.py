@@ -0,0 +1,315 @@
+"""
+Semantic cache of root_agent answers.
+
+The same financial questions ("how much did I spend on groceries last month")
+arrive again and again in slightly different words. Each one re-runs
+ChatAgent -> AnalysisAgent -> InformationAgent with several model calls. The
+final answer is now cached per data user and that user's data version:
+
+- The question is normalized (case, punctuation, filler words) and embedded.
+  An exact normalized match is a dictionary hit. Otherwise the user's entries
+  are compared with the embedder's similarity, and the best one at or above
+  RESPONSE_CACHE_THRESHOLD is served.
+- Entries only match when their "discriminating" tokens agree exactly
+  (numbers, months, this/last/next, week/month/year, proper nouns, ...).
+  "last month" and "this month", or the Goa and the Kerala trip, never
+  share an answer, however similar the rest is. The content words must
+  overlap by at least RESPONSE_CACHE_MIN_OVERLAP (Jaccard; by default they
+  must be the same words), so a long question that differs in one
+  lower-case name is not served either.
+- Only the first turn of a session is cached. A follow-up like "and last
+  month?" depends on the conversation before it, which the key cannot see.
+- persist_expenses_batch bumps the data version of the payer and of everyone
+  with a share, dropping their entries. An answer computed while such a
+  write landed is not stored.
+- Requests that change data (splits, receipts) are neither served nor stored,
+  and neither are partial answers from an exhausted turn budget.
+
+The default embedder is lexical (unigram + bigram cosine) and runs fully
+locally. RESPONSE_CACHE_EMBEDDER="package.module:factory" plugs in any
+object with embed(text) and similarity(a, b), for example a local
+sentence-transformers model.
+"""
+import importlib
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from google.genai import types
+
+from chat_component.tools.row_scope import SCOPED_USER_ID
+from chat_component.tools.turn_budget import PARTIAL_ANSWER_KEY
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "900"))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.85"))
+RESPONSE_CACHE_MIN_OVERLAP = float(os.getenv("RESPONSE_CACHE_MIN_OVERLAP", "1.0"))
+RESPONSE_CACHE_EMBEDDER = os.getenv("RESPONSE_CACHE_EMBEDDER", "")
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_USER_ID = re.compile(r"\buser(?:[_ ]?id)?\s*[:=#]?\s*(\d+)\b", re.IGNORECASE)
+_STOPWORDS = frozenset(
+    "a an the please can could would you tell me show give i my me is are was were do does did "
+    "what whats how much many of on in for to at by with about and or any all some am be been have has had "
+    "which right now please show roughly just".split()
+)
+_PROPER_NOUN = re.compile(r"(?<![.?!]\s)(?<!^)\b[A-Z][a-z]+\b")
+_IRREGULAR = {"spent": "spend", "bought": "buy", "paid": "pay", "owed": "owe", "ate": "eat"}
+# Tokens that change the answer even when the rest of the question is the same
+_DISCRIMINATING = frozenset(
+    "today yesterday tomorrow this last next previous past current week weeks month months year years "
+    "quarter daily weekly monthly yearly annual january february march april may june july august "
+    "september october november december jan feb mar apr jun jul aug sep sept oct nov dec "
+    "not no never without except most least top bottom highest lowest average total".split()
+)
+# Requests that write data or depend on an attachment are never cached
+_ACTION = re.compile(r"\b(split|divide|add|save|record|create|delete|remove|update|upload|receipt|wallet)\b",
+                     re.IGNORECASE)
+SIDE_EFFECT_AGENTS = frozenset({"group_splitting_agent", "Receipt_Processor_Agent"})
+
+
+def _stem(token: str) -> str:
+    if token in _IRREGULAR:
+        return _IRREGULAR[token]
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def normalize_question(text: str) -> tuple:
+    """Lower-case, crudely stemmed content tokens of a question, filler words removed"""
+    return tuple(_stem(token) for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS)
+
+
+def _discriminators(question: str, normalized: tuple) -> frozenset:
+    """Time words, negations, numbers and capitalized names mid-sentence"""
+    names = {_stem(name.lower()) for name in _PROPER_NOUN.findall(question.strip())}
+    return frozenset(
+        token for token in normalized if token in _DISCRIMINATING or token[0].isdigit() or token in names
+    )
+
+
+def _overlap(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class LexicalEmbedder:
+    """Sparse unigram + bigram vectors compared by cosine similarity"""
+
+    def embed(self, text: str) -> dict:
+        tokens = normalize_question(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1.0
+        for pair in zip(tokens, tokens[1:]):
+            key = pair[0] + " " + pair[1]
+            counts[key] = counts.get(key, 0) + 0.5
+        norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+        return {key: value / norm for key, value in counts.items()}
+
+    def similarity(self, a: dict, b: dict) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(value * b.get(key, 0.0) for key, value in a.items())
+
+
+def load_embedder(spec: str = RESPONSE_CACHE_EMBEDDER):
+    """Build the embedder named by "module:factory", or the lexical default"""
+    if not spec:
+        return LexicalEmbedder()
+    module_name, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+class ResponseCache:
+    """Thread-safe semantic cache of answers, bucketed by data user"""
+
+    def __init__(self, embedder=None, max_entries: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL, threshold: float = RESPONSE_CACHE_THRESHOLD):
+        self.embedder = embedder or LexicalEmbedder()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # (user_id, normalized) -> (expires_at, discriminators, vector, answer, content words)
+        self._entries = OrderedDict()
+        self._by_user = {}  # user_id -> set of keys
+        self._versions = {}  # user_id -> data version
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def lookup(self, user_id: int, question: str) -> Optional[str]:
+        """Return a cached answer for a question close enough to question, or None"""
+        normalized = normalize_question(question)
+        key = (user_id, normalized)
+        discriminators = _discriminators(question, normalized)
+        words = frozenset(normalized)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[3]
+            candidates = [
+                (other, self._entries[other]) for other in self._by_user.get(user_id, ())
+                if self._entries[other][0] > now and self._entries[other][1] == discriminators
+                and _overlap(self._entries[other][4], words) >= RESPONSE_CACHE_MIN_OVERLAP
+            ]
+        if candidates:
+            vector = self.embedder.embed(question)
+            score, best = max(
+                ((self.embedder.similarity(vector, entry[2]), (other, entry)) for other, entry in candidates),
+                key=lambda item: item[0]
+            )
+            if score >= self.threshold:
+                with self._lock:
+                    if best[0] in self._entries:
+                        self._entries.move_to_end(best[0])
+                    self.semantic_hits += 1
+                return best[1][3]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, user_id: int, question: str, answer: str, version: int):
+        """Cache answer unless user_id's data changed since version was read"""
+        normalized = normalize_question(question)
+        key = (user_id, normalized)
+        discriminators = _discriminators(question, normalized)
+        vector = self.embedder.embed(question)
+        with self._lock:
+            if self._versions.get(user_id, 0) != version:
+                self.skipped += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, discriminators, vector, answer, frozenset(normalized))
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(user_id, set()).add(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._by_user.get(old_key[0], set()).discard(old_key)
+                self.evictions += 1
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def invalidate_users(self, user_ids: Iterable[int]):
+        """Bump the data version of user_ids and drop their cached answers"""
+        with self._lock:
+            for user_id in set(user_ids):
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                for key in self._by_user.pop(user_id, set()):
+                    if self._entries.pop(key, None) is not None:
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": RESPONSE_CACHE_ENABLED,
+                "embedder": type(self.embedder).__name__,
+                "entries": len(self._entries),
+                "hits": hits,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "skipped": self.skipped,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache(load_embedder())
+_pending = OrderedDict()  # invocation_id -> (user_id, question, version) awaiting the agent's answer
+_PENDING_MAX = 1024
+
+
+def _question(content: Optional[types.Content]) -> Optional[str]:
+    """The request text, or None when it carries attachments"""
+    if content is None or not content.parts:
+        return None
+    if any(part.text is None for part in content.parts):
+        return None
+    return " ".join(part.text for part in content.parts).strip() or None
+
+
+def _is_follow_up(callback_context) -> bool:
+    """True when the session already holds earlier turns"""
+    # ReadonlyContext has no public accessor for the session's events
+    return any(event.invocation_id != callback_context.invocation_id
+               for event in callback_context._invocation_context.session.events)
+
+
+def _data_user(question: str) -> int:
+    """Whose data the answer is about: an explicit user_id, else the scoped user"""
+    match = _USER_ID.search(question)
+    return int(match.group(1)) if match else SCOPED_USER_ID
+
+
+async def lookup_response(callback_context) -> Optional[types.Content]:
+    """before_agent_callback for root_agent: serve a cached answer or remember the question"""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    question = _question(callback_context.user_content)
+    if question is None or _ACTION.search(question) or _is_follow_up(callback_context):
+        response_cache.skip()
+        return None
+    user_id = _data_user(question)
+    version = response_cache.version(user_id)
+    answer = response_cache.lookup(user_id, question)
+    if answer is not None:
+        return types.Content(role="model", parts=[types.Part(text=answer)])
+    _pending[callback_context.invocation_id] = (user_id, question, version)
+    while len(_pending) > _PENDING_MAX:
+        _pending.popitem(last=False)
+    return None
+
+
+async def store_response(callback_context) -> None:
+    """after_agent_callback for root_agent: cache the final answer of a read-only run"""
+    pending = _pending.pop(callback_context.invocation_id, None)
+    if pending is None:
+        return None
+    invocation_id = callback_context.invocation_id
+    answer = None
+    # ReadonlyContext has no public accessor for the session's events
+    for event in callback_context._invocation_context.session.events:
+        if event.invocation_id != invocation_id:
+            continue
+        if any(call.name in SIDE_EFFECT_AGENTS for call in event.get_function_calls()) or \
+                PARTIAL_ANSWER_KEY in (event.custom_metadata or {}):
+            response_cache.skip()
+            return None
+        if (event.author == callback_context.agent_name and event.is_final_response()
+                and event.content and event.content.parts):
+            text = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+            answer = text or answer
+    if answer:
+        response_cache.store(*pending[:2], answer, pending[2])
+    return None
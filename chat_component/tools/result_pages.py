@@ -0,0 +1,118 @@
+"""
+Bounded, paged query results for the LLM SQL tools.
+
+Rows are streamed from the cursor with fetchmany and serialized one at a
+time until a row or byte cap is hit, so an unbounded SELECT never
+materializes in memory or floods the model context. Pages are compact
+columnar JSON (column names once, then row arrays). A truncated page carries
+a continuation token the agent passes back to read the next page.
+"""
+import base64
+import hashlib
+import json
+import os
+from typing import Iterator, List, Sequence
+
+RESULT_MAX_ROWS = int(os.getenv("RESULT_MAX_ROWS", "200"))
+RESULT_MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", "32768"))
+RESULT_FETCH_SIZE = int(os.getenv("RESULT_FETCH_SIZE", "100"))
+
+
+class PageTokenError(ValueError):
+    """Raised when a continuation token does not belong to the query"""
+
+
+def _encode_value(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    return str(value)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'), default=_encode_value)
+
+
+def query_digest(sql_query: str, params: Sequence = ()) -> str:
+    """Short hash tying a continuation token to one query and its parameters"""
+    return hashlib.sha1(_dumps([sql_query, list(params)]).encode('utf-8')).hexdigest()[:16]
+
+
+def make_page_token(digest: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(_dumps({'q': digest, 'o': offset}).encode('utf-8')).decode('ascii')
+
+
+def parse_page_token(page_token: str, digest: str) -> int:
+    """
+    Return the row offset stored in a continuation token.
+    Raises:
+        PageTokenError: the token is malformed or was issued for another query
+    """
+    if not page_token:
+        return 0
+    try:
+        token = json.loads(base64.urlsafe_b64decode(page_token.encode('ascii')))
+        offset = int(token['o'])
+        token_digest = token['q']
+    except (ValueError, KeyError, TypeError) as e:
+        raise PageTokenError("Invalid page_token") from e
+    if token_digest != digest or offset < 0:
+        raise PageTokenError("page_token belongs to a different query; rerun the query without it")
+    return offset
+
+
+def iter_rows(cursor, fetch_size: int = RESULT_FETCH_SIZE) -> Iterator[tuple]:
+    """Stream rows from a cursor in fetchmany batches"""
+    while True:
+        batch = cursor.fetchmany(fetch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def read_page(cursor, digest: str, offset: int = 0,
+              max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES) -> str:
+    """
+    Serialize one page of a cursor's results as columnar JSON.
+    Args:
+        cursor: Executed cursor positioned at its first row
+        digest: query_digest of the statement, embedded in the next token
+        offset: Rows to skip, taken from the previous page's token
+        max_rows: Most rows in the page
+        max_bytes: Most bytes of serialized row data in the page
+    Returns:
+        JSON string with columns, rows, row_count, truncated and, when
+        truncated, truncated_by and next_page_token
+    """
+    columns = [column[0] for column in cursor.description or ()]
+    rows = iter_rows(cursor)
+    for _ in range(offset):
+        if next(rows, None) is None:
+            break
+
+    encoded: List[str] = []
+    size = 0
+    truncated_by = None
+    for row in rows:
+        if len(encoded) >= max_rows:
+            truncated_by = 'rows'
+            break
+        row_json = _dumps(row)
+        # Always return at least one row so paging makes progress
+        if encoded and size + len(row_json) + 1 > max_bytes:
+            truncated_by = 'bytes'
+            break
+        encoded.append(row_json)
+        size += len(row_json) + 1
+
+    page = (
+        '{"columns":' + _dumps(columns)
+        + ',"rows":[' + ','.join(encoded) + ']'
+        + ',"row_count":' + str(len(encoded))
+        + ',"offset":' + str(offset)
+    )
+    if truncated_by:
+        next_token = make_page_token(digest, offset + len(encoded))
+        page += ',"truncated":true,"truncated_by":' + _dumps(truncated_by) + ',"next_page_token":' + _dumps(next_token)
+    else:
+        page += ',"truncated":false'
+    return page + '}'
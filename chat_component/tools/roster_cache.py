@@ -0,0 +1,105 @@
+"""
+In-process cache of group lookups and rosters.
+
+Group membership almost never changes within a chat, yet every split, info
+and balance tool re-validated the user/group pair and re-read the member
+list. Entries are kept in a TTL + LRU cache and tagged with their group_id so
+writes through the tools can invalidate everything known about a group.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ROSTER_CACHE_SIZE = int(os.getenv("ROSTER_CACHE_SIZE", "1024"))
+ROSTER_CACHE_TTL = float(os.getenv("ROSTER_CACHE_TTL", "300"))
+
+
+class RosterCache:
+    """
+    Thread-safe TTL + LRU cache keyed by tuples such as
+    ("lookup", user_id, group_name) or ("roster", group_id).
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = ROSTER_CACHE_SIZE, ttl: float = ROSTER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, group_id, value)
+        # Guards against stale fills: a lookup's group is only known once it is
+        # loaded, so each invalidation stamps its group with a global write count
+        self._writes = 0
+        self._generations = {}  # group_id -> write count of its last invalidation
+        self._cleared = 0  # write count of the last clear()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key: tuple, loader):
+        """
+        Return the cached value for key, calling loader() on a miss.
+        loader must return (group_id, value); a value of None is not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            started = self._writes
+
+        # Load outside the lock so a slow query does not serialize other lookups
+        group_id, value = loader()
+        if value is None:
+            return None
+
+        with self._lock:
+            # An invalidation that landed while loading may not be in value
+            if self._generations.get(group_id, 0) > started or self._cleared > started:
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, group_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate_group(self, group_id: int):
+        """Drop every entry that was loaded for group_id"""
+        with self._lock:
+            self._writes += 1
+            self._generations[group_id] = self._writes
+            stale = [key for key, entry in self._entries.items() if entry[1] == group_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._writes += 1
+            self._cleared = self._writes
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+roster_cache = RosterCache()
@@ -0,0 +1,165 @@
+"""
+Row-level scoping for LLM-generated SQL.
+
+execute_query_fetch runs whatever SQL the InformationAgent writes, so every
+table reference is rewritten to only see the current user's rows. The query
+is parsed with sqlglot and every table reference, in joins, subqueries, CTEs
+and UNION branches alike, is replaced by a derived table filtered with its
+predicate from SCOPE_POLICY. Tables missing from the policy are rejected.
+
+Rewrites are cached by fingerprint: the query with comments and whitespace
+collapsed and string literals lifted out as ? parameters. Questions that
+differ only in a date or a name reuse the same rewritten SQL without parsing
+it again.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import traverse_scope
+
+SCOPED_USER_ID = int(os.getenv("SCOPED_USER_ID", "1"))
+SCOPE_PLAN_CACHE_SIZE = int(os.getenv("SCOPE_PLAN_CACHE_SIZE", "1024"))
+
+# Predicate template per table; {t} is the table name and {uid} the user.
+# None marks a table that is readable without a user filter. Tables read
+# inside a predicate are written as main.<table>, which a CTE cannot shadow.
+SCOPE_POLICY = {
+    'users': "{t}.user_id = {uid}",
+    'user_groups': "{t}.user_id = {uid}",
+    'user_subscriptions': "{t}.user_id = {uid}",
+    'expense_shares': "{t}.user_id = {uid}",
+    'group_balances': "{t}.user_id = {uid}",
+    'expenses': "{t}.payer_id = {uid}",
+    'groups': "{t}.created_by = {uid}",
+    'expense_items': "{t}.expense_id IN (SELECT expense_id FROM main.expenses WHERE payer_id = {uid})",
+    'expense_receipts': "{t}.expense_id IN (SELECT expense_id FROM main.expenses WHERE payer_id = {uid})",
+    # Shared item catalog; it has no owner column and holds no user data
+    'frequent_items': None,
+}
+
+# Names a query may not give its own CTEs: every scoped table and every table
+# a policy predicate reads
+_RESERVED_NAMES = frozenset(SCOPE_POLICY) | frozenset(
+    name.lower() for template in SCOPE_POLICY.values() if template
+    for name in re.findall(r"\bmain\.(\w+)", template)
+)
+
+# String literals (not quoted aliases or blob literals), comments and whitespace
+_TOKEN_PATTERN = re.compile(
+    r"(?P<alias>\bAS\s+'(?:[^']|'')*')"
+    r"|(?<!\w)(?P<string>'(?:[^']|'')*')"
+    r"|(?P<comment>--[^\n]*|/\*.*?\*/)"
+    r"|(?P<space>\s+)",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+class RowScopeError(ValueError):
+    """Raised when a query cannot be safely scoped to the current user"""
+
+
+def fingerprint_query(sql_query: str) -> Tuple[str, List[str]]:
+    """
+    Normalize a query into a cache key plus the literals lifted out of it.
+    Args:
+        sql_query: SQL as written by the agent
+    Returns:
+        (fingerprint, params) where fingerprint has a ? for every string literal
+    """
+    params = []
+
+    def normalize(match):
+        if match.group('alias'):
+            return match.group('alias')
+        if match.group('string'):
+            params.append(match.group('string')[1:-1].replace("''", "'"))
+            return '?'
+        return ' '
+
+    fingerprint = _TOKEN_PATTERN.sub(normalize, sql_query).strip().rstrip(';').strip()
+    return fingerprint, params
+
+
+def _scoped_source(table: exp.Table, user_id: int) -> exp.Expression:
+    """Swap a table reference for a derived table holding only the user's rows"""
+    name = table.name.lower()
+    if table.db and table.db.lower() != 'main':
+        raise RowScopeError(f"Table '{table.db}.{table.name}' is not available to this agent")
+    if name not in SCOPE_POLICY:
+        raise RowScopeError(f"Table '{table.name}' is not available to this agent")
+    template = SCOPE_POLICY[name]
+    if template is None:
+        return table
+
+    inner = table.copy()
+    inner.set('alias', None)
+    predicate = template.format(t=inner.name, uid=int(user_id))
+    # SQLite flattens the subquery back into the outer query, so this plans
+    # the same as a WHERE filter while staying correct for outer joins,
+    # USING and comma joins
+    return exp.select('*').from_(inner).where(predicate, dialect="sqlite").subquery(table.alias_or_name)
+
+
+@lru_cache(maxsize=SCOPE_PLAN_CACHE_SIZE)
+def _compile(fingerprint: str, user_id: int) -> Tuple[str, FrozenSet[str]]:
+    try:
+        statements = sqlglot.parse(fingerprint, read="sqlite")
+    except SqlglotError as e:
+        raise RowScopeError(f"Could not parse query: {e}") from e
+    if len(statements) != 1 or statements[0] is None:
+        raise RowScopeError("Exactly one SQL statement is allowed per query")
+    tree = statements[0]
+    if not isinstance(tree, exp.Query):
+        raise RowScopeError("Only SELECT queries are allowed")
+    for cte in tree.find_all(exp.CTE):
+        if cte.alias_or_name.lower() in _RESERVED_NAMES:
+            raise RowScopeError(f"A CTE may not be named '{cte.alias_or_name}', that is a table name")
+
+    tables = [
+        source
+        for scope in traverse_scope(tree)
+        for _, source in scope.selected_sources.values()
+        if isinstance(source, exp.Table) and source.name.lower() not in scope.cte_sources
+    ]
+    for table in tables:
+        scoped = _scoped_source(table, user_id)
+        if scoped is not table:
+            table.replace(scoped)
+    # Tables read after scoping, including those inside policy predicates
+    read_tables = frozenset(table.name.lower() for table in tree.find_all(exp.Table))
+    return tree.sql(dialect="sqlite"), read_tables
+
+
+def scope_query(sql_query: str, user_id: int = SCOPED_USER_ID) -> Tuple[str, List[str], FrozenSet[str]]:
+    """
+    Rewrite a query so every table reference only returns the user's rows.
+    Args:
+        sql_query: A single SELECT statement
+        user_id: User the results are scoped to
+    Returns:
+        (scoped_sql, params, tables): scoped_sql and params are ready for
+        conn.execute, tables names every table the query reads
+    Raises:
+        RowScopeError: the query is not a single SELECT or reads an unknown table
+    """
+    fingerprint, params = fingerprint_query(sql_query)
+    scoped_sql, tables = _compile(fingerprint, user_id)
+    return scoped_sql, params, tables
+
+
+def plan_cache_stats() -> dict:
+    """Hit/miss counters for the rewritten-query cache"""
+    info = _compile.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0
+    }
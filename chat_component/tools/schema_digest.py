@@ -0,0 +1,191 @@
+"""
+Compact, verified schema digest for the Text_to_Sql prompt.
+
+The prompt used to carry the database schema as Python cursor.execute("CREATE
+TABLE ...") blocks, copied by hand and including tables the database does not
+have. The digest is generated from sqlite_master instead: one line per table
+the agent can read (SCOPE_POLICY in row_scope), with compact column types and
+primary/foreign key markers. Each table is verified by preparing its
+row-scoped SELECT on the read-only pool, the same path execute_query_fetch
+takes, so a table whose scope policy cannot run (for example because a table
+the policy reads is missing) is left out and reported.
+
+The build step writes SCHEMA_DIGEST_PATH:
+
+    python -m chat_component.tools.schema_digest          # write the digest
+    python -m chat_component.tools.schema_digest --check  # exit 1 when stale
+
+The build step runs ensure_ledger() first, so the group_balances ledger the
+app creates at startup is part of the digest. The fingerprint covers every
+SCOPE_POLICY table present in sqlite_master, skipped ones included.
+
+load_digest() runs when the agents are imported and only reads: it compares
+the fingerprint over the read-only pool and serves the file while it
+matches. A database whose ledger has not been created yet (the app lifespan
+creates it) gets the stored digest with a warning. Any other difference is
+rebuilt in memory, with a warning, until the file is regenerated.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from functools import lru_cache
+
+from chat_component.tools.ledger import ensure_ledger
+from chat_component.tools.read_replica import read_connection
+from chat_component.tools.row_scope import SCOPE_POLICY, RowScopeError, scope_query
+
+SCHEMA_DIGEST_PATH = os.getenv(
+    "SCHEMA_DIGEST_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'schema_digest.json'))
+)
+
+LEDGER_TABLE = "group_balances"
+LEGEND = "Notation: PK primary key, ! NOT NULL, ->table(.column) foreign key."
+_TYPES = {"INTEGER": "INT", "TIMESTAMP": "TS", "DATETIME": "TS", "VARCHAR": "TEXT"}
+
+
+class SchemaDigestError(RuntimeError):
+    """Raised when no digest can be built or loaded"""
+
+
+def _candidate_tables(conn) -> list:
+    """(name, sql) of the tables the agent may query, as they exist in the database"""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name"
+    ).fetchall()
+    return [(name, sql) for name, sql in rows if name.lower() in SCOPE_POLICY]
+
+
+def schema_fingerprint(conn) -> str:
+    """Hash of the CREATE statements of every queryable table in the database now"""
+    digest = hashlib.sha256()
+    for name, sql in _candidate_tables(conn):
+        digest.update(f"{name}\0{sql}\0".encode())
+    return digest.hexdigest()[:16]
+
+
+def _describe_table(conn, table: str) -> str:
+    columns = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    foreign_keys = {
+        row[3]: (row[2], row[4]) for row in conn.execute(f'PRAGMA foreign_key_list("{table}")')
+    }
+    parts = []
+    for _, name, col_type, not_null, _, pk in columns:
+        col_type = (col_type or "").upper()
+        part = f"{name} {_TYPES.get(col_type, col_type)}".rstrip()
+        if pk:
+            part += " PK"
+        elif not_null:
+            part += "!"
+        if name in foreign_keys:
+            other, other_column = foreign_keys[name]
+            part += f" ->{other}" if other_column in (None, name) else f" ->{other}.{other_column}"
+        parts.append(part)
+    return f"{table}(" + ", ".join(parts) + ")"
+
+
+def _verify_table(conn, table: str):
+    """Prepare the row-scoped SELECT for table; raises when it cannot run"""
+    scoped_sql, params, _ = scope_query(f'SELECT * FROM "{table}"')
+    conn.execute("EXPLAIN " + scoped_sql, params).fetchall()
+
+
+def build_digest(conn) -> dict:
+    """
+    Introspect and verify the schema.
+    Args:
+        conn: Connection to the finance database
+    Returns:
+        dict with the fingerprint, the digest text, the verified tables and
+        the skipped tables with the reason for each
+    """
+    lines, tables, skipped = [], [], {}
+    for table, _ in _candidate_tables(conn):
+        try:
+            _verify_table(conn, table)
+        except (sqlite3.Error, RowScopeError) as e:
+            skipped[table] = str(e)
+            continue
+        tables.append(table)
+        lines.append(_describe_table(conn, table))
+    for table in sorted(set(SCOPE_POLICY) - {name.lower() for name, _ in _candidate_tables(conn)}):
+        skipped[table] = "not in the database"
+    if not tables:
+        raise SchemaDigestError("No queryable tables found in the finance database")
+    return {
+        "fingerprint": schema_fingerprint(conn),
+        "tables": tables,
+        "skipped": skipped,
+        "digest": "\n".join([LEGEND] + lines),
+    }
+
+
+def _read_file(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def load_digest(path: str = SCHEMA_DIGEST_PATH) -> dict:
+    """
+    The digest for the current database, loaded once per process.
+    Uses the generated file when it matches the live schema, otherwise rebuilds;
+    never writes to the database.
+    Raises:
+        SchemaDigestError: the database is unreadable and there is no generated file
+    """
+    stored = _read_file(path)
+    try:
+        with read_connection() as conn:
+            if stored is not None and stored.get("fingerprint") == schema_fingerprint(conn):
+                return stored
+            present = {name.lower() for name, _ in _candidate_tables(conn)}
+            if stored is not None and LEDGER_TABLE in stored.get("tables", []) and LEDGER_TABLE not in present:
+                print(f"Warning: {LEDGER_TABLE} does not exist yet, serving {path} as generated")
+                return stored
+            built = build_digest(conn)
+    except sqlite3.Error as e:
+        if stored is None:
+            raise SchemaDigestError(f"Cannot read the schema and {path} is missing: {e}")
+        print(f"Warning: could not verify {path} against the database ({e}), using it as is")
+        return stored
+    print(f"Warning: {path} is {'stale' if stored else 'missing'}, "
+          f"run python -m chat_component.tools.schema_digest to regenerate it")
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the schema digest used by the Text_to_Sql prompt")
+    parser.add_argument("--check", action="store_true", help="exit 1 when the generated digest is stale")
+    parser.add_argument("--path", default=SCHEMA_DIGEST_PATH)
+    args = parser.parse_args()
+
+    ensure_ledger()
+    with read_connection() as conn:
+        built = build_digest(conn)
+    stored = _read_file(args.path)
+
+    if args.check:
+        if stored is None or stored.get("digest") != built["digest"]:
+            print(f"{args.path} is stale, regenerate it")
+            sys.exit(1)
+        print(f"{args.path} is up to date ({len(built['tables'])} tables)")
+        return
+
+    with open(args.path, "w", encoding="utf-8") as f:
+        json.dump(built, f, indent=2)
+        f.write("\n")
+    print(built["digest"])
+    for table, reason in built["skipped"].items():
+        print(f"skipped {table}: {reason}")
+    print(f"Wrote {args.path} ({len(built['digest'])} chars, fingerprint {built['fingerprint']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Pluggable session store for the ADK runner.
+
+Sessions used to live in mock_finance.db through DatabaseSessionService, so
+every session, event and app_state write took the same SQLite lock as the
+finance reads and the split tools. The store is now chosen with
+SESSION_BACKEND:
+
+    memory    In-process LRU of SESSION_CACHE_SIZE sessions. With
+              SESSION_WRITE_BEHIND=1 changed sessions are flushed in the
+              background to their own SQLite/WAL file (SESSION_DB_PATH) and
+              sessions evicted from the LRU are reloaded from it on demand.
+    database  ADK's DatabaseSessionService on SESSION_DB_URL, which defaults
+              to SESSION_DB_PATH instead of the finance database.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+DEFAULT_SESSION_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'sessions.db'))
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", DEFAULT_SESSION_DB_PATH)
+SESSION_DB_URL = os.getenv("SESSION_DB_URL", f"sqlite:///{SESSION_DB_PATH}")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+SESSION_WRITE_BEHIND = os.getenv("SESSION_WRITE_BEHIND", "1") == "1"
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+
+
+class SessionFile:
+    """
+    Write-behind target for LruSessionService: one row per session holding
+    the serialized Session, in a WAL-mode SQLite file of its own.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_snapshots (
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                update_time REAL NOT NULL,
+                PRIMARY KEY (app_name, user_id, session_id)
+            ) WITHOUT ROWID
+        """)
+
+    def write(self, rows: list, deletes: list):
+        """Upsert (app_name, user_id, session_id, data, update_time) rows and delete keys in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_snapshots VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._conn.executemany(
+                    "DELETE FROM session_snapshots WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    deletes
+                )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def load(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM session_snapshots WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id)
+            ).fetchone()
+        return Session.model_validate_json(row[0]) if row else None
+
+    def list(self, app_name: str, user_id: str) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM session_snapshots WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id)
+            ).fetchall()
+        return [Session.model_validate_json(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LruSessionService(InMemorySessionService):
+    """
+    InMemorySessionService bounded to max_sessions, least recently used first out.
+
+    With a SessionFile, sessions touched by create_session/append_event are
+    marked dirty and a flusher thread writes them every flush_interval
+    seconds, off the request path. Evicted sessions are serialized before
+    they leave memory, so get_session can always reload them.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_CACHE_SIZE, store: Optional[SessionFile] = None,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.store = store
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._order = OrderedDict()  # (app_name, user_id, session_id) -> None, oldest first
+        self._dirty = set()
+        self._pending = {}  # key -> serialized session evicted before its flush
+        self._deleted = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.evictions = 0
+        self.reloads = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_flush_ms = None
+        self.last_error = None
+        if store is not None:
+            self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+            self._thread.start()
+
+    def _touch(self, key: tuple, dirty: bool):
+        self._order[key] = None
+        self._order.move_to_end(key)
+        if dirty and self.store is not None:
+            self._dirty.add(key)
+            self._deleted.discard(key)
+        while len(self._order) > self.max_sessions:
+            self._evict(next(iter(self._order)))
+
+    def _evict(self, key: tuple):
+        app_name, user_id, session_id = key
+        del self._order[key]
+        session = self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+        if session is not None and key in self._dirty:
+            self._dirty.discard(key)
+            self._pending[key] = session.model_dump_json()
+        self.evictions += 1
+
+    def _reload(self, app_name: str, user_id: str, session_id: str) -> bool:
+        """Bring an evicted session back from the store (or an unflushed eviction)"""
+        key = (app_name, user_id, session_id)
+        if self.store is None or key in self._deleted:
+            return False
+        data = self._pending.pop(key, None)
+        if data is not None:
+            session = Session.model_validate_json(data)
+            self._dirty.add(key)
+        else:
+            session = self.store.load(app_name, user_id, session_id)
+            if session is None:
+                return False
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+        self.reloads += 1
+        self._touch(key, dirty=False)
+        return True
+
+    def _has(self, app_name: str, user_id: str, session_id: str) -> bool:
+        return session_id in self.sessions.get(app_name, {}).get(user_id, {})
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        with self._lock:
+            session = self._create_session_impl(
+                app_name=app_name, user_id=user_id, state=state, session_id=session_id
+            )
+            self._touch((app_name, user_id, session.id), dirty=True)
+            return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        with self._lock:
+            if not self._has(app_name, user_id, session_id):
+                if not self._reload(app_name, user_id, session_id):
+                    return None
+            else:
+                self._touch((app_name, user_id, session_id), dirty=False)
+            return self._get_session_impl(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        with self._lock:
+            response = self._list_sessions_impl(app_name=app_name, user_id=user_id)
+            if self.store is None:
+                return response
+            seen = {session.id for session in response.sessions}
+            for key, data in self._pending.items():
+                if key[:2] == (app_name, user_id) and key[2] not in seen:
+                    response.sessions.append(Session.model_validate_json(data))
+                    seen.add(key[2])
+            for session in self.store.list(app_name, user_id):
+                key = (app_name, user_id, session.id)
+                if session.id not in seen and key not in self._deleted:
+                    response.sessions.append(session)
+            for session in response.sessions:
+                session.events = []
+            return response
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            key = (app_name, user_id, session_id)
+            self._order.pop(key, None)
+            self._dirty.discard(key)
+            self._pending.pop(key, None)
+            if self.store is not None:
+                self._deleted.add(key)
+            self._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        with self._lock:
+            if not self._has(session.app_name, session.user_id, session.id):
+                self._reload(session.app_name, session.user_id, session.id)
+            event = await super().append_event(session=session, event=event)
+            if self._has(session.app_name, session.user_id, session.id):
+                self._touch((session.app_name, session.user_id, session.id), dirty=True)
+            return event
+
+    def flush(self) -> int:
+        """Write every dirty, evicted and deleted session to the store; returns rows written"""
+        if self.store is None:
+            return 0
+        start = time.perf_counter()
+        with self._lock:
+            now = time.time()
+            rows = [key + (data, now) for key, data in self._pending.items()]
+            for app_name, user_id, session_id in self._dirty:
+                session = self.sessions[app_name][user_id][session_id]
+                rows.append((app_name, user_id, session_id, session.model_dump_json(), now))
+            deletes = list(self._deleted)
+            self._pending.clear()
+            self._dirty.clear()
+            self._deleted.clear()
+        if not rows and not deletes:
+            return 0
+        try:
+            self.store.write(rows, deletes)
+        except Exception:
+            # Put the work back so the next flush retries it
+            with self._lock:
+                for app_name, user_id, session_id, data, _ in rows:
+                    key = (app_name, user_id, session_id)
+                    if key not in self._dirty and key not in self._pending and key not in self._deleted:
+                        self._pending[key] = data
+                self._deleted.update(key for key in deletes if key not in self._order)
+            raise
+        self.flushes += 1
+        self.rows_written += len(rows)
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Session write-behind flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher, write what is left and close the store"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.store is not None:
+            self.flush()
+            self.store.close()
+            self.store = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "backend": "memory",
+                "sessions": len(self._order),
+                "max_sessions": self.max_sessions,
+                "evictions": self.evictions,
+                "write_behind": self.store is not None,
+            }
+            if self.store is not None:
+                stats.update({
+                    "path": self.store.path,
+                    "dirty": len(self._dirty) + len(self._pending) + len(self._deleted),
+                    "reloads": self.reloads,
+                    "flushes": self.flushes,
+                    "rows_written": self.rows_written,
+                    "last_flush_ms": self.last_flush_ms,
+                    "last_error": self.last_error,
+                })
+            return stats
+
+
+def create_session_service(backend: str = SESSION_BACKEND) -> BaseSessionService:
+    """
+    Build the session service selected by SESSION_BACKEND.
+    Args:
+        backend: "memory" (LRU, optional write-behind) or "database"
+    Returns:
+        A session service for the ADK Runner
+    """
+    if backend == "memory":
+        store = SessionFile(SESSION_DB_PATH) if SESSION_WRITE_BEHIND else None
+        return LruSessionService(SESSION_CACHE_SIZE, store)
+    if backend == "database":
+        return DatabaseSessionService(db_url=SESSION_DB_URL)
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}', expected 'memory' or 'database'")
+
+
+def session_store_stats(service: BaseSessionService) -> dict:
+    """Backend summary for the /health endpoint"""
+    if isinstance(service, LruSessionService):
+        return service.stats()
+    if isinstance(service, DatabaseSessionService):
+        return {"backend": "database", "url": SESSION_DB_URL}
+    return {"backend": type(service).__name__}
+
+
+def close_session_service(service: BaseSessionService):
+    """Flush and close the session store on application shutdown"""
+    if isinstance(service, LruSessionService):
+        service.close()
+    elif isinstance(service, DatabaseSessionService):
+        service.db_engine.dispose()
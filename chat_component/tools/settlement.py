@@ -0,0 +1,47 @@
+"""
+Debt simplification for group balances.
+
+Given each member's net balance (positive: the group owes them, negative:
+they owe the group), produce a short list of transfers that settles the
+group. Creditors and debtors are kept in max-heaps and the largest debtor
+always pays the largest creditor, so each step fully settles at least one
+member: at most n - 1 transfers in O(n log n), with no pairwise scans.
+All arithmetic is in integer cents.
+"""
+import heapq
+from typing import Dict, List, Tuple
+
+
+def simplify_debts(balances: Dict[int, int]) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    Compute the transfers that settle a group.
+    Args:
+        balances: Mapping of user_id to net balance in cents
+    Returns:
+        (transfers, unsettled_cents) where transfers is a list of
+        (from_user_id, to_user_id, amount_cents) and unsettled_cents is the
+        amount left over when the balances do not sum to zero
+    """
+    # heapq is a min-heap, so amounts are negated; user_id breaks ties
+    # deterministically
+    creditors = [(-cents, user_id) for user_id, cents in balances.items() if cents > 0]
+    debtors = [(cents, user_id) for user_id, cents in balances.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        credit, debt = -credit, -debt
+
+        amount = min(credit, debt)
+        transfers.append((debtor, creditor, amount))
+
+        if credit > amount:
+            heapq.heappush(creditors, (-(credit - amount), creditor))
+        if debt > amount:
+            heapq.heappush(debtors, (-(debt - amount), debtor))
+
+    unsettled = sum(-cents for cents, _ in creditors) - sum(-cents for cents, _ in debtors)
+    return transfers, unsettled
@@ -1,38 +1,51 @@
 
-import os
+import json
 import sqlite3
+import time
 
-# Get the base path for the database from environment variable
+from chat_component.tools.connection_pool import get_pool, PoolClosedError
+from chat_component.tools.read_replica import read_connection
+from chat_component.tools.statements import get_statement
+from chat_component.tools.row_scope import scope_query, RowScopeError
+from chat_component.tools.query_cache import query_cache
+from chat_component.tools.query_plans import query_plan_recorder
+from chat_component.tools.query_budget import query_budget, QueryTooExpensiveError
+from chat_component.tools.result_pages import (
+    query_digest, parse_page_token, read_page, PageTokenError
+)
 
 
-def execute_query(sql_query: str):
+def execute_query(sql_query: str, params: tuple = ()):
     """
     Function to execute the sqlite query and provide realtime data.
     Args:
         sql_query(str): Sqlite3 compatible sql query to execute against database and retrieve results
+        params(tuple): Values bound to the ? placeholders in sql_query
 
     Returns:
         Results fetched from database
     """
-    import sqlite3
-    import os
+    print(f"SQL QUERY RECEIVED ----------------- {sql_query} {params} -----------------------")
+    # Pooled connections run in autocommit mode, so INSERT/UPDATE/DELETE
+    # statements are committed as soon as they execute
+    with get_pool().connection() as conn:
+        cursor = conn.execute(sql_query, params)
+        results = cursor.fetchall()
 
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'mock_finance.db')
-    db_path = os.path.abspath(db_path)  # Convert to absolute path
-    conn = sqlite3.connect(db_path)
-    print(f"SQL QUERY RECEIVED ----------------- {sql_query} -----------------------")
-    cursor = conn.cursor()
-
-    cursor.execute(sql_query)
+    return results
 
-    # Commit for INSERT, UPDATE, DELETE operations
-    if sql_query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
-        conn.commit()
 
-    results = cursor.fetchall()
-    conn.close()
+def execute_statement(name: str, params: tuple = ()):
+    """
+    Execute a registered statement from statements.STATEMENTS.
+    Args:
+        name(str): Name of the registered statement
+        params(tuple): Values bound to the statement placeholders
 
-    return results
+    Returns:
+        Results fetched from database
+    """
+    return execute_query(get_statement(name), params)
 
 
 # def execute_query(sql_query:str):
@@ -54,127 +67,71 @@ def execute_query(sql_query: str):
 #     print(results)
 #     return results
 
-def execute_query_fetch(sql_query: str):
+def _read_page(sql_query: str, params, digest: str, offset: int) -> str:
+    """
+    Run a query for one result page within the execution budget, recording
+    its plan if it is slow or scans
+    """
+    # Agent SQL reads through the read-only pool, never the write path
+    with read_connection() as conn:
+        start = time.perf_counter()
+        try:
+            with query_budget(conn):
+                page = read_page(conn.execute(sql_query, params), digest, offset)
+        except QueryTooExpensiveError:
+            # A cancelled query is the one whose plan matters most
+            query_plan_recorder.observe(conn, sql_query, params, (time.perf_counter() - start) * 1000)
+            raise
+        query_plan_recorder.observe(conn, sql_query, params, (time.perf_counter() - start) * 1000)
+    return page
+
+
+def execute_query_page(sql_query: str, params: tuple = (), page_token: str = "") -> str:
+    """
+    Execute a query and return one bounded page of its results.
+    Args:
+        sql_query(str): Sqlite3 compatible sql query
+        params(tuple): Values bound to the ? placeholders in sql_query
+        page_token(str): next_page_token from the previous page, if any
+
+    Returns:
+        Columnar JSON page (see result_pages.read_page)
+    """
+    digest = query_digest(sql_query, params)
+    offset = parse_page_token(page_token, digest)
+    return _read_page(sql_query, params, digest, offset)
+
+
+def execute_query_fetch(sql_query: str, page_token: str = ""):
     """
     Function to execute the sqlite query and provide realtime data.
     Args:
         sql_query(str): Sqlite3 compatible sql query to execute against database and retreive results
+        page_token(str): next_page_token from a truncated result, to read the next page of the same query
 
     Returns:
-        Results fetched from database
+        Results fetched from database as JSON: column names once, then one array per row
     """
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'mock_finance.db')
-    db_path = os.path.abspath(db_path)  # Convert to absolute path
-    conn = sqlite3.connect(db_path)
-    
-    # Ensure the query always filters for USER_ID=10 for security
-    sql_query_upper = sql_query.upper()
-    
-    # Check if query already has USER_ID=10 filter
-    if 'USER_ID=10' in sql_query_upper:
-        # Query already has USER_ID=10 filter, proceed as is
-        pass
-    elif 'WHERE' not in sql_query_upper:
-        # No WHERE clause exists, need to add user_id filter
-        # First, check if the main table has user_id column
-        if any(table in sql_query_upper for table in ['USERS', 'TASKS', 'USER_GROUPS', 'USER_SUBSCRIPTIONS', 'EXPENSE_SHARES']):
-            # These tables have direct user_id column
-            if sql_query.strip().endswith(';'):
-                sql_query = sql_query[:-1] + ' WHERE USER_ID=10;'
-            else:
-                sql_query = sql_query + ' WHERE USER_ID=10'
-        elif 'EXPENSES' in sql_query_upper:
-            # Expenses table uses payer_id instead of user_id
-            if sql_query.strip().endswith(';'):
-                sql_query = sql_query[:-1] + ' WHERE payer_id=1;'
-            else:
-                sql_query = sql_query + ' WHERE payer_id=1'
-        elif 'GROUPS' in sql_query_upper:
-            # Groups table uses created_by instead of user_id
-            if sql_query.strip().endswith(';'):
-                sql_query = sql_query[:-1] + ' WHERE created_by=1;'
-            else:
-                sql_query = sql_query + ' WHERE created_by=1'
-        elif any(table in sql_query_upper for table in ['FREQUENT_ITEMS', 'EXPENSE_RECEIPTS', 'EXPENSE_ITEMS']):
-            # These tables don't have user_id, need to JOIN with related tables
-            if 'FREQUENT_ITEMS' in sql_query_upper:
-                # Join with user_subscriptions to filter by user_id
-                if 'FROM FREQUENT_ITEMS' in sql_query_upper:
-                    sql_query = sql_query.replace('FROM frequent_items', 'FROM frequent_items fi JOIN user_subscriptions us ON fi.item_id = us.item_id')
-                    if sql_query.strip().endswith(';'):
-                        sql_query = sql_query[:-1] + ' WHERE us.USER_ID=10;'
-                    else:
-                        sql_query = sql_query + ' WHERE us.USER_ID=10'
-            elif 'EXPENSE_RECEIPTS' in sql_query_upper:
-                # Join with expenses to filter by payer_id
-                if 'FROM EXPENSE_RECEIPTS' in sql_query_upper:
-                    sql_query = sql_query.replace('FROM expense_receipts', 'FROM expense_receipts er JOIN expenses e ON er.expense_id = e.expense_id')
-                    if sql_query.strip().endswith(';'):
-                        sql_query = sql_query[:-1] + ' WHERE e.payer_id=1;'
-                    else:
-                        sql_query = sql_query + ' WHERE e.payer_id=1'
-            elif 'EXPENSE_ITEMS' in sql_query_upper:
-                # Join with expenses to filter by payer_id
-                if 'FROM EXPENSE_ITEMS' in sql_query_upper:
-                    sql_query = sql_query.replace('FROM expense_items', 'FROM expense_items ei JOIN expenses e ON ei.expense_id = e.expense_id')
-                    if sql_query.strip().endswith(';'):
-                        sql_query = sql_query[:-1] + ' WHERE e.payer_id=1;'
-                    else:
-                        sql_query = sql_query + ' WHERE e.payer_id=1'
-        else:
-            # Unknown table, add generic USER_ID=10 filter (may not work for all cases)
-            if sql_query.strip().endswith(';'):
-                sql_query = sql_query[:-1] + ' WHERE USER_ID=10;'
-            else:
-                sql_query = sql_query + ' WHERE USER_ID=10'
-    else:
-        # WHERE clause exists, add user_id filter to it
-        if any(table in sql_query_upper for table in ['USERS', 'TASKS', 'USER_GROUPS', 'USER_SUBSCRIPTIONS', 'EXPENSE_SHARES']):
-            # These tables have direct user_id column
-            if 'USER_ID=10' not in sql_query_upper:
-                where_pos = sql_query_upper.find('WHERE')
-                sql_query = sql_query[:where_pos+5] + ' USER_ID=10 AND ' + sql_query[where_pos+5:]
-        elif 'EXPENSES' in sql_query_upper:
-            # Expenses table uses payer_id instead of user_id
-            if 'PAYER_ID=1' not in sql_query_upper:
-                where_pos = sql_query_upper.find('WHERE')
-                sql_query = sql_query[:where_pos+5] + ' payer_id=1 AND ' + sql_query[where_pos+5:]
-        elif 'GROUPS' in sql_query_upper:
-            # Groups table uses created_by instead of user_id
-            if 'CREATED_BY=1' not in sql_query_upper:
-                where_pos = sql_query_upper.find('WHERE')
-                sql_query = sql_query[:where_pos+5] + ' created_by=1 AND ' + sql_query[where_pos+5:]
-        elif any(table in sql_query_upper for table in ['FREQUENT_ITEMS', 'EXPENSE_RECEIPTS', 'EXPENSE_ITEMS']):
-            # These tables need JOINs to filter by user_id
-            if 'FREQUENT_ITEMS' in sql_query_upper and 'USER_SUBSCRIPTIONS' not in sql_query_upper:
-                # Add JOIN for frequent_items
-                sql_query = sql_query.replace('FROM frequent_items', 'FROM frequent_items fi JOIN user_subscriptions us ON fi.item_id = us.item_id')
-                if 'US.USER_ID=10' not in sql_query_upper:
-                    where_pos = sql_query_upper.find('WHERE')
-                    sql_query = sql_query[:where_pos+5] + ' us.USER_ID=10 AND ' + sql_query[where_pos+5:]
-            elif 'EXPENSE_RECEIPTS' in sql_query_upper and 'EXPENSES' not in sql_query_upper:
-                # Add JOIN for expense_receipts
-                sql_query = sql_query.replace('FROM expense_receipts', 'FROM expense_receipts er JOIN expenses e ON er.expense_id = e.expense_id')
-                if 'E.PAYER_ID=1' not in sql_query_upper:
-                    where_pos = sql_query_upper.find('WHERE')
-                    sql_query = sql_query[:where_pos+5] + ' e.payer_id=1 AND ' + sql_query[where_pos+5:]
-            elif 'EXPENSE_ITEMS' in sql_query_upper and 'EXPENSES' not in sql_query_upper:
-                # Add JOIN for expense_items
-                sql_query = sql_query.replace('FROM expense_items', 'FROM expense_items ei JOIN expenses e ON ei.expense_id = e.expense_id')
-                if 'E.PAYER_ID=1' not in sql_query_upper:
-                    where_pos = sql_query_upper.find('WHERE')
-                    sql_query = sql_query[:where_pos+5] + ' e.payer_id=1 AND ' + sql_query[where_pos+5:]
-        else:
-            # Unknown table, add generic USER_ID=10 filter
-            if 'USER_ID=10' not in sql_query_upper:
-                where_pos = sql_query_upper.find('WHERE')
-                sql_query = sql_query[:where_pos+5] + ' USER_ID=10 AND ' + sql_query[where_pos+5:]
-    
-    print(f"SQL QUERY RECEIVED ----------------- {sql_query} -----------------------")
-    cursor = conn.cursor()
-    cursor.execute(sql_query)
-    results = cursor.fetchall()
-    conn.close()
+    # Every table reference is rewritten to only see the current user's rows
+    try:
+        scoped_query, params, tables = scope_query(sql_query)
+        digest = query_digest(scoped_query, params)
+        offset = parse_page_token(page_token, digest)
+    except (RowScopeError, PageTokenError) as e:
+        return json.dumps({"error": str(e)})
+
+    print(f"SQL QUERY RECEIVED ----------------- {scoped_query} {params} offset={offset} -----------------------")
+
+    def load():
+        return _read_page(scoped_query, params, digest, offset)
+
+    try:
+        # The scoped SQL carries the user id, so it is a safe cache key
+        results = query_cache.get_or_load((scoped_query, tuple(params), offset), tables, load)
+    except QueryTooExpensiveError as e:
+        return json.dumps(e.to_dict())
+    except (sqlite3.Error, PoolClosedError, TimeoutError) as e:
+        return json.dumps({"error": str(e)})
     print(results)
     return results
 
@@ -0,0 +1,98 @@
+"""
+Named, parameterized SQL statements used by the agent tools.
+
+Keeping one canonical text per lookup lets SQLite's per-connection statement
+cache (see DB_STATEMENT_CACHE_SIZE in connection_pool) re-use the compiled
+statement instead of re-parsing an f-string on every call, and keeps user
+supplied values out of the SQL text.
+"""
+
+STATEMENTS = {
+    # Users
+    "user_by_id": """
+        SELECT user_id, name FROM users WHERE user_id = ?
+    """,
+    "user_name_by_id": """
+        SELECT name FROM users WHERE user_id = ?
+    """,
+    # Takes a JSON array of ids so the statement text stays the same
+    # whatever the batch size
+    "user_names_by_ids": """
+        SELECT user_id, name FROM users
+        WHERE user_id IN (SELECT value FROM json_each(?))
+    """,
+
+    # Groups
+    "group_by_name_for_user": """
+        SELECT g.group_id, g.name, g.description, g.created_at
+        FROM groups g
+        JOIN user_groups ug ON g.group_id = ug.group_id
+        WHERE LOWER(g.name) = LOWER(?) AND ug.user_id = ?
+    """,
+    "group_name_by_id": """
+        SELECT name FROM groups WHERE group_id = ?
+    """,
+    "group_members": """
+        SELECT u.user_id, u.name, u.email
+        FROM users u
+        JOIN user_groups ug ON u.user_id = ug.user_id
+        WHERE ug.group_id = ?
+    """,
+    "group_members_detailed": """
+        SELECT u.user_id, u.name, u.email, ug.role, ug.joined_at
+        FROM users u
+        JOIN user_groups ug ON u.user_id = ug.user_id
+        WHERE ug.group_id = ?
+        ORDER BY ug.joined_at
+    """,
+    "groups_for_user": """
+        SELECT g.group_id, g.name, g.description,
+                ug.role, g.created_at
+        FROM groups g
+        JOIN user_groups ug ON g.group_id = ug.group_id
+        WHERE ug.user_id = ?
+        ORDER BY g.created_at DESC
+    """,
+    "group_details": """
+        SELECT g.group_id, g.name, g.description,
+                g.created_at, u.name as creator_name
+        FROM groups g
+        JOIN users u ON g.created_by = u.user_id
+        WHERE g.group_id = ?
+    """,
+
+    # Balances, read from the group_balances ledger (see ledger.py)
+    "group_balances": """
+        SELECT u.user_id, u.name, COALESCE(gb.paid, 0), COALESCE(gb.owes, 0)
+        FROM user_groups ug
+        JOIN users u ON u.user_id = ug.user_id
+        LEFT JOIN group_balances gb ON gb.group_id = ug.group_id AND gb.user_id = ug.user_id
+        WHERE ug.group_id = ?
+        ORDER BY u.name
+    """,
+
+    # Writes
+    "insert_expense": """
+        INSERT INTO expenses (group_id, payer_id, amount, currency, description, expense_date, type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+    "insert_expense_share": """
+        INSERT INTO expense_shares (expense_id, user_id, share_amount)
+        VALUES (?, ?, ?)
+    """,
+    "ledger_apply": """
+        INSERT INTO group_balances (group_id, user_id, paid, owes)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (group_id, user_id) DO UPDATE SET
+            paid = paid + excluded.paid,
+            owes = owes + excluded.owes
+    """,
+}
+
+
+def get_statement(name: str) -> str:
+    """Look up a registered statement by name"""
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"Unknown SQL statement '{name}'")
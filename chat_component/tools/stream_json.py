@@ -0,0 +1,210 @@
+"""
+Incremental validation of the agent's JSON answer.
+
+/process-query/stream forwards the answer text as it is generated. Instead of
+waiting for the whole reply and running json.loads on it, the text is fed
+chunk by chunk through a small JSON state machine. It notices a malformed
+answer at the first bad character and a finished one as soon as its top-level
+value closes. A leading ```json fence and trailing backticks are skipped, as
+/process-query does with its regex.
+"""
+import json
+import re
+
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+_LITERALS = ('true', 'false', 'null')
+_ESCAPES = frozenset('"\\/bfnrtu')
+_HEX = frozenset('0123456789abcdefABCDEF')
+_WHITESPACE = frozenset(' \t\r\n')
+
+
+class JsonStreamError(ValueError):
+    """Raised when the streamed text can no longer become valid JSON"""
+
+    def __init__(self, message: str, position: int):
+        self.position = position
+        super().__init__(f"{message} at position {position}")
+
+
+class IncrementalJsonValidator:
+    """
+    Validates a JSON document delivered in arbitrary chunks.
+
+    feed() raises JsonStreamError at the first character that cannot be part
+    of a valid document. complete turns True once the top-level value has
+    closed, and finish() returns the parsed value.
+    """
+
+    def __init__(self):
+        self.complete = False
+        self._chunks = []
+        self._position = 0
+        self._fence = 'pending'  # pending | ticks | tag | none | open
+        self._ticks = 0
+        self._stack = []  # open containers, '{' or '['
+        self._state = 'value'
+        self._string = None  # None, 'key' or 'value' while inside a string
+        self._escape = 0  # 1 after a backslash, 2-5 while reading \uXXXX
+        self._scalar = ''  # number or literal being read
+
+    def feed(self, chunk: str):
+        """Validate the next piece of text"""
+        start = None
+        for index, char in enumerate(chunk):
+            if self._fence == 'pending' and char not in _WHITESPACE and char != '`':
+                self._fence = 'none'
+            if self._fence != 'none' and self._fence != 'open':
+                self._skip_fence(char)
+            elif self._state == 'done':
+                if char not in _WHITESPACE and char != '`':
+                    raise JsonStreamError("Unexpected data after the JSON value", self._position)
+            else:
+                if start is None:
+                    start = index
+                self._char(char)
+                if self._state == 'done':
+                    self._chunks.append(chunk[start:index + 1])
+                    start = None
+            self._position += 1
+        if start is not None:
+            self._chunks.append(chunk[start:])
+
+    def _skip_fence(self, char: str):
+        if self._fence == 'pending':
+            if char == '`':
+                self._fence, self._ticks = 'ticks', 1
+        elif self._fence == 'ticks':
+            if char == '`' and self._ticks < 3:
+                self._ticks += 1
+            elif self._ticks == 3:
+                self._fence = 'open' if char == '\n' else 'tag'
+            else:
+                raise JsonStreamError("Malformed code fence", self._position)
+        elif self._fence == 'tag' and char == '\n':
+            self._fence = 'open'
+
+    def _char(self, char: str):
+        if self._string is not None:
+            self._string_char(char)
+            return
+        if self._scalar:
+            if self._scalar_char(char):
+                return
+        if char in _WHITESPACE:
+            return
+
+        state = self._state
+        if state == 'done':
+            # Only reached when a top-level number or literal was ended by char
+            if char != '`':
+                raise JsonStreamError("Unexpected data after the JSON value", self._position)
+        elif state in ('value', 'value_or_end'):
+            if char == '{':
+                self._stack.append('{')
+                self._state = 'key_or_end'
+            elif char == '[':
+                self._stack.append('[')
+                self._state = 'value_or_end'
+            elif char == '"':
+                self._string = 'value'
+            elif char == '-' or char.isdigit() or char in 'tfn':
+                self._scalar = char
+                self._check_literal()
+            elif char == ']' and state == 'value_or_end':
+                self._close(char)
+            else:
+                raise JsonStreamError(f"Expected a value, got {char!r}", self._position)
+        elif state in ('key', 'key_or_end'):
+            if char == '"':
+                self._string = 'key'
+            elif char == '}' and state == 'key_or_end':
+                self._close(char)
+            else:
+                raise JsonStreamError(f"Expected an object key, got {char!r}", self._position)
+        elif state == 'colon':
+            if char != ':':
+                raise JsonStreamError(f"Expected ':', got {char!r}", self._position)
+            self._state = 'value'
+        elif state == 'comma_or_end':
+            if char == ',':
+                self._state = 'key' if self._stack[-1] == '{' else 'value'
+            elif char in '}]':
+                self._close(char)
+            else:
+                raise JsonStreamError(f"Expected ',' or a closing bracket, got {char!r}", self._position)
+
+    def _string_char(self, char: str):
+        if self._escape == 1:
+            if char not in _ESCAPES:
+                raise JsonStreamError(f"Invalid escape \\{char}", self._position)
+            self._escape = 2 if char == 'u' else 0
+        elif self._escape:
+            if char not in _HEX:
+                raise JsonStreamError("Invalid \\u escape", self._position)
+            self._escape = 0 if self._escape == 5 else self._escape + 1
+        elif char == '\\':
+            self._escape = 1
+        elif char == '"':
+            if self._string == 'key':
+                self._state = 'colon'
+            else:
+                self._value_done()
+            self._string = None
+        elif ord(char) < 0x20:
+            raise JsonStreamError("Control character in string", self._position)
+
+    def _scalar_char(self, char: str) -> bool:
+        """Extend the current number/literal; False once char belongs to the next token"""
+        if self._scalar[0] in 'tfn':
+            if char.isalpha():
+                self._scalar += char
+                self._check_literal()
+                return True
+            if self._scalar not in _LITERALS:
+                raise JsonStreamError(f"Invalid literal {self._scalar!r}", self._position)
+        else:
+            if char in _NUMBER_CHARS:
+                self._scalar += char
+                return True
+            if not _NUMBER.fullmatch(self._scalar):
+                raise JsonStreamError(f"Invalid number {self._scalar!r}", self._position)
+        self._scalar = ''
+        self._value_done()
+        return False
+
+    def _check_literal(self):
+        if self._scalar[0] in 'tfn' and not any(literal.startswith(self._scalar) for literal in _LITERALS):
+            raise JsonStreamError(f"Invalid literal {self._scalar!r}", self._position)
+
+    def _close(self, char: str):
+        expected = '}' if self._stack[-1] == '{' else ']'
+        if char != expected:
+            raise JsonStreamError(f"Expected {expected!r}, got {char!r}", self._position)
+        self._stack.pop()
+        self._value_done()
+
+    def _value_done(self):
+        if self._stack:
+            self._state = 'comma_or_end'
+        else:
+            self._state = 'done'
+            self.complete = True
+
+    def finish(self):
+        """
+        End the stream and return the parsed value.
+        Raises:
+            JsonStreamError: the text is not one complete JSON value
+        """
+        if self._scalar and not self._stack and self._state != 'done':
+            # A bare top-level number or literal ends with the stream
+            self._scalar_char(' ')
+        if not self.complete:
+            raise JsonStreamError("Incomplete JSON value", self._position)
+        text = ''.join(self._chunks).rstrip().rstrip('`')
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise JsonStreamError(e.msg, e.pos) from e
+
@@ -0,0 +1,385 @@
+"""
+Per-turn budget and tool circuit breaker for the agent tree.
+
+Nothing used to bound a turn: ChatAgent -> SmartPlannerAgent ->
+AnalysisAgent -> InformationAgent can nest AgentTool hops, and one confused
+turn could fan out into dozens of model calls. Each turn now gets a
+TurnBudget when root_agent starts:
+
+- at most TURN_MAX_MODEL_CALLS model calls and TURN_MAX_TOOL_CALLS tool
+  calls, counted across every nested agent;
+- a wall-clock deadline of TURN_DEADLINE_SECONDS, checked before each model
+  and tool call (a call already in flight is allowed to finish).
+
+Nested agents run through AgentTool in their own Runner and invocation, but
+in the same asyncio task (or a task copied from it), so the budget travels
+in a ContextVar rather than in session state.
+
+Once a limit is hit, tool calls are refused and the next model call of every
+agent, nested or not, is answered with a partial answer built from the tool
+results gathered so far. The turn ends without further model calls.
+
+The circuit breaker is shared by all turns, so it only counts failures of
+the infrastructure behind a tool: a tool that raised, or an error result
+that says the database was busy, locked, unavailable or timed out. A tool
+that fails that way TOOL_BREAKER_FAILURES times in a row is opened for
+TOOL_BREAKER_COOLDOWN seconds. A turn that calls an open tool stops with a
+partial answer instead of retrying it. After the cooldown, one call is let
+through to probe the tool.
+
+Every other error result (bad SQL from the model, a row-scope rejection, a
+user who is not in the group) says nothing about the tool's health and is
+charged to the turn instead: after TURN_MAX_TOOL_ERRORS of them the turn
+stops with a partial answer.
+
+guard_agent_tree() installs the model and tool callbacks on every agent;
+start_turn_budget and finish_turn_budget are root_agent's agent callbacks.
+Agent callbacks never see a tool that raised, so TurnBudgetPlugin goes on
+both runners (app.py's for /process-query, and chat_component.app for the
+ADK web server's /run and /run_sse) to turn the exception into an error
+result the breaker counts. execute_plan steps go through the same guards,
+see plan_executor.
+TURN_BUDGET_ENABLED=0 turns the budget off.
+"""
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+TURN_BUDGET_ENABLED = os.getenv("TURN_BUDGET_ENABLED", "1") == "1"
+TURN_MAX_MODEL_CALLS = int(os.getenv("TURN_MAX_MODEL_CALLS", "24"))
+TURN_MAX_TOOL_CALLS = int(os.getenv("TURN_MAX_TOOL_CALLS", "40"))
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "90"))
+TURN_MAX_TOOL_ERRORS = int(os.getenv("TURN_MAX_TOOL_ERRORS", "8"))
+TOOL_BREAKER_FAILURES = int(os.getenv("TOOL_BREAKER_FAILURES", "3"))
+TOOL_BREAKER_COOLDOWN = float(os.getenv("TOOL_BREAKER_COOLDOWN", "30"))
+# Tool results kept for the partial answer, and how much of each
+PARTIAL_FINDINGS = 5
+PARTIAL_FINDING_CHARS = 600
+
+# Marker on the events of a partial answer, see response_cache.store_response
+PARTIAL_ANSWER_KEY = "turn_budget_exhausted"
+# Set by TurnBudgetPlugin on the error result of a tool that raised
+RAISED_KEY = "raised"
+# Set on the result of a call enforce_tool_budget refused; the tool never ran
+NOT_CALLED_KEY = "not_called"
+
+MODEL_CALLS, TOOL_CALLS, TOOL_ERRORS, DEADLINE, CIRCUIT_OPEN = (
+    "model_calls", "tool_calls", "tool_errors", "deadline", "circuit_open")
+
+# Error texts of sqlite3.OperationalError busy/locked, the connection pools and timeouts
+_INFRA_ERROR = re.compile(
+    r"database (table )?is (locked|busy)|disk i/o error|unable to open database|"
+    r"no database connection available|connection pool is closed|timed? ?out",
+    re.IGNORECASE,
+)
+
+
+class TurnBudget:
+    """Limits and usage of one turn, shared by every agent the turn reaches"""
+
+    def __init__(self, max_model_calls: int = TURN_MAX_MODEL_CALLS, max_tool_calls: int = TURN_MAX_TOOL_CALLS,
+                 deadline_seconds: float = TURN_DEADLINE_SECONDS, max_tool_errors: int = TURN_MAX_TOOL_ERRORS):
+        self.max_model_calls = max_model_calls
+        self.max_tool_calls = max_tool_calls
+        self.max_tool_errors = max_tool_errors
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_seconds
+        self.model_calls = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.exhausted = None  # reason, once a limit is hit
+        self.detail = ""
+        self.findings = []  # (source, result excerpt)
+
+    def stop(self, reason: str, detail: str):
+        if self.exhausted is None:
+            self.exhausted, self.detail = reason, detail
+
+    def charge_model_call(self) -> bool:
+        """Count a model call; False when the turn may not make it"""
+        if self.exhausted is None:
+            if time.monotonic() > self.deadline:
+                self.stop(DEADLINE, "the time limit for this request was reached")
+            elif self.model_calls >= self.max_model_calls:
+                self.stop(MODEL_CALLS, f"it needed more than {self.max_model_calls} model calls")
+        if self.exhausted is not None:
+            return False
+        self.model_calls += 1
+        return True
+
+    def charge_tool_call(self) -> bool:
+        """Count a tool call; False when the turn may not make it"""
+        if self.exhausted is None:
+            if time.monotonic() > self.deadline:
+                self.stop(DEADLINE, "the time limit for this request was reached")
+            elif self.tool_calls >= self.max_tool_calls:
+                self.stop(TOOL_CALLS, f"it needed more than {self.max_tool_calls} tool calls")
+        if self.exhausted is not None:
+            return False
+        self.tool_calls += 1
+        return True
+
+    def charge_tool_error(self):
+        """Count an error result caused by the request rather than the tool"""
+        self.tool_errors += 1
+        if self.tool_errors >= self.max_tool_errors:
+            self.stop(TOOL_ERRORS, f"{self.tool_errors} tool calls returned errors")
+
+    def add_finding(self, source: str, result):
+        if self.exhausted is not None:
+            return
+        text = result if isinstance(result, str) else json.dumps(result, default=str)
+        self.findings.append((source, text[:PARTIAL_FINDING_CHARS]))
+        del self.findings[:-PARTIAL_FINDINGS]
+
+    def partial_answer(self) -> str:
+        lines = [f"I had to stop before finishing this request because {self.detail}."]
+        if self.findings:
+            lines.append("Here is what I found so far:")
+            lines.extend(f"- {source}: {text}" for source, text in self.findings)
+            lines.append("Ask again with a narrower question to get the rest.")
+        else:
+            lines.append("Please try again in a moment, or ask a narrower question.")
+        return "\n".join(lines)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker per tool name, shared by all turns"""
+
+    def __init__(self, failures: int = TOOL_BREAKER_FAILURES, cooldown: float = TOOL_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._consecutive = {}  # tool -> failures in a row
+        self._open_until = {}  # tool -> monotonic time the cooldown ends
+        self._probing = {}  # tool -> when its probe slot frees up
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self, tool: str) -> bool:
+        """False while tool's circuit is open; after the cooldown one probe call goes through"""
+        with self._lock:
+            open_until = self._open_until.get(tool)
+            now = time.monotonic()
+            if open_until is None:
+                return True
+            # A probe that never reported back (the tool raised) frees the slot after a cooldown
+            if now >= open_until and now >= self._probing.get(tool, 0.0):
+                self._probing[tool] = now + self.cooldown
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, tool: str, failed: bool):
+        with self._lock:
+            self._probing.pop(tool, None)
+            if not failed:
+                self._consecutive.pop(tool, None)
+                self._open_until.pop(tool, None)
+                return
+            self._consecutive[tool] = self._consecutive.get(tool, 0) + 1
+            if self._consecutive[tool] >= self.failures:
+                if tool not in self._open_until or time.monotonic() >= self._open_until[tool]:
+                    self.trips += 1
+                self._open_until[tool] = time.monotonic() + self.cooldown
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "failures_to_trip": self.failures,
+                "cooldown_s": self.cooldown,
+                "trips": self.trips,
+                "rejected_calls": self.rejected,
+                "open": {tool: round(until - now, 1) for tool, until in self._open_until.items() if until > now},
+            }
+
+
+class TurnBudgetStats:
+    """How much budget turns use and how often they run out"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.exhausted = {MODEL_CALLS: 0, TOOL_CALLS: 0, TOOL_ERRORS: 0, DEADLINE: 0, CIRCUIT_OPEN: 0}
+        self.model_calls = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.max_model_calls_seen = 0
+        self.max_tool_calls_seen = 0
+        self.elapsed_ms = 0.0
+
+    def record(self, budget: TurnBudget):
+        with self._lock:
+            self.turns += 1
+            if budget.exhausted is not None:
+                self.exhausted[budget.exhausted] += 1
+            self.model_calls += budget.model_calls
+            self.tool_calls += budget.tool_calls
+            self.tool_errors += budget.tool_errors
+            self.max_model_calls_seen = max(self.max_model_calls_seen, budget.model_calls)
+            self.max_tool_calls_seen = max(self.max_tool_calls_seen, budget.tool_calls)
+            self.elapsed_ms += (time.monotonic() - budget.started) * 1000
+
+    def stats(self) -> dict:
+        with self._lock:
+            exhausted = sum(self.exhausted.values())
+            return {
+                "enabled": TURN_BUDGET_ENABLED,
+                "limits": {"model_calls": TURN_MAX_MODEL_CALLS, "tool_calls": TURN_MAX_TOOL_CALLS,
+                           "tool_errors": TURN_MAX_TOOL_ERRORS, "deadline_s": TURN_DEADLINE_SECONDS},
+                "turns": self.turns,
+                "exhausted": exhausted,
+                "exhausted_fraction": round(exhausted / self.turns, 4) if self.turns else 0.0,
+                "exhausted_by": dict(self.exhausted),
+                "avg_model_calls": round(self.model_calls / self.turns, 2) if self.turns else None,
+                "avg_tool_calls": round(self.tool_calls / self.turns, 2) if self.turns else None,
+                "tool_errors": self.tool_errors,
+                "max_model_calls_seen": self.max_model_calls_seen,
+                "max_tool_calls_seen": self.max_tool_calls_seen,
+                "avg_turn_ms": round(self.elapsed_ms / self.turns, 1) if self.turns else None,
+                "circuit_breaker": circuit_breaker.stats(),
+            }
+
+
+circuit_breaker = CircuitBreaker()
+turn_budget_stats = TurnBudgetStats()
+_current = contextvars.ContextVar("turn_budget", default=None)
+
+
+def current_budget() -> Optional[TurnBudget]:
+    return _current.get()
+
+
+def _error_result(tool_response) -> Optional[dict]:
+    """The {"error": ...} result a tool returned on failure, None for any other result"""
+    if isinstance(tool_response, str):
+        if not tool_response.lstrip().startswith("{"):
+            return None
+        try:
+            tool_response = json.loads(tool_response)
+        except ValueError:
+            return None
+    if isinstance(tool_response, dict) and "error" in tool_response:
+        return tool_response
+    return None
+
+
+def raised_result(tool_name: str, error: Exception) -> dict:
+    """The error result recorded for a tool that raised"""
+    return {"error": f"{tool_name} failed: {error}", RAISED_KEY: type(error).__name__}
+
+
+def is_infrastructure_failure(error: dict) -> bool:
+    """True when the tool raised or its database was busy, locked, unavailable or timed out"""
+    return RAISED_KEY in error or bool(_INFRA_ERROR.search(str(error.get("error", ""))))
+
+
+async def start_turn_budget(callback_context) -> None:
+    """before_agent_callback for root_agent: open the turn's budget"""
+    if TURN_BUDGET_ENABLED:
+        _current.set(TurnBudget())
+    return None
+
+
+async def finish_turn_budget(callback_context) -> None:
+    """after_agent_callback for root_agent: record the turn's usage"""
+    budget = _current.get()
+    if budget is not None:
+        _current.set(None)
+        turn_budget_stats.record(budget)
+    return None
+
+
+async def enforce_model_budget(callback_context, llm_request) -> Optional[LlmResponse]:
+    """before_model_callback: answer with the partial result once the budget is spent"""
+    budget = _current.get()
+    if budget is None or budget.charge_model_call():
+        return None
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=budget.partial_answer())]),
+        custom_metadata={PARTIAL_ANSWER_KEY: budget.exhausted},
+    )
+
+
+async def enforce_tool_budget(tool, args, tool_context) -> Optional[dict]:
+    """before_tool_callback: refuse the call when the budget is spent or the tool's circuit is open"""
+    budget = _current.get()
+    if budget is None:
+        return None
+    if budget.charge_tool_call() and circuit_breaker.allow(tool.name):
+        return None
+    budget.stop(CIRCUIT_OPEN, f"{tool.name} kept failing and is paused for now")
+    return {"error": f"Not called: {budget.detail}. Answer with what you have.", NOT_CALLED_KEY: True}
+
+
+async def record_tool_result(tool, args, tool_context, tool_response) -> None:
+    """after_tool_callback: feed the circuit breaker and keep results for a partial answer"""
+    budget = _current.get()
+    if budget is None:
+        return None
+    error = _error_result(tool_response)
+    if error is not None and NOT_CALLED_KEY in error:
+        return None
+    if error is None:
+        circuit_breaker.record(tool.name, False)
+        budget.add_finding(tool.name, tool_response)
+    elif is_infrastructure_failure(error):
+        circuit_breaker.record(tool.name, True)
+    else:
+        # The tool answered, so it is healthy; the request was wrong
+        circuit_breaker.record(tool.name, False)
+        budget.charge_tool_error()
+    return None
+
+
+class TurnBudgetPlugin(BasePlugin):
+    """
+    Runner plugin that turns an exception raised by a tool into an error
+    result, so the turn carries on and record_tool_result counts it towards
+    the tool's circuit breaker. Runners created by AgentTool inherit it.
+    """
+
+    def __init__(self, name: str = "turn_budget"):
+        super().__init__(name=name)
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error) -> Optional[dict]:
+        if _current.get() is None:
+            return None
+        print(f"Tool {tool.name} raised {type(error).__name__}: {error}")
+        return raised_result(tool.name, error)
+
+
+def _as_list(callbacks) -> list:
+    if callbacks is None:
+        return []
+    return list(callbacks) if isinstance(callbacks, list) else [callbacks]
+
+
+def guard_agent_tree(root):
+    """
+    Install the model and tool budget callbacks on root and every agent it
+    reaches through AgentTool or sub_agents.
+    Args:
+        root: Root agent; it also needs start/finish_turn_budget as agent callbacks
+    """
+    seen, queue = set(), [root]
+    while queue:
+        agent = queue.pop(0)
+        if id(agent) in seen or not hasattr(agent, "before_model_callback"):
+            continue
+        seen.add(id(agent))
+        agent.before_model_callback = [enforce_model_budget] + _as_list(agent.before_model_callback)
+        agent.before_tool_callback = [enforce_tool_budget] + _as_list(agent.before_tool_callback)
+        agent.after_tool_callback = [record_tool_result] + _as_list(agent.after_tool_callback)
+        queue.extend(tool.agent for tool in agent.tools if isinstance(tool, AgentTool))
+        queue.extend(agent.sub_agents)
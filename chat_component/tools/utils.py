@@ -1,3 +1,6 @@
+from chat_component.tools.money import to_cents, from_cents
+
+
 def format_currency(amount, currency='USD'):
     """Format amount as currency"""
     return f"{currency} {amount:.2f}"
@@ -7,5 +10,5 @@ def calculate_percentage(amount, percentage):
     return (amount * percentage) / 100
 
 def round_to_cents(amount):
-    """Round amount to 2 decimal places"""
-    return round(amount, 2)
\ No newline at end of file
+    """Round amount to 2 decimal places (half up, exact in decimal)"""
+    return from_cents(to_cents(amount))
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Shared pytest setup: every test run works on a throwaway copy of the finance
+database, so tests never write to chat_component/mock_finance.db.
+"""
+import os
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_workdir = tempfile.mkdtemp(prefix="finance-tests-")
+shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), os.path.join(_workdir, "finance.db"))
+os.environ.setdefault("FINANCE_DB_PATH", os.path.join(_workdir, "finance.db"))
+os.environ.setdefault("SESSION_WRITE_BEHIND", "0")
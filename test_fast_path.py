@@ -0,0 +1,63 @@
+"""
+Which requests the fast path commits without a model. Splits write data, so
+anything that names a payer or particular participants must go to the agents.
+"""
+import json
+import sqlite3
+
+import pytest
+
+from chat_component.tools.connection_pool import DB_PATH
+from chat_component.tools.fast_path import dispatch, route
+
+TO_AGENTS = [
+    "user_id: 1, group_name: Family Trip, split it equally between me and Bob",
+    "user_id: 1, group_name: Family Trip, split $150 equally with Alice and Bob",
+    "user_id: 1, group_name: Family Trip, split $150 equally among 3 of us",
+    "user_id: 1, group_name: Family Trip, Alice paid $150 for dinner, split equally",
+    "user_id: 1, group_name: Family Trip, Bob paid, split $150 equally",
+    "user_id: 1, group_name: Family Trip, split $150 equally for me and Charlie",
+    "user_id: 1, group_name: Family Trip, split $150 equally for the 2 of them",
+    "user_id: 1, group_name: Family Trip, split $150 equally except Bob",
+    "user_id: 1, group_name: Family Trip, split $150: Alice 50%, Bob 50%",
+    "user_id: 1, group_name: Family Trip, split $100 and $50 equally",
+    "User 2 wants to split $45.50 evenly in the Office Lunch group for pizza",
+    "split $150 equally",
+    "how much did I spend on groceries last month",
+]
+
+FAST = [
+    ("user_id: 1, group_name: Family Trip, split $150 equally for dinner", "split_equal"),
+    ("user_id: 1, group_name: Family Trip, Split $150 equally", "split_equal"),
+    ("user_id: 3, group_name: Roommates, split 90 dollars evenly.", "split_equal"),
+    ("user_id: 4, group_name: Friends Dinner, show balances", "group_balance"),
+    ("user_id: 1, group_name: Family Trip, who owes whom? settle up", "settlement"),
+    ("user_id: 4, group_name: Friends Dinner, list members", "group_info"),
+    ("which groups does user 5 belong to", "user_groups"),
+]
+
+
+@pytest.mark.parametrize("text", TO_AGENTS)
+def test_ambiguous_requests_go_to_the_agents(text):
+    assert route(text) is None
+
+
+@pytest.mark.parametrize("text,intent", FAST)
+def test_fully_specified_requests_take_the_fast_path(text, intent):
+    match = route(text)
+    assert match is not None and match.intent == intent
+
+
+def test_split_slots_come_from_the_grammar():
+    match = route("user_id: 1, group_name: Family Trip, split $1,250.50 equally for dinner")
+    assert match.slots == {"user_id": 1, "group_name": "Family Trip", "amount": 1250.5, "description": "dinner"}
+
+
+def test_description_naming_a_member_is_not_committed():
+    match = route("user_id: 1, group_name: Family Trip, split $150 equally for Bob's birthday")
+    with sqlite3.connect(DB_PATH) as conn:
+        before = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+        result = json.loads(dispatch(match))
+        after = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+    assert "error" in result
+    assert before == after
@@ -0,0 +1,112 @@
+"""
+Property checks for the integer-cent split arithmetic: over many seeded
+random inputs, shares add up to the total exactly, are never negative, and
+leftover cents always land on the same members.
+"""
+import random
+
+import pytest
+
+from chat_component.tools.bill_splitter import split_custom_amounts, split_equal, split_percentage
+from chat_component.tools.money import allocate, from_cents, to_cents
+
+ROUNDS = 500
+
+
+def cents_of(splits: dict) -> dict:
+    return {user_id: to_cents(split['share_amount']) for user_id, split in splits.items()}
+
+
+def names(count: int) -> dict:
+    return {user_id: f"User {user_id}" for user_id in range(1, count + 1)}
+
+
+def test_allocate_properties():
+    rng = random.Random(8)
+    for _ in range(ROUNDS):
+        total = rng.randint(0, 10_000_000)
+        weights = [rng.randint(0, 1000) for _ in range(rng.randint(1, 12))]
+        if not any(weights):
+            weights[0] = 1
+        shares = allocate(total, weights)
+        assert sum(shares) == total
+        assert all(share >= 0 for share in shares)
+        assert shares == allocate(total, weights)
+        # Each share is its exact proportion, rounded down or up by at most one cent
+        for share, weight in zip(shares, weights):
+            exact = total * weight / sum(weights)
+            assert exact - 1 < share < exact + 1
+
+
+def test_allocate_negative_total_mirrors_positive():
+    rng = random.Random(80)
+    for _ in range(ROUNDS):
+        total = rng.randint(1, 1_000_000)
+        weights = [rng.randint(1, 50) for _ in range(rng.randint(1, 8))]
+        assert allocate(-total, weights) == [-share for share in allocate(total, weights)]
+
+
+def test_allocate_gives_leftover_cents_by_position_on_ties():
+    assert allocate(100, [1, 1, 1]) == [34, 33, 33]
+    assert allocate(200, [1, 1, 1]) == [67, 67, 66]
+    assert allocate(1, [0, 1, 1]) == [0, 1, 0]
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_allocate_rejects_bad_weights(weights):
+    with pytest.raises(ValueError):
+        allocate(100, weights)
+
+
+def test_split_equal_properties():
+    rng = random.Random(81)
+    for _ in range(ROUNDS):
+        total_cents = rng.randint(0, 5_000_000)
+        members = [{'user_id': user_id, 'name': name} for user_id, name in names(rng.randint(1, 15)).items()]
+        shares = cents_of(split_equal(from_cents(total_cents), members))
+        assert sum(shares.values()) == total_cents
+        assert min(shares.values()) >= 0
+        assert max(shares.values()) - min(shares.values()) <= 1
+        # The extra cents go to the first members, in roster order
+        ordered = [shares[member['user_id']] for member in members]
+        assert ordered == sorted(ordered, reverse=True)
+        assert shares == cents_of(split_equal(from_cents(total_cents), members))
+
+
+def test_split_percentage_properties():
+    rng = random.Random(82)
+    for _ in range(ROUNDS):
+        total_cents = rng.randint(0, 5_000_000)
+        count = rng.randint(1, 10)
+        # Percentages with two decimals that sum to exactly 100
+        cuts = sorted(rng.randint(0, 10_000) for _ in range(count - 1))
+        basis_points = [high - low for low, high in zip([0] + cuts, cuts + [10_000])]
+        percentages = {user_id: points / 100 for user_id, points in zip(names(count), basis_points)}
+        splits = split_percentage(from_cents(total_cents), percentages, names(count))
+        shares = cents_of(splits)
+        assert sum(shares.values()) == total_cents
+        assert min(shares.values()) >= 0
+        assert {user_id: split['percentage'] for user_id, split in splits.items()} == percentages
+        assert shares == cents_of(split_percentage(from_cents(total_cents), percentages, names(count)))
+
+
+def test_split_percentage_rejects_wrong_sum():
+    with pytest.raises(ValueError):
+        split_percentage(100, {1: 50, 2: 49}, names(2))
+
+
+def test_split_custom_properties():
+    rng = random.Random(83)
+    for _ in range(ROUNDS):
+        count = rng.randint(1, 10)
+        amounts = {user_id: from_cents(rng.randint(0, 500_000)) for user_id in names(count)}
+        total_cents = sum(to_cents(amount) for amount in amounts.values())
+        shares = cents_of(split_custom_amounts(0, 0, from_cents(total_cents), amounts, names(count)))
+        assert sum(shares.values()) == total_cents
+        assert min(shares.values()) >= 0
+        assert shares == {user_id: to_cents(amount) for user_id, amount in amounts.items()}
+
+
+def test_split_custom_rejects_amounts_off_by_a_cent():
+    with pytest.raises(ValueError):
+        split_custom_amounts(0, 0, 100.00, {1: 50.00, 2: 49.99}, names(2))
@@ -0,0 +1,230 @@
+"""
+execute_plan runs a planner's steps as a DAG: dependencies first, cycles
+rejected, dependents of a failed step skipped, and never more than
+max_parallel sub-agents at once. Sub-agents are replaced by a fake run_step,
+or run for real with a scripted model standing in for Gemini.
+"""
+import asyncio
+import json
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from chat_component.tools import turn_budget
+from chat_component.tools.plan_executor import PlanError, make_execute_plan_tool, parse_plan, run_plan
+from chat_component.tools.turn_budget import CircuitBreaker, TurnBudget, TurnBudgetStats
+
+AGENTS = {"InformationAgent", "AnalysisAgent", "Google_Search_Agent"}
+
+
+def step(step_id: str, depends_on=(), agent: str = "InformationAgent", request: str = None) -> dict:
+    return {"id": step_id, "agent": agent, "request": request or f"do {step_id}", "depends_on": list(depends_on)}
+
+
+class FakeAgents:
+    """run_step stand-in that records start/finish order and concurrency"""
+
+    def __init__(self, delay: float = 0.01, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.events = []
+        self.requests = {}
+        self.running = 0
+        self.max_running = 0
+
+    async def run_step(self, agent_name: str, request: str, step_id: str):
+        self.requests[step_id] = request
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.events.append(("start", step_id))
+        try:
+            await asyncio.sleep(self.delay)
+            if step_id in self.fail:
+                raise RuntimeError(f"{step_id} broke")
+            return f"result of {step_id}"
+        finally:
+            self.running -= 1
+            self.events.append(("finish", step_id))
+
+
+def run(steps: list, agents: FakeAgents, max_parallel: int = 3) -> dict:
+    ordered = parse_plan(json.dumps(steps), AGENTS)
+    results, _ = asyncio.run(run_plan(ordered, agents.run_step, max_parallel))
+    return results
+
+
+def test_parse_plan_orders_dependencies_first():
+    ordered = parse_plan(json.dumps([step("plan", ["spend", "tips"]), step("tips"), step("spend")]), AGENTS)
+    position = {item["id"]: index for index, item in enumerate(ordered)}
+    assert position["plan"] > position["spend"] and position["plan"] > position["tips"]
+
+
+def test_placeholders_are_dependencies():
+    ordered = parse_plan(json.dumps([step("plan", request="do plan from {{spend}}"), step("spend")]), AGENTS)
+    assert [item["id"] for item in ordered] == ["spend", "plan"]
+    assert ordered[1]["depends_on"] == ["spend"]
+
+
+@pytest.mark.parametrize("steps", [
+    [step("a", ["b"]), step("b", ["a"])],
+    [step("a", ["c"]), step("b", ["a"]), step("c", ["b"])],
+    [step("a", ["a"])],
+    [step("a"), step("b", request="do b with {{c}}"), step("c", ["b"])],
+])
+def test_cycles_are_rejected(steps):
+    with pytest.raises(PlanError, match="cycle"):
+        parse_plan(json.dumps(steps), AGENTS)
+
+
+@pytest.mark.parametrize("steps, message", [
+    ("not json", "valid JSON"),
+    ([], "non-empty"),
+    ([step("a"), step("a")], "Duplicate"),
+    ([step("a", agent="Receipt_Processor")], "unknown agent"),
+    ([step("a", ["missing"])], "unknown step"),
+])
+def test_malformed_plans_are_rejected(steps, message):
+    with pytest.raises(PlanError, match=message):
+        parse_plan(steps if isinstance(steps, str) else json.dumps(steps), AGENTS)
+
+
+def test_steps_start_after_their_dependencies_finish():
+    agents = FakeAgents()
+    results = run([step("spend"), step("tips"), step("plan", ["spend", "tips"]), step("report", ["plan"])], agents)
+    assert all(result["status"] == "ok" for result in results.values())
+    order = {event: index for index, event in enumerate(agents.events)}
+    assert order[("start", "plan")] > order[("finish", "spend")]
+    assert order[("start", "plan")] > order[("finish", "tips")]
+    assert order[("start", "report")] > order[("finish", "plan")]
+    # Independent steps overlap
+    assert order[("start", "tips")] < order[("finish", "spend")]
+    assert "result of plan" in agents.requests["report"]
+
+
+def test_dependents_of_a_failed_step_are_skipped():
+    agents = FakeAgents(fail={"spend"})
+    results = run([step("spend"), step("tips"), step("plan", ["spend", "tips"]), step("report", ["plan"]),
+                   step("other", ["tips"])], agents)
+    assert results["spend"]["status"] == "error" and "spend broke" in results["spend"]["result"]
+    assert results["plan"]["status"] == "skipped"
+    assert results["report"]["status"] == "skipped"
+    assert results["tips"]["status"] == "ok" and results["other"]["status"] == "ok"
+    assert "plan" not in agents.requests and "report" not in agents.requests
+
+
+@pytest.mark.parametrize("max_parallel", [1, 2, 3])
+def test_concurrency_is_bounded(max_parallel):
+    agents = FakeAgents()
+    results = run([step(f"s{index}") for index in range(6)], agents, max_parallel)
+    assert len(results) == 6
+    assert agents.max_running == max_parallel
+
+
+class ScriptedLlm(BaseLlm):
+    """The planner submits plan once; every step agent answers with its request"""
+
+    plan: list = []
+    slow_request: str = ""
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        agent = llm_request.config.labels.get("adk_agent_name")
+        parts = [part for content in llm_request.contents for part in content.parts or []]
+        if agent == "Planner" and not any(part.function_response for part in parts):
+            part = types.Part(function_call=types.FunctionCall(
+                name="execute_plan", args={"steps": json.dumps(self.plan)}))
+        else:
+            request = next((part.text for part in parts if part.text), "")
+            if request == self.slow_request:
+                await asyncio.sleep(0.05)
+            part = types.Part(text=f"{agent} answered {request}")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def remember_request(callback_context):
+    """Step agents leave their request in session state, as real agents do with output_key"""
+    callback_context.state["last_step"] = callback_context.user_content.parts[0].text
+
+
+def planned_turn(plan: list, slow_request: str = "", setup=None) -> tuple:
+    """
+    Run one turn in which a planner submits plan to execute_plan.
+    Returns (execute_plan results by step id, final session state)
+    """
+    llm = ScriptedLlm(model="scripted", plan=plan, slow_request=slow_request)
+    step_agent = LlmAgent(name="StepAgent", model=llm, instruction="Answer",
+                          after_agent_callback=remember_request)
+    results = {}
+
+    async def keep_results(tool, args, tool_context, tool_response):
+        results.update(json.loads(tool_response)["results"])
+
+    planner = LlmAgent(name="Planner", model=llm, instruction="Plan",
+                       tools=[make_execute_plan_tool([step_agent])], after_tool_callback=keep_results)
+    runner = Runner(app_name="plan", agent=planner, session_service=InMemorySessionService(),
+                    plugins=setup(planner) if setup else [])
+
+    async def turn():
+        session = await runner.session_service.create_session(app_name="plan", user_id="1")
+        message = types.Content(role="user", parts=[types.Part(text="plan it")])
+        async for _ in runner.run_async(user_id="1", session_id=session.id, new_message=message):
+            pass
+        return await runner.session_service.get_session(app_name="plan", user_id="1", session_id=session.id)
+
+    session = asyncio.run(turn())
+    return results, session.state
+
+
+def test_step_state_is_merged_in_plan_order():
+    # second finishes first; plan order still decides which write wins
+    plan = [{"id": "a", "agent": "StepAgent", "request": "first"},
+            {"id": "b", "agent": "StepAgent", "request": "second"}]
+    results, state = planned_turn(plan, slow_request="first")
+    assert {step["status"] for step in results.values()} == {"ok"}
+    assert state["last_step"] == "second"
+
+
+def budgeted_turn(monkeypatch, plan: list, max_tool_calls: int) -> tuple:
+    """planned_turn with the turn budget installed as chat_component.agent installs it"""
+    stats = TurnBudgetStats()
+    monkeypatch.setattr(turn_budget, "turn_budget_stats", stats)
+    monkeypatch.setattr(turn_budget, "circuit_breaker", CircuitBreaker())
+
+    async def start(callback_context):
+        turn_budget._current.set(TurnBudget(max_tool_calls=max_tool_calls))
+
+    def setup(planner):
+        planner.before_agent_callback = start
+        planner.after_agent_callback = turn_budget.finish_turn_budget
+        turn_budget.guard_agent_tree(planner)
+        return [turn_budget.TurnBudgetPlugin()]
+
+    results, _ = planned_turn(plan, setup=setup)
+    return results, stats
+
+
+BUDGET_PLAN = [{"id": "a", "agent": "StepAgent", "request": "first"},
+               {"id": "b", "agent": "StepAgent", "request": "second"},
+               {"id": "c", "agent": "StepAgent", "request": "third", "depends_on": ["a", "b"]}]
+
+
+def test_each_step_is_charged_to_the_turn(monkeypatch):
+    results, stats = budgeted_turn(monkeypatch, BUDGET_PLAN, max_tool_calls=10)
+    assert {step["status"] for step in results.values()} == {"ok"}
+    # execute_plan itself plus one call per step
+    assert stats.tool_calls == 4
+
+
+def test_refused_step_fails_and_skips_its_dependents(monkeypatch):
+    results, stats = budgeted_turn(monkeypatch, BUDGET_PLAN, max_tool_calls=2)
+    assert stats.tool_calls == 2
+    assert sorted(step["status"] for step in results.values()) == ["error", "ok", "skipped"]
+    assert results["c"]["status"] == "skipped"
+    assert stats.exhausted[turn_budget.TOOL_CALLS] == 1
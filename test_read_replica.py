@@ -0,0 +1,52 @@
+"""
+A snapshot refresh must not pull the pool, or its file, out from under a
+read that is still running on it.
+"""
+import json
+import os
+
+from chat_component.tools import sql_execution
+from chat_component.tools.connection_pool import ConnectionPool, DB_PATH
+from chat_component.tools.read_replica import ReadReplica
+
+
+def snapshots(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if ".snapshot-" in name)
+
+
+def test_refresh_waits_for_running_reads(tmp_path):
+    replica = ReadReplica(snapshot=True, snapshot_dir=str(tmp_path))
+    try:
+        with replica.connection() as conn:
+            first = snapshots(tmp_path)
+            replica.refresh()
+            # The read that started on the old snapshot carries on
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] > 0
+            assert set(first) < set(snapshots(tmp_path))
+        assert len(snapshots(tmp_path)) == 1 and snapshots(tmp_path) != first
+
+        with replica.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] > 0
+    finally:
+        replica.close()
+    assert snapshots(tmp_path) == []
+
+
+def test_idle_pool_is_closed_on_refresh(tmp_path):
+    replica = ReadReplica(snapshot=True, snapshot_dir=str(tmp_path))
+    try:
+        replica.pool()
+        replica.refresh()
+        replica.refresh()
+        assert len(snapshots(tmp_path)) == 1
+    finally:
+        replica.close()
+
+
+def test_closed_pool_is_an_error_result(monkeypatch):
+    pool = ConnectionPool(DB_PATH, 1, read_only=True)
+    pool.close()
+    monkeypatch.setattr(sql_execution, "read_connection", pool.connection)
+    sql_execution.query_cache.clear()
+    result = json.loads(sql_execution.execute_query_fetch("SELECT name FROM users"))
+    assert "closed" in result["error"]
@@ -0,0 +1,64 @@
+"""
+The response cache must never hand one question's answer to a different
+question, or to a follow-up whose meaning depends on the conversation.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from chat_component.tools import response_cache as cache_module
+from chat_component.tools.response_cache import ResponseCache, lookup_response
+
+
+def stored(question: str, answer: str = "cached") -> ResponseCache:
+    cache = ResponseCache()
+    cache.store(1, question, answer, cache.version(1))
+    return cache
+
+
+def test_long_question_about_another_trip_misses():
+    cache = stored("How much did I spend at Star Bazaar on groceries and snacks during the Goa trip?")
+    assert cache.lookup(1, "How much did I spend at Star Bazaar on groceries and snacks during the Kerala trip?") is None
+    assert cache.lookup(1, "how much did i spend at star bazaar on groceries and snacks during the kerala trip") is None
+
+
+def test_other_content_words_miss():
+    cache = stored("How much did I spend on groceries last month?")
+    assert cache.lookup(1, "How much did I spend on restaurants last month?") is None
+    assert cache.lookup(1, "How much did I spend on groceries this month?") is None
+
+
+def test_paraphrase_with_the_same_content_hits():
+    cache = stored("How much did I spend on groceries last month?", "42")
+    assert cache.lookup(1, "Tell me how much I spent on groceries last month please") == "42"
+    assert cache.lookup(1, "last month, how much did I spend on groceries?") == "42"
+
+
+def context(text: str, invocation_id: str, earlier_invocations=()):
+    events = [SimpleNamespace(invocation_id=other) for other in earlier_invocations]
+    events.append(SimpleNamespace(invocation_id=invocation_id))
+    return SimpleNamespace(
+        user_content=types.Content(role="user", parts=[types.Part(text=text)]),
+        invocation_id=invocation_id,
+        _invocation_context=SimpleNamespace(session=SimpleNamespace(events=events)),
+    )
+
+
+def test_follow_up_turn_is_neither_served_nor_stored(monkeypatch):
+    cache = stored("and last month?", "answer from another conversation")
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    monkeypatch.setattr(cache_module, "RESPONSE_CACHE_ENABLED", True)
+
+    follow_up = context("and last month?", "turn-2", earlier_invocations=["turn-1"])
+    assert asyncio.run(lookup_response(follow_up)) is None
+    assert "turn-2" not in cache_module._pending
+
+
+def test_first_turn_is_served(monkeypatch):
+    cache = stored("and last month?", "first-turn answer")
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    monkeypatch.setattr(cache_module, "RESPONSE_CACHE_ENABLED", True)
+
+    served = asyncio.run(lookup_response(context("and last month?", "turn-1")))
+    assert served.parts[0].text == "first-turn answer"
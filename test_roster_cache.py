@@ -0,0 +1,47 @@
+"""
+An invalidation that lands while a roster is loading must not be undone by
+the load inserting what it read before the write.
+"""
+from chat_component.tools.roster_cache import RosterCache
+
+
+def test_invalidation_during_load_is_not_lost():
+    cache = RosterCache()
+
+    def stale_loader():
+        # A write to group 7 commits while this load is still running
+        cache.invalidate_group(7)
+        return 7, ["Luffy"]
+
+    assert cache.get_or_load(("roster", 7), stale_loader) == ["Luffy"]
+    assert cache.get_or_load(("roster", 7), lambda: (7, ["Luffy", "Zoro"])) == ["Luffy", "Zoro"]
+
+
+def test_clear_during_load_is_not_lost():
+    cache = RosterCache()
+
+    def stale_loader():
+        cache.clear()
+        return 7, ["Luffy"]
+
+    cache.get_or_load(("lookup", 1, "Crew"), stale_loader)
+    assert cache.get_or_load(("lookup", 1, "Crew"), lambda: (7, ["fresh"])) == ["fresh"]
+
+
+def test_other_groups_still_fill():
+    cache = RosterCache()
+
+    def loader():
+        cache.invalidate_group(8)
+        return 7, ["Luffy"]
+
+    cache.get_or_load(("roster", 7), loader)
+    assert cache.get_or_load(("roster", 7), lambda: (7, ["reloaded"])) == ["Luffy"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidation_before_load_allows_fill():
+    cache = RosterCache()
+    cache.invalidate_group(7)
+    cache.get_or_load(("roster", 7), lambda: (7, ["Luffy"]))
+    assert cache.get_or_load(("roster", 7), lambda: (7, ["reloaded"])) == ["Luffy"]
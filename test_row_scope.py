@@ -0,0 +1,70 @@
+"""
+Row scoping of agent SQL: a query scoped to one user never reads another
+user's rows, however the query names, aliases or nests its tables.
+"""
+import sqlite3
+
+import pytest
+
+from chat_component.tools.connection_pool import DB_PATH
+from chat_component.tools.row_scope import RowScopeError, scope_query
+
+OWNER, OTHER = 1, 2
+
+
+def run(sql_query: str, user_id: int):
+    scoped_sql, params, _ = scope_query(sql_query, user_id)
+    with sqlite3.connect(DB_PATH) as conn:
+        return conn.execute(scoped_sql, params).fetchall()
+
+
+def test_other_user_sees_none_of_the_owners_items():
+    assert run("SELECT COUNT(*) FROM expense_items", OWNER)[0][0] > 0
+    assert run("SELECT COUNT(*) FROM expense_items", OTHER)[0][0] == 0
+
+
+@pytest.mark.parametrize("cte_name", ["expenses", "EXPENSES", "expense_items", "users", "group_balances"])
+def test_cte_shadowing_a_table_is_rejected(cte_name):
+    sql = (f"WITH {cte_name}(expense_id, payer_id) AS (VALUES (1, 2), (2, 2), (3, 2)) "
+           "SELECT COUNT(*) FROM expense_items")
+    with pytest.raises(RowScopeError):
+        scope_query(sql, OTHER)
+
+
+def test_cte_shadowing_inside_a_subquery_is_rejected():
+    sql = ("SELECT * FROM (WITH expenses(expense_id, payer_id) AS (VALUES (1, 2)) "
+           "SELECT COUNT(*) FROM expense_items)")
+    with pytest.raises(RowScopeError):
+        scope_query(sql, OTHER)
+
+
+def test_policy_predicates_read_the_real_table():
+    scoped_sql, _, _ = scope_query("SELECT COUNT(*) FROM expense_receipts", OTHER)
+    assert "main.expenses" in scoped_sql
+
+
+def test_unrelated_cte_names_still_work():
+    rows = run("WITH mine AS (SELECT expense_id FROM expense_items) SELECT COUNT(*) FROM mine", OTHER)
+    assert rows[0][0] == 0
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) FROM expense_items AS expenses",
+    "SELECT COUNT(*) FROM expense_items e JOIN expenses x ON x.expense_id = e.expense_id",
+    "SELECT COUNT(*) FROM main.expense_items",
+    "SELECT COUNT(*) FROM (SELECT * FROM expense_items) AS sub",
+    "SELECT COUNT(*) FROM expense_items WHERE expense_id IN (SELECT expense_id FROM expenses)",
+    "SELECT COUNT(*) FROM (SELECT expense_id FROM expense_items UNION ALL SELECT expense_id FROM expense_receipts)",
+])
+def test_aliases_and_subqueries_stay_scoped(sql):
+    assert run(sql, OTHER)[0][0] == 0
+    assert run(sql, OWNER)[0][0] > 0
+
+
+def test_other_schemas_are_rejected():
+    with pytest.raises(RowScopeError):
+        scope_query("SELECT * FROM temp.expense_items", OTHER)
+
+
+def test_frequent_items_is_queryable():
+    run("SELECT name FROM frequent_items", OTHER)
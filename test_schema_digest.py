@@ -0,0 +1,58 @@
+"""
+The generated schema digest must describe the database the app actually
+runs on, ledger included, and go stale when any queryable table changes.
+"""
+import os
+import shutil
+import sqlite3
+
+from chat_component.tools import schema_digest
+from chat_component.tools.connection_pool import ConnectionPool
+from chat_component.tools.ledger import ensure_ledger
+from chat_component.tools.schema_digest import SCHEMA_DIGEST_PATH, build_digest, load_digest, schema_fingerprint
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_generated_digest_matches_the_database(capsys):
+    # As after the app lifespan has created the ledger
+    ensure_ledger()
+    load_digest.cache_clear()
+    digest = load_digest(SCHEMA_DIGEST_PATH)
+    assert "is stale" not in capsys.readouterr().out
+    assert "group_balances" in digest["tables"]
+    assert "group_balances(" in digest["digest"]
+
+
+def test_fingerprint_covers_tables_left_out_of_the_digest():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, name TEXT)")
+    before = build_digest(conn)
+    assert "user_groups" not in before["tables"]
+
+    # A table that appears later changes the fingerprint even though the
+    # stored digest does not list it
+    conn.execute("CREATE TABLE user_groups (user_id INTEGER, group_id INTEGER)")
+    assert schema_fingerprint(conn) != before["fingerprint"]
+
+
+def test_load_digest_never_writes(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "finance.db")
+    shutil.copy(os.path.join(ROOT, "chat_component", "mock_finance.db"), path)
+    with open(path, "rb") as f:
+        before = f.read()
+    pool = ConnectionPool(path, 1, read_only=True)
+    monkeypatch.setattr(schema_digest, "read_connection", pool.connection)
+    load_digest.cache_clear()
+    try:
+        digest = load_digest(SCHEMA_DIGEST_PATH)
+    finally:
+        load_digest.cache_clear()
+        pool.close()
+
+    # No ledger yet: the stored digest is served as is, with a warning
+    assert "group_balances" in digest["tables"]
+    assert "does not exist yet" in capsys.readouterr().out
+    with open(path, "rb") as f:
+        assert f.read() == before
+    assert sorted(os.listdir(tmp_path)) == ["finance.db"]
@@ -0,0 +1,97 @@
+"""
+The streamed answer validator must agree with json.loads however the text is
+cut into chunks, skip a Markdown code fence and reject anything after the value.
+"""
+import json
+import random
+
+import pytest
+
+from chat_component.tools.stream_json import IncrementalJsonValidator, JsonStreamError
+
+DOCUMENT = ('{"group_name": "Family Trip", "total_amount": -1250.5e-1, "quote": "say \\"hi\\"\\n",'
+            ' "unicode": "caf\\u00e9 \\ud83d\\ude00", "split_summary": {"Luffy": 41.68, "Zoro": 0},'
+            ' "settled": false, "notes": null, "items": [true, [], {}, 1E+2]}')
+
+
+def parse(chunks):
+    validator = IncrementalJsonValidator()
+    for chunk in chunks:
+        validator.feed(chunk)
+    return validator.finish()
+
+
+def cut(text: str, rng: random.Random) -> list:
+    points = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(20, len(text) - 1))))
+    return [text[start:end] for start, end in zip([0] + points, points + [len(text)])]
+
+
+def test_every_chunk_boundary_parses_the_same():
+    expected = json.loads(DOCUMENT)
+    # Every single split point, including inside escapes, \u sequences and numbers
+    for index in range(1, len(DOCUMENT)):
+        assert parse([DOCUMENT[:index], DOCUMENT[index:]]) == expected
+    assert parse(list(DOCUMENT)) == expected
+    rng = random.Random(19)
+    for _ in range(200):
+        assert parse(cut(DOCUMENT, rng)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "```json\n" + DOCUMENT + "\n```",
+    "```JSON\n" + DOCUMENT + "```",
+    "```\n" + DOCUMENT + "\n```\n",
+    "  \n```json\n" + DOCUMENT + "\n```  ",
+])
+def test_code_fence_is_skipped(text):
+    expected = json.loads(DOCUMENT)
+    assert parse([text]) == expected
+    assert parse(list(text)) == expected
+
+
+def test_complete_as_soon_as_the_value_closes():
+    validator = IncrementalJsonValidator()
+    validator.feed('{"a": [1, 2')
+    assert not validator.complete
+    validator.feed(']}')
+    assert validator.complete
+
+
+@pytest.mark.parametrize("chunks", [
+    ['{"a": 1}', ' {"b": 2}'],
+    ['{"a": 1}x'],
+    ['[1]', ']'],
+    ['```json\n{"a": 1}\n```', 'more'],
+])
+def test_trailing_data_is_rejected(chunks):
+    with pytest.raises(JsonStreamError):
+        parse(chunks)
+
+
+@pytest.mark.parametrize("chunks", [
+    ['{"a": 01}'],
+    ['{"a": 1.}'],
+    ['{"a": -', '}'],
+    ['{"a": 1e', '}'],
+    ['{"a": "\\', 'x"}'],
+    ['{"a": "\\u00', 'zz"}'],
+    ['{"a": tru', 'e1}'],
+    ['{"a": 1,}'],
+    ['{"a" 1}'],
+    ['[1, 2}'],
+    ['``json\n{}'],
+])
+def test_malformed_documents_are_rejected(chunks):
+    with pytest.raises(JsonStreamError):
+        parse(chunks)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '"open', '[', ''])
+def test_incomplete_documents_are_rejected(text):
+    with pytest.raises(JsonStreamError):
+        parse([text])
+
+
+@pytest.mark.parametrize("text", ['42', '-0.5e3', 'true', 'null', '"x"'])
+def test_bare_top_level_values(text):
+    assert parse(list(text)) == json.loads(text)
@@ -0,0 +1,104 @@
+"""
+The tool circuit breaker is shared by every turn, so only infrastructure
+failures may open it; errors caused by the request are charged to the turn.
+"""
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from google.adk.apps import App
+from google.adk.cli.utils.agent_loader import AgentLoader
+
+from chat_component.tools import turn_budget
+from chat_component.tools.turn_budget import (
+    CircuitBreaker, TurnBudget, TurnBudgetPlugin, enforce_tool_budget, record_tool_result,
+)
+
+SQL_TOOL = SimpleNamespace(name="execute_query_fetch")
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(turn_budget, "circuit_breaker", CircuitBreaker(failures=3, cooldown=60))
+    budget = TurnBudget(max_tool_errors=4)
+    token = turn_budget._current.set(budget)
+    yield budget
+    turn_budget._current.reset(token)
+
+
+def call(budget, response) -> dict:
+    """One tool call through the before and after callbacks; the refusal when refused"""
+    refused = asyncio.run(enforce_tool_budget(SQL_TOOL, {}, None))
+    asyncio.run(record_tool_result(SQL_TOOL, {}, None, refused or response))
+    return refused
+
+
+@pytest.mark.parametrize("error", [
+    "no such column: missing_column",
+    "Only SELECT queries are allowed",
+    "User 7 is not a member of group 'Family Trip'",
+    "Row scope: table 'secrets' is not allowed",
+])
+def test_request_errors_never_open_the_breaker(budget, error):
+    for _ in range(3):
+        assert call(budget, json.dumps({"error": error})) is None
+    assert turn_budget.circuit_breaker.allow(SQL_TOOL.name)
+    assert budget.tool_errors == 3 and budget.exhausted is None
+
+
+def test_request_errors_stop_the_turn(budget):
+    for _ in range(4):
+        call(budget, json.dumps({"error": "no such column: x"}))
+    assert budget.exhausted == turn_budget.TOOL_ERRORS
+    assert call(budget, json.dumps({"columns": [], "rows": []}))["not_called"]
+
+
+@pytest.mark.parametrize("error", [
+    "database is locked",
+    "database table is locked",
+    "No database connection available after 5.0s",
+    "Connection pool is closed",
+])
+def test_infrastructure_errors_open_the_breaker(budget, error):
+    for _ in range(3):
+        call(budget, json.dumps({"error": error}))
+    assert not turn_budget.circuit_breaker.allow(SQL_TOOL.name)
+    assert budget.tool_errors == 0
+
+    refused = call(budget, json.dumps({"columns": [], "rows": []}))
+    assert refused["not_called"]
+    assert budget.exhausted == turn_budget.CIRCUIT_OPEN
+    # The refusal is not a result of the tool and must not close the circuit
+    assert not turn_budget.circuit_breaker.allow(SQL_TOOL.name)
+
+
+def test_success_resets_the_count(budget):
+    call(budget, json.dumps({"error": "database is locked"}))
+    call(budget, json.dumps({"error": "database is locked"}))
+    call(budget, json.dumps({"columns": ["amount"], "rows": [[1]]}))
+    call(budget, json.dumps({"error": "database is locked"}))
+    assert turn_budget.circuit_breaker.allow(SQL_TOOL.name)
+
+
+def test_raised_tool_counts_as_infrastructure_failure(budget):
+    plugin = TurnBudgetPlugin()
+    for _ in range(3):
+        response = asyncio.run(plugin.on_tool_error_callback(
+            tool=SQL_TOOL, tool_args={}, tool_context=None, error=ValueError("boom")))
+        assert "boom" in response["error"]
+        call(budget, response)
+    assert not turn_budget.circuit_breaker.allow(SQL_TOOL.name)
+
+
+def test_plugin_leaves_exceptions_alone_without_a_budget():
+    response = asyncio.run(TurnBudgetPlugin().on_tool_error_callback(
+        tool=SQL_TOOL, tool_args={}, tool_context=None, error=ValueError("boom")))
+    assert response is None
+
+
+def test_web_server_runner_gets_the_plugin():
+    loaded = AgentLoader(agents_dir=os.path.dirname(os.path.abspath(__file__))).load_agent("chat_component")
+    assert isinstance(loaded, App) and loaded.name == "chat_component"
+    assert any(isinstance(plugin, TurnBudgetPlugin) for plugin in loaded.plugins)